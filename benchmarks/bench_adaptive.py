@@ -0,0 +1,69 @@
+import argparse
+
+import numpy as np
+
+from motion_tracker.adaptive import AdaptiveInterval
+from motion_tracker.detector import MotionDetector
+from motion_tracker.events import END, START, EventSegmenter
+from motion_tracker.sources.synthetic import generate_rssi
+
+
+def simulate(trace, schedule, min_duration: float, grace: float) -> dict:
+    # Sample the high-rate trace at whatever times the schedule asks for.
+    rate = trace.sample_rate
+    horizon = len(trace) / rate
+    det = MotionDetector()
+    seg = EventSegmenter(min_duration=min_duration)
+    spans = []
+    seg.subscribe(lambda ev: spans.append([ev.start, None]) if ev.kind == START else ev.kind == END and spans[-1].__setitem__(1, ev.t))
+    t = 0.0
+    n = 0
+    while t < horizon:
+        v = float(trace.values[int(t * rate)])
+        moving, _, std, _ = det.update(v)
+        seg.push(v, moving, std, t)
+        n += 1
+        t += schedule(det, t)
+    if spans and spans[-1][1] is None:
+        spans[-1][1] = horizon
+    truth = [(s / rate, e / rate) for s, e in trace.events]
+    lat = []
+    for s, e in truth:
+        hits = [a for a, b in spans if a >= s - grace and a <= e + grace]
+        if hits:
+            lat.append(max(0.0, min(hits) - s))
+    fa = sum(1 for a, b in spans if not any(a <= e + grace and b >= s - grace for s, e in truth))
+    return {
+        "rate_hz": n / horizon,
+        "recall": len(lat) / len(truth) if truth else float("nan"),
+        "false_alarms": fa,
+        "latency_mean_s": float(np.mean(lat)) if lat else float("nan"),
+        "latency_p90_s": float(np.percentile(lat, 90)) if lat else float("nan"),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_adaptive")
+    p.add_argument("--hours", type=float, default=2.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--bursts", type=int, default=40)
+    p.add_argument("--min-duration", type=float, default=1.0)
+    a = p.parse_args()
+
+    hz = 8.0
+    trace = generate_rssi(n=int(a.hours * 3600 * hz), seed=a.seed, sample_rate=hz, bursts=a.bursts, burst_len=(80, 480))
+    runs = {
+        "fixed 0.5s": lambda det, t: 0.5,
+        "fixed 0.25s": lambda det, t: 0.25,
+        "fixed 2.0s": lambda det, t: 2.0,
+    }
+    ctl = AdaptiveInterval(base=0.5, fast=0.25, idle=2.0)
+    runs["adaptive 0.25-2s"] = lambda det, t: ctl.next(det, t)
+    print(f"{'schedule':<18} {'rate Hz':>8} {'recall':>7} {'false':>6} {'lat mean s':>11} {'lat p90 s':>10}")
+    for name, sched in runs.items():
+        r = simulate(trace, sched, a.min_duration, grace=2.0)
+        print(f"{name:<18} {r['rate_hz']:>8.3f} {r['recall']:>7.2f} {r['false_alarms']:>6} {r['latency_mean_s']:>11.2f} {r['latency_p90_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from motion_tracker.baseline import DriftBaseline
+from motion_tracker.detector import MotionDetector
+from motion_tracker.evaluation import score_events
+from motion_tracker.replay import debounce, load_signal
+from motion_tracker.sources.synthetic import generate_rssi
+
+CONFIGS = {
+    "window_120": lambda: MotionDetector(),
+    "window_2000": lambda: MotionDetector(long_window=2000),
+    "drift_baseline": lambda: MotionDetector(baseline=DriftBaseline()),
+}
+
+
+def drifting_trace(hours: float, rate: float, seed: int):
+    # level steps (furniture, AP power) plus slow thermal-style wander on top of labelled bursts
+    n = int(hours * 3600 * rate)
+    tr = generate_rssi(n=n, seed=seed, sample_rate=rate, steps=int(hours * 3), step_size=6.0, bursts=int(hours * 6), burst_len=(10, 60))
+    t = np.arange(n) / rate
+    rng = np.random.default_rng(seed + 1)
+    wander = 4.0 * np.sin(2 * np.pi * t / rng.uniform(1800, 5400)) + np.cumsum(rng.normal(0, 0.01, n))
+    tr.values = np.clip(np.round(tr.values + wander), 0, 100)
+    return tr
+
+
+def run(make, values):
+    det = make()
+    t = time.perf_counter()
+    out = [det.update(v) for v in values]
+    per = (time.perf_counter() - t) / len(values)
+    det = make()
+    tracemalloc.start()
+    for v in values[:5000]:
+        det.update(v)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return np.fromiter((o[0] for o in out), dtype=bool, count=len(out)), per, peak
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_baseline")
+    p.add_argument("paths", nargs="*", help="Recorded quiet-room traces (CSV/.mtr); every event in them counts as a false alarm")
+    p.add_argument("--hours", type=float, default=6.0)
+    p.add_argument("--rate", type=float, default=2.0)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--min-samples", type=int, default=2)
+    p.add_argument("--config", action="append", default=None, choices=sorted(CONFIGS))
+    a = p.parse_args()
+    names = a.config or list(CONFIGS)
+
+    tr = drifting_trace(a.hours, a.rate, a.seed)
+    values = tr.values.tolist()
+    print(f"synthetic: {a.hours:g}h, {len(tr.events)} bursts, level steps + drift")
+    print(f"{'config':<16} {'us/sample':>9} {'mem KiB':>8} {'P':>5} {'R':>5} {'false':>6} {'FA/h':>6} {'lat s':>6}")
+    for name in names:
+        moving, per, peak = run(CONFIGS[name], values)
+        r = score_events(debounce(moving, a.min_samples), tr.motion, a.rate)
+        print(f"{name:<16} {per * 1e6:>9.2f} {peak / 1024:>8.1f} {r['precision']:>5.2f} {r['recall']:>5.2f} {r['false_alarms']:>6} "
+              f"{r['false_alarms'] / a.hours:>6.2f} {r['latency_mean_s']:>6.2f}")
+
+    for path in a.paths:
+        _, sig = load_signal(path)
+        hours = len(sig) / a.rate / 3600
+        print(f"{path}: {len(sig)} samples (~{hours:.2f}h at {a.rate:g} Hz)")
+        for name in names:
+            moving, _, _ = run(CONFIGS[name], sig.tolist())
+            n = int(score_events(debounce(moving, a.min_samples), np.zeros(len(sig), dtype=bool), a.rate)["predicted"])
+            print(f"  {name:<16} events={n} per_hour={n / max(hours, 1e-9):.2f}")
+
+
+if __name__ == "__main__":
+    main()
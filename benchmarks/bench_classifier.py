@@ -0,0 +1,79 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from motion_tracker.classifier import OccupancyClassifier, OccupancyModel, StreamingFeatures, build_dataset, load_training, window_features
+from motion_tracker.sources.synthetic import generate_rssi
+
+
+def occupancy_trace(people: int, n: int, seed: int) -> np.ndarray:
+    # More people: more fidgeting noise and more, longer, stronger bursts of motion.
+    if people == 0:
+        return generate_rssi(n=n, seed=seed, bursts=0, steps=1).values
+    return generate_rssi(n=n, seed=seed, steps=1, noise=1.0 + 0.5 * people, bursts=max(1, n * people // 150),
+                         burst_len=(8, 20 + 10 * people), burst_std=3.0 + 1.5 * people).values
+
+
+def write_csv(path: str, x: np.ndarray) -> None:
+    t0 = 1_700_000_000.0
+    with open(path, "w") as f:
+        f.write("timestamp,signal\n")
+        for i, v in enumerate(x):
+            f.write(f"{t0 + i * 0.5:.3f},{int(v)}\n")
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_classifier")
+    p.add_argument("--people", type=int, default=4, help="Classes 0..people")
+    p.add_argument("--samples", type=int, default=7200, help="Samples per recording")
+    p.add_argument("--window", type=int, default=32)
+    p.add_argument("--step", type=int, default=4, help="Training window stride")
+    p.add_argument("--seed", type=int, default=0)
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        for k in range(a.people + 1):
+            write_csv(os.path.join(d, f"train_data_{k}people_{1700000000 + k}.csv"), occupancy_trace(k, a.samples, a.seed + k))
+        t0 = time.perf_counter()
+        recs = load_training([os.path.join(d, "train_data_*people_*.csv")])
+        load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    X, y, _ = build_dataset(recs, a.window, a.step)
+    feat_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    model = OccupancyModel.fit(X, y, a.window)
+    fit_s = time.perf_counter() - t0
+    n = sum(len(s) for s, _ in recs)
+    print(f"load {n} samples: {load_s * 1e3:.1f} ms   features: {feat_s / len(X) * 1e9:.0f} ns/window   fit: {fit_s * 1e3:.0f} ms")
+
+    test = [(occupancy_trace(k, a.samples // 2, a.seed + 100 + k), k) for k in range(a.people + 1)]
+    Xt, yt, _ = build_dataset(test, a.window, 1)
+    pred = model.predict(Xt)
+    print(f"held-out accuracy {np.mean(pred == yt):.3f}  within one person {np.mean(np.abs(pred - yt) <= 1):.3f}")
+
+    x = test[-1][0]
+    # Compare the incremental features with the batch ones on the same trace.
+    sf = StreamingFeatures(a.window)
+    rows = []
+    for v in x:
+        f = sf.push(v)
+        if f is not None:
+            rows.append(f.copy())
+    diff = np.max(np.abs(np.array(rows) - window_features(x, a.window, 1)))
+    print(f"streaming vs batch features: max abs diff {diff:.2e}")
+
+    clf = OccupancyClassifier(model)
+    vals = [float(v) for v in x]
+    t0 = time.perf_counter()
+    for v in vals:
+        clf.push(v)
+    per = (time.perf_counter() - t0) / len(vals)
+    print(f"streaming inference: {per * 1e6:.2f} us/sample")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from motion_tracker.csi import CsiMotionDetector, read_esp32_csv
+
+
+def write_esp32(path: str, packets: int, subcarriers: int, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    base = rng.integers(-30, 30, 2 * subcarriers)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(packets):
+            v = base + rng.integers(-2, 3, 2 * subcarriers)
+            f.write(f"CSI_DATA,STA,00:00:00:00:00:00,-40,{i},[{' '.join(map(str, v.tolist()))} ]\n")
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_csi")
+    p.add_argument("--packets", type=int, default=20000)
+    a = p.parse_args()
+    rng = np.random.default_rng(1)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "esp32.csv")
+        write_esp32(path, a.packets, 64)
+        t0 = time.perf_counter()
+        frames = read_esp32_csv(path)
+        dt = time.perf_counter() - t0
+        print(f"parse esp32 64sc: {len(frames) / dt:,.0f} packets/s")
+
+    for shape in [(64, 1), (30, 3), (114, 3), (242, 4)]:
+        frames = (rng.normal(20, 2, (a.packets,) + shape) + 1j * rng.normal(0, 2, (a.packets,) + shape)).astype(np.complex64)
+        det = CsiMotionDetector()
+        t0 = time.perf_counter()
+        for f in frames:
+            det.update(f)
+        dt = time.perf_counter() - t0
+        print(f"detect {shape[0]}sc x {shape[1]}ant: {a.packets / dt:,.0f} packets/s ({dt / a.packets * 1e6:.1f} us/packet)")
+
+
+if __name__ == "__main__":
+    main()
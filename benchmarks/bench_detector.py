@@ -0,0 +1,43 @@
+import argparse
+import random
+import time
+
+from motion_tracker.detector import MotionDetector
+
+
+def per_sample_us(window: int, long_window: int, n: int, seed: int = 0) -> float:
+    rnd = random.Random(seed)
+    xs = [60 + rnd.gauss(0, 4) for _ in range(n)]
+    det = MotionDetector(window_size=window, long_window=long_window)
+    for x in xs[:long_window]:
+        det.update(x)
+    t0 = time.perf_counter()
+    for x in xs:
+        det.update(x)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def batch_us(window: int, long_window: int, n: int, seed: int = 0) -> float:
+    # the replay path: one process_batch() over the whole trace
+    rnd = random.Random(seed)
+    xs = [60 + rnd.gauss(0, 4) for _ in range(n)]
+    det = MotionDetector(window_size=window, long_window=long_window)
+    det.process_batch(xs[:long_window])
+    t0 = time.perf_counter()
+    det.process_batch(xs)
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_detector")
+    p.add_argument("--samples", type=int, default=20000)
+    a = p.parse_args()
+    print(f"{'window':>8} {'long_window':>12} {'us/sample':>10} {'batch us':>9} {'batch/s':>10}")
+    for window, long_window in [(10, 120), (30, 120), (30, 600), (30, 1000), (120, 2000), (300, 5000), (1000, 20000)]:
+        us = per_sample_us(window, long_window, a.samples)
+        b = batch_us(window, long_window, a.samples)
+        print(f"{window:>8} {long_window:>12} {us:>10.2f} {b:>9.3f} {1e6 / b:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+import time
+
+import numpy as np
+
+from motion_tracker.detector import MotionDetector
+from motion_tracker.engine import ShardedEngine
+from motion_tracker.sources.synthetic import generate_rssi
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_engine")
+    p.add_argument("--streams", type=int, default=256)
+    p.add_argument("--samples", type=int, default=2000, help="Samples per stream")
+    p.add_argument("--block", type=int, default=32, help="Samples per stream per push_batch call")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    a = p.parse_args()
+
+    data = np.stack([generate_rssi(n=a.samples, seed=s).values for s in range(a.streams)])
+    total = data.size
+
+    t0 = time.perf_counter()
+    for s in range(a.streams):
+        det = MotionDetector()
+        for v in data[s].tolist():
+            det.update(v)
+    base = total / (time.perf_counter() - t0)
+    print(f"{'in-process update()':<22} {base:>12,.0f} samples/s")
+
+    ids = np.repeat(np.arange(a.streams), a.block)
+    print(f"{'workers':<22} {'samples/s':>12} {'speedup':>8} {'busy %':>7} {'events':>7}")
+    for w in a.workers:
+        events = []
+        eng = ShardedEngine(w, on_event=events.append, capacity=1 << 18, min_samples=2)
+        t0 = time.perf_counter()
+        for i in range(0, a.samples, a.block):
+            chunk = data[:, i:i + a.block]
+            k = chunk.shape[1]
+            t = np.tile(np.arange(i, i + k) * 0.5, a.streams)
+            eng.push_batch(ids if k == a.block else np.repeat(np.arange(a.streams), k), t, chunk.ravel())
+        eng.close()
+        el = time.perf_counter() - t0
+        rate = eng.processed / el
+        busy = sum(eng.busy) / (w * el) * 100
+        print(f"{w:<22} {rate:>12,.0f} {rate / base:>7.2f}x {busy:>6.1f} {len(events):>7}")
+
+
+if __name__ == "__main__":
+    main()
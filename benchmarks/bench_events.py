@@ -0,0 +1,54 @@
+import argparse
+import time
+
+import numpy as np
+
+from motion_tracker.detector import MotionDetector
+from motion_tracker.events import EventSegmenter
+from motion_tracker.sources.synthetic import generate_rssi
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_events")
+    p.add_argument("--samples", type=int, default=200000)
+    p.add_argument("--min-samples", type=int, default=2)
+    a = p.parse_args()
+
+    trace = generate_rssi(n=a.samples, seed=0)
+    moving, avg, std, _ = MotionDetector().process_batch(trace.values)
+    t = np.arange(a.samples) / trace.sample_rate
+    vals = trace.values.tolist()
+    mv = moving.tolist()
+    sd = std.tolist()
+    ts = t.tolist()
+
+    t0 = time.perf_counter()
+    for i in range(a.samples):
+        pass
+    loop = time.perf_counter() - t0
+
+    seg = EventSegmenter(a.min_samples)
+    n_push = []
+    seg.subscribe(n_push.append)
+    push = seg.push
+    t0 = time.perf_counter()
+    for i in range(a.samples):
+        push(vals[i], mv[i], sd[i], ts[i])
+    per = time.perf_counter() - t0 - loop
+
+    seg = EventSegmenter(a.min_samples)
+    n_batch = []
+    seg.subscribe(n_batch.append)
+    t0 = time.perf_counter()
+    seg.push_batch(t, trace.values, moving, std)
+    batch = time.perf_counter() - t0
+
+    same = [(e.kind, e.start, e.t, e.samples, e.max_std, e.mean_signal) for e in n_push] == \
+           [(e.kind, e.start, e.t, e.samples, e.max_std, e.mean_signal) for e in n_batch]
+    print(f"push:       {per / a.samples * 1e9:.0f} ns/sample ({a.samples / per:,.0f} samples/s)")
+    print(f"push_batch: {batch / a.samples * 1e9:.1f} ns/sample ({a.samples / batch:,.0f} samples/s)")
+    print(f"events={len(n_push)} identical={same}")
+
+
+if __name__ == "__main__":
+    main()
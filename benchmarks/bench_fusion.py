@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import numpy as np
+
+from motion_tracker.fusion import FusionEngine, LinkAligner, ZoneFusion, all_links, grid_zones, link_zone_matrix
+from motion_tracker.sources.synthetic import generate_multilink, perimeter_nodes
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_fusion")
+    p.add_argument("--nodes", type=int, default=16, help="Nodes on the walls; links = every pair")
+    p.add_argument("--grid", type=int, default=4, help="Zones per side")
+    p.add_argument("--room", type=float, default=6.0, help="Room side in metres")
+    p.add_argument("--seconds", type=float, default=600.0)
+    p.add_argument("--window", type=int, default=10, help="Per-link detector window")
+    p.add_argument("--seed", type=int, default=0)
+    a = p.parse_args()
+
+    tx, rx = all_links(perimeter_nodes(a.nodes, a.room, a.room))
+    centers = grid_zones(a.room, a.room, a.grid, a.grid)
+    W = link_zone_matrix(tx, rx, centers)
+    trace = generate_multilink(tx, rx, seconds=a.seconds, seed=a.seed, width=a.room, height=a.room)
+    link, t, v = trace.merged()
+    print(f"{len(tx)} links, {len(centers)} zones, {len(t)} samples over {a.seconds:.0f}s")
+
+    # zone update cost alone: one aligned bin through ZoneFusion
+    zf = ZoneFusion(W)
+    s = np.random.default_rng(0).random(len(tx))
+    live = np.ones(len(tx), dtype=bool)
+    reps = 5000
+    c = time.perf_counter()
+    for _ in range(reps):
+        zf.update(s, live)
+    print(f"zone update ({len(tx)} links x {len(centers)} zones): {(time.perf_counter() - c) / reps * 1e6:.1f} us")
+
+    al = LinkAligner(len(tx))
+    c = time.perf_counter()
+    al.push_batch(link, t, v)
+    bins = al.advance()
+    print(f"aligner push_batch: {(time.perf_counter() - c) / len(t) * 1e9:.0f} ns/sample, {len(bins)} bins, late={al.late}")
+
+    eng = FusionEngine(W, window_size=a.window)
+    events = []
+    eng.subscribe(events.append)
+    results = []
+    poll = []
+    ll, tt, vv = link.tolist(), t.tolist(), v.tolist()
+    c = time.perf_counter()
+    for i in range(len(tt)):
+        eng.push(ll[i], tt[i], vv[i])
+        if i % 16 == 15:
+            c0 = time.perf_counter()
+            out = eng.poll()
+            if out:
+                poll.append((time.perf_counter() - c0) / len(out))
+            results += [(bt, sc.copy(), eng.fusion.active.copy()) for bt, sc in out]
+    total = time.perf_counter() - c
+    print(f"engine: {total / len(tt) * 1e6:.1f} us/sample incl. detectors, poll {np.median(poll) * 1e6:.1f} us/bin (p99 {np.percentile(poll, 99) * 1e6:.1f})")
+
+    # score against the person's true position at each bin's end
+    hit = near = present = detected = empty = false = 0
+    step = a.room / a.grid
+    for bt, sc, act in results:
+        k = min(int(bt / 0.1), len(trace.truth_pos) - 1)
+        pos = trace.truth_pos[k]
+        if np.isnan(pos[0]):
+            empty += 1
+            false += bool(act.any())
+            continue
+        present += 1
+        if not act.any():
+            continue
+        detected += 1
+        best = centers[int(np.argmax(np.where(act, sc, -np.inf)))]
+        dist = np.abs(best - pos).max()
+        hit += dist <= step / 2
+        near += dist <= 1.5 * step
+    print(f"presence recall {detected / max(present, 1):.2f}, false occupancy {false / max(empty, 1):.2f}, "
+          f"right zone {hit / max(detected, 1):.2f}, within one zone {near / max(detected, 1):.2f}, zone events {len(events)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import time
+
+from motion_tracker.detector import MotionDetector
+from motion_tracker.metrics import Metrics
+from motion_tracker.sources.synthetic import generate_rssi
+
+
+def loop(values, m) -> float:
+    # same shape as cli.run.worker: guarded per-stage timing around the work
+    det = MotionDetector()
+    clock = time.perf_counter_ns
+    t = time.perf_counter()
+    for v in values:
+        if m:
+            c0 = clock()
+        det.update(v)
+        if m:
+            c1 = clock()
+            m.record("update", c1 - c0)
+            m.inc("samples")
+    return (time.perf_counter() - t) / len(values)
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_metrics")
+    p.add_argument("--samples", type=int, default=100000)
+    p.add_argument("--repeat", type=int, default=5)
+    a = p.parse_args()
+    values = generate_rssi(n=a.samples).values.tolist()
+    off = min(loop(values, None) for _ in range(a.repeat))
+    on = min(loop(values, Metrics()) for _ in range(a.repeat))
+    print(f"detector loop: off {off * 1e6:.2f} us/sample, on {on * 1e6:.2f} us/sample (+{(on - off) * 1e6:.2f} us)")
+    m = Metrics()
+    loop(values, m)
+    t = time.perf_counter()
+    text = m.prometheus()
+    print(f"prometheus export {(time.perf_counter() - t) * 1e3:.2f} ms, {len(text)} bytes")
+
+
+if __name__ == "__main__":
+    main()
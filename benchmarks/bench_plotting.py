@@ -0,0 +1,74 @@
+import argparse
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from motion_tracker.plotting import LivePlot
+
+
+def make_data(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    sig = 60 + rng.normal(0, 3, n)
+    std = np.abs(rng.normal(4, 2, n))
+    ev = (np.arange(n) // 50) % 4 == 0
+    return sig, std, ev
+
+
+def bench_blit(n: int, frames: int, per_frame: int, span_s: float = 0.0) -> float:
+    # span_s=0 shows the whole history; otherwise only the last span_s seconds are visible
+    fig = Figure(figsize=(9, 5))
+    FigureCanvasAgg(fig)
+    plot = LivePlot(fig.add_subplot(211), fig.add_subplot(212), 8.0, capacity=n, span_s=span_s or n * 0.1)
+    sig, std, ev = make_data(n + frames * per_frame)
+    for i in range(n):
+        plot.append(sig[i], sig[i], std[i], ev[i], t=i * 0.1)
+    plot.draw()
+    t0 = time.perf_counter()
+    for f in range(frames):
+        for j in range(per_frame):
+            i = n + f * per_frame + j
+            plot.append(sig[i], sig[i], std[i], ev[i], t=i * 0.1)
+        plot.draw()
+    return (time.perf_counter() - t0) / frames
+
+
+def bench_replot(n: int, frames: int) -> float:
+    # The previous approach: clear both axes and replot with one axvline per
+    # motion sample every frame.
+    fig = Figure(figsize=(9, 5))
+    canvas = FigureCanvasAgg(fig)
+    ax1, ax2 = fig.add_subplot(211), fig.add_subplot(212)
+    sig, std, ev = make_data(n)
+    xs = np.arange(n) * 0.1
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        ax1.clear()
+        ax1.plot(xs, sig)
+        ax1.plot(xs, sig)
+        for e in xs[ev]:
+            ax1.axvline(e, color="red", alpha=0.25)
+        ax2.clear()
+        ax2.plot(xs, std)
+        ax2.plot(xs, np.full(n, 8.0))
+        for e in xs[ev]:
+            ax2.axvline(e, color="red", alpha=0.25)
+        canvas.draw()
+    return (time.perf_counter() - t0) / frames
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_plotting")
+    p.add_argument("--frames", type=int, default=20)
+    a = p.parse_args()
+    print(f"{'history':>8} {'blit ms/frame':>14} {'blit 120s span':>15} {'replot ms/frame':>16}")
+    for n in (200, 2000, 20000, 200000):
+        blit = bench_blit(n, a.frames, 5) * 1e3
+        window = bench_blit(n, a.frames, 5, 120.0) * 1e3
+        replot = bench_replot(n, max(1, a.frames // 10)) * 1e3 if n <= 2000 else float("nan")
+        print(f"{n:>8} {blit:>14.2f} {window:>15.2f} {replot:>16.2f}")
+
+
+if __name__ == "__main__":
+    main()
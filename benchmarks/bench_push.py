@@ -0,0 +1,83 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+from motion_tracker.push import PushHub, _ws_read
+
+
+async def sse_client(port: int, n: int, lat: list) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /events?hz=0 HTTP/1.1\r\nHost: x\r\n\r\n")
+    await reader.readuntil(b"\r\n\r\n")
+    while len(lat) < n:
+        block = await reader.readuntil(b"\n\n")
+        now = time.monotonic()
+        for line in block.decode().splitlines():
+            if line.startswith("data: "):
+                lat.append(now - json.loads(line[6:])["t_pub"])
+    writer.close()
+
+
+async def ws_client(port: int, n: int, lat: list) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(f"GET /ws?hz=0 HTTP/1.1\r\nHost: x\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                 f"Sec-WebSocket-Version: 13\r\n\r\n".encode())
+    await reader.readuntil(b"\r\n\r\n")
+    while len(lat) < n:
+        op, payload = await _ws_read(reader)
+        now = time.monotonic()
+        if op == 0x1:
+            lat.append(now - json.loads(payload)["t_pub"])
+    writer.close()
+
+
+def pct(a, q):
+    return float(np.percentile(a, q)) * 1e3
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_push")
+    p.add_argument("--events", type=int, default=300)
+    p.add_argument("--gap-ms", type=float, default=10.0, help="Mean gap between state changes")
+    p.add_argument("--poll-ms", type=float, default=100.0, help="Polling interval to compare against")
+    a = p.parse_args()
+
+    hub = PushHub()
+    hub.start(port=0)
+    sse, ws = [], []
+    pub_times = []
+
+    def publisher():
+        time.sleep(0.3)
+        rnd = random.Random(0)
+        for i in range(a.events):
+            t = time.monotonic()
+            pub_times.append(t)
+            hub.publish_state("bench", i % 2 == 0, t)
+            time.sleep(rnd.expovariate(1e3 / a.gap_ms))
+
+    async def run():
+        th = threading.Thread(target=publisher, daemon=True)
+        th.start()
+        await asyncio.wait_for(asyncio.gather(sse_client(hub.port, a.events, sse), ws_client(hub.port, a.events, ws)), 60)
+
+    asyncio.run(run())
+    hub.stop()
+
+    t = np.array(pub_times)
+    polled = a.poll_ms / 1e3 - np.mod(t - t[0] + random.random() * a.poll_ms / 1e3, a.poll_ms / 1e3)
+    print(f"{'path':<18} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, lat in (("SSE", sse), ("WebSocket", ws), (f"poll {a.poll_ms:.0f} ms", polled)):
+        print(f"{name:<18} {pct(lat, 50):>8.3f} {pct(lat, 99):>8.3f} {max(lat) * 1e3:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
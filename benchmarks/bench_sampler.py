@@ -0,0 +1,39 @@
+import argparse
+import random
+import time
+
+from motion_tracker.sampler import Sampler
+
+
+class NoiseSource:
+    def __init__(self, seed: int):
+        self.rnd = random.Random(seed)
+
+    def read(self) -> float:
+        return 60 + self.rnd.gauss(0, 3)
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_sampler")
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--interval", type=float, default=0.1)
+    p.add_argument("--workers", type=int, default=0)
+    a = p.parse_args()
+    print(f"{'streams':>8} {'samples/s':>10} {'cpu %':>6} {'jit mean ms':>12} {'jit max ms':>11} {'missed':>7}")
+    for n in (10, 100, 300, 1000):
+        s = Sampler(workers=a.workers)
+        for i in range(n):
+            s.add(f"s{i}", NoiseSource(i), a.interval)
+        c0 = time.process_time()
+        s.run(duration=a.duration)
+        cpu = time.process_time() - c0
+        s.stop()
+        total = sum(st.stats.samples for st in s.streams)
+        jmean = sum(st.stats.jitter_sum for st in s.streams) / max(total, 1)
+        jmax = max(st.stats.jitter_max for st in s.streams)
+        missed = sum(st.stats.missed for st in s.streams)
+        print(f"{n:>8} {total / a.duration:>10.0f} {cpu / a.duration * 100:>6.1f} {jmean * 1e3:>12.3f} {jmax * 1e3:>11.3f} {missed:>7}")
+
+
+if __name__ == "__main__":
+    main()
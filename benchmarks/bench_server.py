@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import multiprocessing as mp
+import time
+
+from motion_tracker.server import IngestServer, fake_node
+
+
+def clients(port: int, nodes: int, rate: float, duration: float, batch: int, proto: str, width: int) -> None:
+    async def run():
+        await asyncio.gather(*(fake_node("127.0.0.1", port, i, rate, duration, batch, proto, width) for i in range(nodes)))
+    asyncio.run(run())
+
+
+async def one(port: int, nodes: int, rate: float, duration: float, batch: int, proto: str, width: int):
+    srv = IngestServer(capacity=4096, min_samples=2)
+    await srv.start("127.0.0.1", port, udp=proto == "udp", tcp=proto == "tcp")
+    proc = mp.Process(target=clients, args=(port, nodes, rate, duration, batch, proto, width))
+    c0 = time.process_time()
+    t0 = time.perf_counter()
+    proc.start()
+    while proc.is_alive():
+        await asyncio.sleep(0.05)
+    last = -1
+    while srv.packets != last:
+        last = srv.packets
+        await asyncio.sleep(0.3)
+    await srv.stop()
+    el = time.perf_counter() - t0
+    cpu = time.process_time() - c0
+    sent = nodes * int(rate * duration / batch)
+    return srv, sent, el, cpu
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_server")
+    p.add_argument("--port", type=int, default=9751)
+    p.add_argument("--duration", type=float, default=5.0)
+    p.add_argument("--rate", type=float, default=100.0, help="Samples/s per node")
+    p.add_argument("--batch", type=int, default=5, help="Samples per packet")
+    p.add_argument("--width", type=int, default=0, help="CSI subcarriers (0 = RSSI)")
+    p.add_argument("--nodes", type=int, nargs="+", default=[10, 50, 200])
+    a = p.parse_args()
+    print(f"{'proto':>5} {'nodes':>6} {'pkts/s':>8} {'recv %':>7} {'srv cpu %':>9} {'pkts/cpu-s':>11} {'dropped':>8} {'lost':>6}")
+    for proto in ("udp", "tcp"):
+        for n in a.nodes:
+            srv, sent, el, cpu = asyncio.run(one(a.port, n, a.rate, a.duration, a.batch, proto, a.width))
+            lost = sum(x.lost for x in srv.nodes.values())
+            print(f"{proto:>5} {n:>6} {srv.packets / el:>8.0f} {srv.packets / max(sent, 1) * 100:>7.1f} {cpu / el * 100:>9.1f} "
+                  f"{srv.packets / max(cpu, 1e-9):>11.0f} {srv.dropped:>8} {lost:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from motion_tracker.spectral import StftFeatures
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_spectral")
+    p.add_argument("--samples", type=int, default=50000)
+    a = p.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'fft':>6} {'hop':>4} {'rate Hz':>8} {'ch':>4} {'samples/s':>10} {'frames/s':>9} {'state KiB':>10} {'peak KiB':>9}")
+    for fft_size, hop, rate, channels in [(64, 8, 2.0, 1), (256, 32, 100.0, 1), (1024, 64, 1000.0, 1), (128, 16, 100.0, 64), (256, 32, 1000.0, 90)]:
+        xs = rng.normal(0, 1, (a.samples, channels))
+        tracemalloc.start()
+        sp = StftFeatures(fft_size=fft_size, hop=hop, sample_rate=rate, channels=channels)
+        t0 = time.perf_counter()
+        for x in xs:
+            sp.push(x)
+        dt = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{fft_size:>6} {hop:>4} {rate:>8g} {channels:>4} {a.samples / dt:>10,.0f} {sp.frames / dt:>9,.0f} {sp.nbytes() / 1024:>10.1f} {peak / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
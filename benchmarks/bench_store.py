@@ -0,0 +1,89 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from motion_tracker.store import DAY, EventStore
+
+
+def synthetic_events(days: int, per_day: int, sources, seed: int):
+    rng = np.random.default_rng(seed)
+    t0 = 1_700_000_000.0 - days * DAY
+    rows = []
+    for src in sources:
+        n = days * per_day
+        start = np.sort(t0 + rng.uniform(0, days * DAY, n))
+        dur = rng.exponential(20.0, n) + 1.0
+        for s, d, mx in zip(start, dur, rng.uniform(8, 40, n)):
+            rows.append((src, float(s), float(s + d), float(mx), 60.0, int(d * 2)))
+    rows.sort(key=lambda r: r[1])
+    return t0, rows
+
+
+def best_ms(fn, repeat: int = 20) -> float:
+    out = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        out.append(time.perf_counter() - t)
+    return min(out) * 1e3
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_store")
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--per-day", type=int, default=150)
+    p.add_argument("--sources", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    a = p.parse_args()
+
+    sources = [f"room{i}" for i in range(a.sources)]
+    t0, rows = synthetic_events(a.days, a.per_day, sources, a.seed)
+    with tempfile.TemporaryDirectory() as d:
+        store = EventStore(os.path.join(d, "events.db"))
+        t = time.perf_counter()
+        for i in range(0, len(rows), 1000):
+            store.add_many(rows[i:i + 1000])
+        bulk = time.perf_counter() - t
+        n_single = 200
+        t = time.perf_counter()
+        for r in rows[-n_single:]:
+            store.add("single", *r[1:])
+        single = (time.perf_counter() - t) / n_single
+        print(f"{len(rows)} events: bulk insert {bulk / len(rows) * 1e6:.1f} us/event, single add {single * 1e6:.0f} us/event")
+        print(f"db size {os.path.getsize(store.path) / 1e6:.1f} MB + wal {os.path.getsize(store.path + '-wal') / 1e6:.1f} MB")
+
+        mid = t0 + a.days * DAY / 2 + 14 * 3600 + 123.0
+        end = t0 + a.days * DAY
+        src = sources[0]
+        starts = np.array([r[1] for r in rows if r[0] == src])
+        ends = np.array([r[2] for r in rows if r[0] == src])
+
+        def brute(s, e):
+            return float(np.clip(np.minimum(ends, e) - np.maximum(starts, s), 0, None).sum())
+
+        checks = [
+            ("events 2h one source", lambda: store.events(mid, mid + 7200, src), None),
+            ("events 2h all sources", lambda: store.events(mid, mid + 7200), None),
+            ("motion 2h one source", lambda: store.motion_seconds(mid, mid + 7200, src), brute(mid, mid + 7200)),
+            ("motion year one source", lambda: store.motion_seconds(t0 + 77.0, end, src), brute(t0 + 77.0, end)),
+            ("rollup by day, year", lambda: store.rollup(t0, end, src, "day"), None),
+            ("rollup by hour, 1 week", lambda: store.rollup(mid, mid + 7 * DAY, None, "hour"), None),
+        ]
+        for name, fn, want in checks:
+            ms = best_ms(fn)
+            got = fn()
+            extra = f"rows={len(got)}" if want is None else f"got={got:.1f}s brute={want:.1f}s"
+            print(f"{name:<24} {ms:8.3f} ms  {extra}")
+
+        t = time.perf_counter()
+        ne, _ = store.prune(t0 + 300 * DAY)
+        store.compact()
+        print(f"prune+compact {ne} events: {(time.perf_counter() - t) * 1e3:.0f} ms, db {os.path.getsize(store.path) / 1e6:.1f} MB")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
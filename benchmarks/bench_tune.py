@@ -0,0 +1,77 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from motion_tracker.detector import MotionDetector
+from motion_tracker.evaluation import score_events
+from motion_tracker.replay import debounce
+from motion_tracker.sources.synthetic import generate_rssi
+from motion_tracker.tune import DEFAULT_SPACE, Sweep, grid_configs, load_labeled, random_configs, rank, sweep
+
+
+def write_recording(dirname: str, i: int, hours: float, rate: float, seed: int) -> str:
+    # the CLI's --csv and --events-csv formats, with ISO timestamps
+    n = int(hours * 3600 * rate)
+    tr = generate_rssi(n=n, seed=seed, sample_rate=rate, steps=int(hours * 2), bursts=int(hours * 8))
+    ts = np.datetime_as_string(np.datetime64("2024-01-01T00:00:00", "us") + (np.arange(n) / rate * 1e6).astype("timedelta64[us]"))
+    rec = os.path.join(dirname, f"motion_{i}.csv")
+    ev = os.path.join(dirname, f"events_{i}.csv")
+    with open(rec, "w", encoding="utf-8") as f:
+        f.write("timestamp,signal,avg,std,motion\n")
+        f.writelines(f"{t},{v:g},0,0,0\n" for t, v in zip(ts.tolist(), tr.values.tolist()))
+    with open(ev, "w", encoding="utf-8") as f:
+        f.write("start,end,duration_s,max_std,mean_signal\n")
+        f.writelines(f"{ts[s]},{ts[e - 1]},{(e - s) / rate:.3f},0,0\n" for s, e in tr.events)
+    return f"{rec}={ev}"
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_tune")
+    p.add_argument("--hours", type=float, default=24.0, help="Total recorded time")
+    p.add_argument("--recordings", type=int, default=4)
+    p.add_argument("--rate", type=float, default=2.0)
+    p.add_argument("--configs", type=int, default=1000, help="Random configs to time (0 = the full default grid)")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--check", type=int, default=3, help="Configs to re-score with a fresh MotionDetector per config")
+    a = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as d:
+        specs = [write_recording(d, i, a.hours / a.recordings, a.rate, i) for i in range(a.recordings)]
+        t = time.perf_counter()
+        recs = [load_labeled(s) for s in specs]
+        print(f"loaded {sum(len(s) for s, _ in recs)} samples in {a.recordings} recordings in {time.perf_counter() - t:.2f}s")
+
+    interval = 1.0 / a.rate
+    space = dict(DEFAULT_SPACE)
+    configs = random_configs({**space, "threshold": "3:12", "dev_factor": "2:6", "down_ratio": "0.4:0.8"}, a.configs) if a.configs else grid_configs(space)
+    workers = os.cpu_count() if a.workers is None else a.workers
+    t = time.perf_counter()
+    results = rank(sweep(recs, configs, interval, 2, workers))
+    el = time.perf_counter() - t
+    groups = len({Sweep.group_key(c) for c in configs})
+    print(f"sweep: {len(configs)} configs ({groups} shared-intermediate groups) on {workers} workers in {el:.1f}s, "
+          f"{len(configs) / el:.0f} configs/s")
+
+    # the same configs through a fresh detector each, as a manual replay would
+    by_cfg = dict(results)
+    t = time.perf_counter()
+    for cfg, _ in results[:a.check]:
+        moving = [debounce(MotionDetector(**dict(zip(MotionDetector.PARAMS, cfg))).process_batch(s)[0], 2) for s, _ in recs]
+        pred = np.concatenate([np.append(m, False) for m in moving])
+        truth = np.concatenate([np.append(tr, False) for _, tr in recs])
+        ref = score_events(pred, truth, a.rate)
+        same = all(ref[k] == by_cfg[cfg][k] or (ref[k] != ref[k] and by_cfg[cfg][k] != by_cfg[cfg][k]) for k in ref)
+        print(f"  check {cfg}: {'identical' if same else 'MISMATCH'}")
+    if a.check:
+        per = (time.perf_counter() - t) / min(a.check, len(results))
+        print(f"fresh detector per config: {per:.2f}s, {el / len(configs) * workers:.3f}s per config per worker in the sweep")
+    cfg, r = results[0]
+    print(f"best {dict(zip(MotionDetector.PARAMS, cfg))}: P={r['precision']:.2f} R={r['recall']:.2f} F1={r['f1']:.2f} "
+          f"FA/h={r['fa_per_hour']:.2f} latency={r['latency_mean_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import queue
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+from motion_tracker.channel import SampleChannel
+from motion_tracker.plotting import RingSeries
+
+
+def simulate(hours: float, rate: float, fps: float, stall_every: float, stall_s: float, capacity: int, max_rows: int, budget: int,
+             unbounded: bool):
+    # deterministic interleave in simulated time: the worker writes rate/fps samples
+    # per frame; every stall_every seconds the UI misses stall_s seconds of frames.
+    # The queue path handles at most `budget` samples a frame (per-sample plot and
+    # Tk work), the channel path one compacted batch.
+    rng = np.random.default_rng(0)
+    per_frame = max(1, int(rate / fps))
+    frames = int(hours * 3600 * fps)
+    stall = int(stall_s * fps)
+    period = max(1, int(stall_every * fps))
+    ch = SampleChannel(capacity)
+    q = queue.Queue()
+    series = RingSeries(2000)
+    events = deque(maxlen=500)
+    log = deque(maxlen=1000)
+    vals = rng.normal(50, 2, per_frame).tolist()
+    tracemalloc.start()
+    marks = []
+    hour = int(3600 * fps)
+    n = 0
+    for f in range(frames):
+        for v in vals:
+            t = n / rate
+            if unbounded:
+                q.put((t, v, v, 1.0, False, "Empty", None))
+            else:
+                ch.write(t, v, v, 1.0, False, (v, False, "Empty"))
+            n += 1
+        if f % 60 == 0:
+            events.append((f, f, 1.0, 2.0, 50.0))
+        if f % period < stall:
+            continue
+        if unbounded:
+            for _ in range(budget):
+                if q.empty():
+                    break
+                t, v, a, s, e, c, err = q.get()
+                series.append(t, v, a, s, e)
+        else:
+            rows, (v, _, _), _ = ch.read(max_rows)
+            series.extend(rows["t"], rows["sig"], rows["avg"], rows["std"], rows["ev"])
+        log.append(f"Recorded: {v}%")
+        if (f + 1) % hour == 0:
+            marks.append(tracemalloc.get_traced_memory()[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return n, marks, peak, 0 if unbounded else ch.dropped
+
+
+def race(seconds: float, capacity: int):
+    # real threads: the worker writes flat out while the reader sleeps between
+    # frames; every row must come back whole and in order
+    ch = SampleChannel(capacity)
+    stop = threading.Event()
+
+    def produce():
+        i = 0
+        while not stop.is_set():
+            ch.write(float(i), float(i), 2.0 * i, 3.0 * i, i % 2 == 1, (i,))
+            i += 1
+
+    th = threading.Thread(target=produce, daemon=True)
+    th.start()
+    rows_seen = bad = 0
+    last = -1.0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        time.sleep(0.01)
+        rows, _, _ = ch.read()
+        if not len(rows):
+            continue
+        t = rows["t"]
+        bad += int(np.count_nonzero(rows["avg"] != 2 * t) + np.count_nonzero(rows["std"] != 3 * t)
+                   + np.count_nonzero(rows["ev"] != (t % 2 == 1)) + np.count_nonzero(np.diff(t) != 1) + (t[0] <= last))
+        last = t[-1]
+        rows_seen += len(rows)
+    stop.set()
+    th.join()
+    rows_seen += len(ch.read()[0])
+    return ch.head, rows_seen, ch.dropped, bad
+
+
+def main():
+    p = argparse.ArgumentParser(prog="stress_channel")
+    p.add_argument("--hours", type=float, default=4.0, help="Simulated session length")
+    p.add_argument("--rate", type=float, default=200.0, help="Samples per second from the worker")
+    p.add_argument("--fps", type=float, default=10.0, help="UI frames per second")
+    p.add_argument("--stall-every", type=float, default=300.0, help="Seconds between UI stalls")
+    p.add_argument("--stall", type=float, default=30.0, help="Length of each UI stall in seconds")
+    p.add_argument("--capacity", type=int, default=4096)
+    p.add_argument("--max-rows", type=int, default=2000)
+    p.add_argument("--budget", type=int, default=18, help="Samples per frame the queue-based UI keeps up with")
+    p.add_argument("--race-seconds", type=float, default=3.0)
+    a = p.parse_args()
+
+    for unbounded in (False, True):
+        c = time.perf_counter()
+        n, marks, peak, dropped = simulate(a.hours, a.rate, a.fps, a.stall_every, a.stall, a.capacity, a.max_rows, a.budget, unbounded)
+        el = time.perf_counter() - c
+        name = "queue.Queue" if unbounded else "SampleChannel"
+        hourly = " ".join(f"{m / 1024:.0f}" for m in marks)
+        print(f"{name:<14} {n} samples in {el:.1f}s, KiB per hour: {hourly}, peak {peak / 1024:.0f} KiB, dropped {dropped}")
+    ch = SampleChannel(a.capacity)
+    reps = 200000
+    c = time.perf_counter()
+    for i in range(reps):
+        ch.write(float(i), 1.0, 1.0, 1.0, False, (1.0, False, "Empty"))
+    print(f"write: {(time.perf_counter() - c) / reps * 1e6:.2f} us")
+    written, seen, dropped, bad = race(a.race_seconds, a.capacity)
+    print(f"threads: {written} written, {seen} read, {dropped} dropped, {bad} torn/out-of-order rows")
+
+
+if __name__ == "__main__":
+    main()
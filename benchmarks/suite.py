@@ -0,0 +1,126 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from motion_tracker.baseline import DriftBaseline
+from motion_tracker.csi import CsiMotionDetector
+from motion_tracker.detector import MotionDetector
+from motion_tracker.evaluation import score_events
+from motion_tracker.replay import debounce
+from motion_tracker.sources.synthetic import generate_csi, generate_rssi
+from motion_tracker.spectral import StftFeatures
+
+# generate_csi's burst amplitude; a 0.5 Hz burst moves about a quarter of it
+# within one 30-frame window at 100 Hz, well above the 0.5 noise floor
+CSI_BURST_GAIN = 4.0
+
+CONFIGS = {
+    "default": lambda: MotionDetector(),
+    "short_window": lambda: MotionDetector(window_size=10, threshold=6.0),
+    "long_baseline": lambda: MotionDetector(window_size=30, long_window=1000),
+    "spectral": lambda: MotionDetector(spectral=StftFeatures(fft_size=32, hop=4, sample_rate=2.0, bands=((0.05, 0.4), (0.5, 1.0)), trigger_band=1)),
+    "drift_baseline": lambda: MotionDetector(baseline=DriftBaseline()),
+    "csi": lambda: CsiMotionDetector(threshold=CSI_BURST_GAIN / 4),
+}
+
+
+def run_config(name: str, make, inputs, truth: np.ndarray, rate: float, min_samples: int) -> dict:
+    values = list(inputs)
+
+    det = make()
+    t0 = time.perf_counter()
+    out = [det.update(v) for v in values]
+    elapsed = time.perf_counter() - t0
+
+    det = make()
+    lat = np.empty(len(values))
+    clock = time.perf_counter_ns
+    for i, v in enumerate(values):
+        c = clock()
+        det.update(v)
+        lat[i] = clock() - c
+
+    det = make()
+    tracemalloc.start()
+    for v in values:
+        det.update(v)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    moving = np.fromiter((o[0] for o in out), dtype=bool, count=len(out))
+    res = {
+        "samples": len(values),
+        "samples_per_s": len(values) / elapsed,
+        "update_p50_us": float(np.percentile(lat, 50)) / 1e3,
+        "update_p99_us": float(np.percentile(lat, 99)) / 1e3,
+        "peak_mem_kib": peak / 1024,
+    }
+    res.update(score_events(debounce(moving, min_samples), truth, rate))
+    return res
+
+
+def compare(old: dict, new: dict) -> None:
+    keys = ["samples_per_s", "update_p50_us", "update_p99_us", "peak_mem_kib", "precision", "recall", "latency_mean_s"]
+    for name, r in new["results"].items():
+        o = old["results"].get(name)
+        if not o:
+            continue
+        parts = []
+        for k in keys:
+            a, b = o.get(k), r.get(k)
+            if a in (None, 0) or b is None or a != a or b != b:
+                continue
+            parts.append(f"{k}={(b - a) / abs(a) * 100:+.1f}%")
+        print(f"{name:<14} " + " ".join(parts))
+
+
+def main():
+    p = argparse.ArgumentParser(prog="bench_suite")
+    p.add_argument("--samples", type=int, default=20000)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--min-samples", type=int, default=2)
+    p.add_argument("--config", action="append", default=None, choices=sorted(CONFIGS))
+    p.add_argument("--out", default=None, help="Write results as JSON")
+    p.add_argument("--compare", default=None, help="Previous JSON results to diff against")
+    a = p.parse_args()
+
+    rssi = generate_rssi(n=a.samples, seed=a.seed, breathing_amp=1.0)
+    csi_n = max(1000, a.samples // 4)
+    # each burst needs a slot longer than its (up to 300-frame) length
+    frames, csi = generate_csi(n=csi_n, seed=a.seed, bursts=max(1, min(10, csi_n // 600)), burst_gain=CSI_BURST_GAIN)
+    results = {}
+    for name in a.config or list(CONFIGS):
+        if name == "csi":
+            r = run_config(name, CONFIGS[name], frames, csi.motion, csi.sample_rate, a.min_samples)
+        else:
+            r = run_config(name, CONFIGS[name], rssi.values.tolist(), rssi.motion, rssi.sample_rate, a.min_samples)
+        results[name] = r
+        print(f"{name:<14} {r['samples_per_s']:>10,.0f}/s p50={r['update_p50_us']:.1f}us p99={r['update_p99_us']:.1f}us "
+              f"mem={r['peak_mem_kib']:.0f}KiB P={r['precision']:.2f} R={r['recall']:.2f} lat={r['latency_mean_s']:.2f}s")
+
+    doc = {
+        "meta": {
+            "created": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "samples": a.samples,
+            "seed": a.seed,
+        },
+        "results": results,
+    }
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    if a.compare:
+        with open(a.compare, encoding="utf-8") as f:
+            compare(json.load(f), doc)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import time
+from typing import Optional
+
+
+class AdaptiveInterval:
+    """Picks the next sampling interval from how close the detector is to firing.
+
+    Pressure is the larger of std/threshold and deviation/dev_factor from
+    the detector's last update. At or above `near` (or while the detector
+    is active) sampling jumps straight to `fast`. Once `hold_s` seconds
+    have passed without that, each sample with pressure below `quiet`
+    stretches the interval by `backoff` up to `idle`; samples in between
+    hold the current interval. Before then sampling runs at `base`. A quiet
+    room costs a fraction of the reads, and the first sign of motion
+    restores full resolution on the very next sample.
+    """
+
+    def __init__(self, base: float = 0.5, fast: float = 0.25, idle: float = 2.0, near: float = 0.6, quiet: float = 0.4,
+                 hold_s: float = 10.0, backoff: float = 1.5):
+        self.base = base
+        self.fast = fast
+        self.idle = idle
+        self.near = near
+        self.quiet = quiet
+        self.hold_s = hold_s
+        self.backoff = backoff
+        self.interval = base
+        self._last_near: Optional[float] = None
+        self.samples = 0
+        self.elapsed = 0.0
+
+    def next(self, detector, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        thr = detector.threshold
+        pressure = max(detector.last_std / thr if thr > 0 else 0.0, detector.last_dev / detector.dev_factor if detector.dev_factor > 0 else 0.0)
+        if self._last_near is None or len(detector.short) < 5:
+            self._last_near = now
+        if detector.active or pressure >= self.near:
+            self.interval = self.fast
+            self._last_near = now
+        elif now - self._last_near < self.hold_s:
+            self.interval = self.base
+        elif pressure < self.quiet:
+            self.interval = min(self.idle, max(self.interval, self.base) * self.backoff)
+        self.samples += 1
+        self.elapsed += self.interval
+        return self.interval
+
+    def mean_rate(self) -> float:
+        return self.samples / self.elapsed if self.elapsed else 0.0
@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+
+
+class DriftBaseline:
+    """Constant-memory robust baseline for MotionDetector's deviation test.
+
+    Stands in for the median/MAD over the `long` window. The median is
+    tracked with sign updates scaled by the current spread, and the MAD
+    with multiplicative updates in the log domain, so state is a few floats
+    whatever the effective window. `memory` is roughly how many samples
+    the median takes to follow a drift of one MAD; early on the step
+    shrinks like 1/n instead so the first estimate settles quickly. A
+    median barely moves during motion, which is what lets the memory be
+    hours long without motion leaking into the baseline.
+
+    Level shifts (furniture moves, AP power changes, roaming) are caught by
+    a two-sided CUSUM on the standardized residual, accumulated only while
+    the short window is quiet; past `cusum_h` the median snaps to a fast
+    EMA of recent quiet samples and the CUSUM restarts.
+    """
+
+    def __init__(self, memory: float = 7200.0, cusum_k: float = 1.0, cusum_h: float = 12.0, fast_alpha: float = 0.2, min_mad: float = 0.05):
+        self.memory = memory
+        self.cusum_k = cusum_k
+        self.cusum_h = cusum_h
+        self.fast_alpha = fast_alpha
+        self.min_mad = min_mad
+        self.n = 0
+        self.median = 0.0
+        self.mad = min_mad
+        self.fast = 0.0
+        self.g_up = 0.0
+        self.g_down = 0.0
+        self.shifts = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def update(self, x: float, quiet: bool = True) -> None:
+        n = self.n = self.n + 1
+        if n == 1:
+            self.median = self.fast = x
+            return
+        eta = max(1.0 / self.memory, 2.0 / n)
+        m = self.median
+        s = self.mad
+        d = x - m
+        if d > 0:
+            self.median = m + eta * s
+        elif d < 0:
+            self.median = m - eta * s
+        ad = d if d >= 0 else -d
+        s = s * math.exp(eta) if ad > s else s * math.exp(-eta)
+        self.mad = s if s > self.min_mad else self.min_mad
+        if not quiet:
+            return
+        self.fast += self.fast_alpha * (x - self.fast)
+        z = d / (self.mad * 1.4826)
+        k = self.cusum_k
+        up = self.g_up + z - k
+        down = self.g_down - z - k
+        self.g_up = up if up > 0.0 else 0.0
+        self.g_down = down if down > 0.0 else 0.0
+        if self.g_up > self.cusum_h or self.g_down > self.cusum_h:
+            self.median = self.fast
+            self.g_up = self.g_down = 0.0
+            self.shifts += 1
+
+    def state(self) -> np.ndarray:
+        return np.array([self.n, self.median, self.mad, self.fast, self.g_up, self.g_down, self.shifts], dtype=np.float64)
+
+    def load_state(self, state) -> None:
+        n, self.median, self.mad, self.fast, self.g_up, self.g_down, shifts = (float(v) for v in state)
+        self.n = int(n)
+        self.shifts = int(shifts)
@@ -0,0 +1,95 @@
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+FRAME = np.dtype([("t", "f8"), ("sig", "f8"), ("avg", "f8"), ("std", "f8"), ("ev", "?")])
+
+
+def compact(rows: np.ndarray, max_rows: int) -> np.ndarray:
+    """Fold rows into at most max_rows buckets for display.
+
+    Each bucket keeps its last timestamp, the mean signal and average, the
+    peak deviation and whether any sample was in motion, so short bursts
+    still show on the plot when the UI falls behind.
+    """
+    n = len(rows)
+    if n <= max_rows or max_rows < 1:
+        return rows
+    edges = np.linspace(0, n, max_rows + 1).astype(np.int64)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    out = np.empty(max_rows, dtype=FRAME)
+    out["t"] = rows["t"][edges[1:] - 1]
+    out["sig"] = np.add.reduceat(rows["sig"], starts) / counts
+    out["avg"] = np.add.reduceat(rows["avg"], starts) / counts
+    out["std"] = np.maximum.reduceat(rows["std"], starts)
+    out["ev"] = np.logical_or.reduceat(rows["ev"], starts)
+    return out
+
+
+class SampleChannel:
+    """Single-producer/single-consumer sample ring between a worker and a UI loop.
+
+    head and tail are free-running counters, each written by one side only;
+    the producer fills a slot before publishing head, so neither side takes
+    a lock and write() never blocks. When the consumer falls more than
+    `capacity` samples behind, the oldest unread samples are overwritten and
+    counted in `dropped`; read() rechecks head after copying and discards
+    any rows the producer may have lapped mid-copy. The latest state and
+    the last error are single attribute stores, so a reader always sees a
+    whole tuple.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=FRAME)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.state: Optional[Any] = None
+        self.error: Tuple[int, Optional[str]] = (0, None)
+        self._error_seen = 0
+
+    def __len__(self) -> int:
+        return min(self.head - self.tail, self.capacity)
+
+    def write(self, t: float, sig: float, avg: float, std: float, ev: bool, state: Any = None) -> None:
+        h = self.head
+        self.data[h % self.capacity] = (t, sig, avg, std, ev)
+        self.head = h + 1
+        if state is not None:
+            self.state = state
+
+    def fail(self, msg: str) -> None:
+        self.error = (self.error[0] + 1, msg)
+
+    def read(self, max_rows: int = 0) -> Tuple[np.ndarray, Any, Optional[str]]:
+        """Returns (rows since the last read, compacted to max_rows if set, latest state, new error or None)."""
+        cap = self.capacity
+        tail = self.tail
+        head = self.head
+        if head - tail > cap:
+            self.dropped += head - tail - cap
+            tail = head - cap
+        i, j = tail % cap, head % cap
+        if head == tail:
+            rows = self.data[:0].copy()
+        elif i < j:
+            rows = self.data[i:j].copy()
+        else:
+            rows = np.concatenate((self.data[i:], self.data[:j]))
+        # the producer may have been filling slot `now` (== now - cap) while we copied
+        lapped = self.head + 1 - cap - tail
+        if lapped > 0:
+            lapped = min(lapped, len(rows))
+            self.dropped += lapped
+            rows = rows[lapped:]
+        self.tail = head
+        seq, msg = self.error
+        err = None
+        if seq != self._error_seen:
+            self._error_seen = seq
+            err = msg
+        if max_rows:
+            rows = compact(rows, max_rows)
+        return rows, self.state, err
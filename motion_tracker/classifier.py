@@ -0,0 +1,294 @@
+import argparse
+import glob
+import json
+import math
+import os
+import re
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .detector import _rolling_median_mad
+from .replay import load_signal_csv
+from .rolling import RollingMeanStd, RollingMedian
+
+FEATURES = ("log_std", "log_mad", "band_low", "band_mid", "band_high", "turn_rate", "log_diff_std")
+MODEL_VERSION = 1
+_TRAIN_NAME = re.compile(r"train_data_(\d+)people_")
+
+
+def _bands(window: int) -> List[Tuple[int, int]]:
+    # rfft bins 1..window//2 split into low/mid/high at 1/8 and 1/4 of the window
+    top = window // 2 + 1
+    a = max(2, window // 8 + 1)
+    b = max(a + 1, window // 4 + 1)
+    return [(1, a), (a, b), (b, top)]
+
+
+def window_features(x: np.ndarray, window: int = 32, step: int = 1) -> np.ndarray:
+    """Features of every `window`-sample window of x (stride `step`), shape (n, len(FEATURES))."""
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) < window:
+        return np.zeros((0, len(FEATURES)))
+    w = sliding_window_view(x, window)[::step]
+    n = len(w)
+    out = np.empty((n, len(FEATURES)))
+    mean = w.mean(axis=1)
+    var = (w * w).mean(axis=1) - mean * mean
+    out[:, 0] = np.log1p(np.sqrt(np.maximum(var, 0.0)))
+    _, mad = _rolling_median_mad(w)
+    out[:, 1] = np.log1p(mad * 1.4826)
+    p = np.abs(np.fft.rfft(w, axis=1)) ** 2
+    total = p[:, 1:].sum(axis=1) + 1e-12
+    for i, (lo, hi) in enumerate(_bands(window)):
+        out[:, 2 + i] = p[:, lo:hi].sum(axis=1) / total
+    d = np.diff(w, axis=1)
+    out[:, 5] = (d[:, 1:] * d[:, :-1] < 0).sum(axis=1) / (window - 2)
+    dm = d.mean(axis=1)
+    dv = (d * d).mean(axis=1) - dm * dm
+    out[:, 6] = np.log1p(np.sqrt(np.maximum(dv, 0.0)))
+    return out
+
+
+class StreamingFeatures:
+    """Incremental window_features() for the newest `window` samples.
+
+    Variance and diff variance come from running sums, median/MAD from the
+    bisect-maintained RollingMedian, the turning-point rate from a running
+    count, and band energies from a sliding DFT, which is resynced from an
+    exact rfft every `resync` samples to stop rounding drift. Each push is
+    O(window / 2) in NumPy plus O(log window) in Python.
+    """
+
+    def __init__(self, window: int = 32, resync: int = 1024):
+        self.window = window
+        self.resync = resync
+        self.stats = RollingMeanStd(window)
+        self.med = RollingMedian(window)
+        self.diffs = RollingMeanStd(window - 1)
+        self.turns = deque(maxlen=window - 2)
+        self.turn_count = 0
+        self.starts = np.array([lo for lo, _ in _bands(window)])
+        self.twiddle = np.exp(2j * np.pi * np.arange(window // 2 + 1) / window)
+        self.X = None
+        self.power = np.empty(window // 2 + 1)
+        self.prev = None
+        self.prev_d = None
+        self.since_sync = 0
+        self.out = np.empty(len(FEATURES))
+
+    @property
+    def ready(self) -> bool:
+        return len(self.stats) == self.window
+
+    def push(self, v: float) -> Optional[np.ndarray]:
+        """Add a sample; returns the feature vector once the window is full (reused buffer)."""
+        v = float(v)
+        full = len(self.stats) == self.window
+        old = self.stats.values[0] if full else 0.0
+        self.stats.push(v)
+        self.med.push(v)
+        if self.prev is not None:
+            d = v - self.prev
+            self.diffs.push(d)
+            if self.prev_d is not None:
+                t = 1 if d * self.prev_d < 0 else 0
+                if len(self.turns) == self.turns.maxlen:
+                    self.turn_count -= self.turns[0]
+                self.turns.append(t)
+                self.turn_count += t
+            self.prev_d = d
+        self.prev = v
+        if not full and len(self.stats) < self.window:
+            return None
+        self.since_sync += 1
+        if self.X is None or self.since_sync >= self.resync:
+            self.X = np.fft.rfft(np.fromiter(self.stats.values, float, self.window))
+            self.since_sync = 0
+        else:
+            self.X += v - old
+            self.X *= self.twiddle
+        out = self.out
+        out[0] = math.log1p(self.stats.std())
+        m = self.med.median()
+        out[1] = math.log1p(self.med.mad(m) * 1.4826)
+        p = np.abs(self.X, out=self.power)
+        p *= p
+        lo, mid, hi = np.add.reduceat(p, self.starts).tolist()
+        total = lo + mid + hi + 1e-12
+        out[2] = lo / total
+        out[3] = mid / total
+        out[4] = hi / total
+        out[5] = self.turn_count / (self.window - 2)
+        out[6] = math.log1p(self.diffs.std())
+        return out
+
+
+class OccupancyModel:
+    """Multinomial logistic regression over standardised window features."""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, mu: np.ndarray, sd: np.ndarray, classes: np.ndarray, window: int):
+        self.weights = weights
+        self.bias = bias
+        self.mu = mu
+        self.sd = sd
+        self.classes = classes
+        self.window = window
+        # fold standardisation into the linear layer for inference
+        self._w = weights / sd[:, None]
+        self._b = bias - (mu / sd) @ weights
+
+    @classmethod
+    def fit(cls, X: np.ndarray, y: np.ndarray, window: int, l2: float = 1e-3, iters: int = 500, lr: float = 0.5) -> "OccupancyModel":
+        classes = np.unique(y)
+        mu = X.mean(axis=0)
+        sd = X.std(axis=0)
+        sd[sd < 1e-9] = 1.0
+        Z = (X - mu) / sd
+        Y = (y[:, None] == classes[None, :]).astype(float)
+        # balance classes so a long idle recording does not swamp the rest
+        cw = len(y) / (len(classes) * Y.sum(axis=0))
+        sw = (Y * cw).sum(axis=1)
+        sw /= sw.sum()
+        W = np.zeros((X.shape[1], len(classes)))
+        b = np.zeros(len(classes))
+        for _ in range(iters):
+            logits = Z @ W + b
+            logits -= logits.max(axis=1, keepdims=True)
+            P = np.exp(logits)
+            P /= P.sum(axis=1, keepdims=True)
+            G = (P - Y) * sw[:, None]
+            W -= lr * (Z.T @ G + l2 * W)
+            b -= lr * G.sum(axis=0)
+        return cls(W, b, mu, sd, classes, window)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        logits = np.atleast_2d(X) @ self._w + self._b
+        logits -= logits.max(axis=1, keepdims=True)
+        P = np.exp(logits)
+        return P / P.sum(axis=1, keepdims=True)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(np.atleast_2d(X) @ self._w + self._b, axis=1)]
+
+    def save(self, path: str) -> None:
+        meta = {"version": MODEL_VERSION, "features": list(FEATURES), "window": self.window}
+        np.savez(path, weights=self.weights, bias=self.bias, mu=self.mu, sd=self.sd, classes=self.classes,
+                 _meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path: str) -> "OccupancyModel":
+        with np.load(path) as z:
+            meta = json.loads(z["_meta"].tobytes().decode())
+            if meta.get("version") != MODEL_VERSION or meta.get("features") != list(FEATURES):
+                raise ValueError(f"{path}: incompatible model (version {meta.get('version')})")
+            return cls(z["weights"], z["bias"], z["mu"], z["sd"], z["classes"], int(meta["window"]))
+
+
+class OccupancyClassifier:
+    """Streaming inference: push raw samples, read the predicted people count."""
+
+    def __init__(self, model: OccupancyModel):
+        self.model = model
+        self.features = StreamingFeatures(model.window)
+        self.count: Optional[int] = None
+
+    def push(self, value: float) -> Optional[int]:
+        f = self.features.push(value)
+        if f is not None:
+            logits = f @ self.model._w + self.model._b
+            self.count = int(self.model.classes[int(logits.argmax())])
+        return self.count
+
+    @property
+    def label(self) -> str:
+        if self.count is None:
+            return "Learning"
+        if self.count == 0:
+            return "Empty"
+        return "1 person" if self.count == 1 else f"{self.count} people"
+
+
+def load_training(paths: Sequence[str]) -> List[Tuple[np.ndarray, int]]:
+    """Load GUI training CSVs; the people count comes from the file name."""
+    out = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            m = _TRAIN_NAME.search(os.path.basename(path))
+            if not m:
+                raise ValueError(f"{path}: expected a train_data_<N>people_*.csv file name")
+            _, sig = load_signal_csv(path)
+            out.append((sig, int(m.group(1))))
+    return out
+
+
+def build_dataset(recordings, window: int, step: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stack window features from every recording; also returns each row's recording index."""
+    X, y, g = [], [], []
+    for i, (sig, count) in enumerate(recordings):
+        f = window_features(sig, window, step)
+        X.append(f)
+        y.append(np.full(len(f), count))
+        g.append(np.full(len(f), i))
+    if not X:
+        return np.zeros((0, len(FEATURES))), np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(X), np.concatenate(y), np.concatenate(g)
+
+
+def _report(model: OccupancyModel, X: np.ndarray, y: np.ndarray) -> None:
+    pred = model.predict(X)
+    print(f"accuracy={np.mean(pred == y):.3f} windows={len(y)}")
+    cls = model.classes
+    print("confusion (rows=true, cols=pred): " + " ".join(str(c) for c in cls))
+    for c in cls:
+        row = [int(np.sum((y == c) & (pred == p))) for p in cls]
+        print(f"  {c:>3}: " + " ".join(f"{v:>5}" for v in row))
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-classifier")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("train", help="Fit an occupancy model on train_data_<N>people_*.csv files")
+    t.add_argument("paths", nargs="+", help="CSV files or glob patterns")
+    t.add_argument("--out", default="occupancy_model.npz")
+    t.add_argument("--window", type=int, default=32)
+    t.add_argument("--step", type=int, default=4)
+    t.add_argument("--holdout", type=float, default=0.25, help="Fraction of each recording's tail kept for evaluation")
+    t.add_argument("--l2", type=float, default=1e-3)
+    e = sub.add_parser("predict", help="Run a model over a recorded CSV")
+    e.add_argument("model")
+    e.add_argument("path")
+    a = p.parse_args()
+
+    if a.cmd == "train":
+        recs = load_training(a.paths)
+        train, test = [], []
+        for sig, count in recs:
+            cut = int(len(sig) * (1.0 - a.holdout))
+            train.append((sig[:cut], count))
+            test.append((sig[cut:], count))
+        X, y, _ = build_dataset(train, a.window, a.step)
+        if len(np.unique(y)) < 2:
+            raise SystemExit("need recordings for at least two different people counts")
+        model = OccupancyModel.fit(X, y, a.window, l2=a.l2)
+        print(f"trained on {len(y)} windows from {len(recs)} recordings, classes={model.classes.tolist()}")
+        Xt, yt, _ = build_dataset(test, a.window, a.step)
+        if len(yt):
+            _report(model, Xt, yt)
+        if a.holdout > 0:
+            X, y, _ = build_dataset(recs, a.window, a.step)
+            model = OccupancyModel.fit(X, y, a.window, l2=a.l2)
+        model.save(a.out)
+        print(f"saved {a.out}")
+    else:
+        model = OccupancyModel.load(a.model)
+        _, sig = load_signal_csv(a.path)
+        pred = model.predict(window_features(sig, model.window, 1))
+        vals, counts = np.unique(pred, return_counts=True)
+        print("  ".join(f"{v} people: {c / len(pred):.1%}" for v, c in zip(vals, counts)) if len(pred) else "too short")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,110 +1,209 @@
 import argparse
+import sys
 import time
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 import threading
 import queue
-import csv
 
-from .datasource import WindowsWlanSignalSource
+from .datasource import default_source
 from .detector import MotionDetector
+from .adaptive import AdaptiveInterval
+from .baseline import DriftBaseline
+from .control import ControlServer
+from .events import END, EventSegmenter
+from .metrics import Metrics, MetricsServer
+from .push import PushHub
+from .snapshot import SnapshotKeeper
+from .spectral import StftFeatures
+from .store import EventStore
+from .recording import FLAG_ERROR, FLAG_MOTION, FLAG_MOVING, RecordWriter
+from .writer import RowWriter
 
 try:
     import matplotlib.pyplot as plt
-    import matplotlib.animation as animation
+    from .plotting import LivePlot
     HAS_MATPLOTLIB = True
 except ImportError:
     HAS_MATPLOTLIB = False
 
 
-def run(source_interface: Optional[str], interval: float, window: int, threshold: float, min_duration: float, csv_path: Optional[str], visualize: bool, events_csv: Optional[str]):
-    src = WindowsWlanSignalSource(interface=source_interface)
-    det = MotionDetector(window_size=window, threshold=threshold)
+def run(source_interface: Optional[str], interval: float, window: int, threshold: float, min_duration: float, csv_path: Optional[str], visualize: bool, events_csv: Optional[str], *, record_path: Optional[str] = None, flush_rows: int = 256, flush_ms: float = 1000.0, rotate_bytes: int = 0, serve_port: Optional[int] = None, serve_host: str = "127.0.0.1", control: Optional[str] = None, snapshot_path: Optional[str] = None, snapshot_every: float = 60.0, snapshot_max_age: Optional[float] = 3600.0, adaptive: bool = False, idle_interval: float = 2.0, fast_interval: Optional[float] = None, events_db: Optional[str] = None, metrics_port: Optional[int] = None, stats_every: float = 0.0, profile: bool = False, drift_baseline: bool = False, baseline_memory: float = 7200.0, spectral: bool = False, spectral_fft: int = 32, spectral_hop: int = 4, spectral_band: Tuple[float, float] = (0.5, 1.0)):
+    src = default_source(interface=source_interface)
+    stft = None
+    if spectral:
+        if adaptive:
+            raise ValueError("spectral needs a fixed sample rate; it cannot be combined with adaptive sampling")
+        # one trigger band, at the base sampling rate
+        stft = StftFeatures(fft_size=spectral_fft, hop=spectral_hop, sample_rate=1.0 / interval, bands=(spectral_band,), trigger_band=0)
+    det = MotionDetector(window_size=window, threshold=threshold, spectral=stft, baseline=DriftBaseline(memory=baseline_memory) if drift_baseline else None)
+    keeper = None
+    if snapshot_path:
+        keeper = SnapshotKeeper(snapshot_path, det, environment=source_interface or "default", every_s=snapshot_every)
+        print(f"snapshot {keeper.restore(snapshot_max_age)[1]}")
     min_samples = max(1, int(min_duration / interval))
     
     data_queue = queue.Queue() if visualize else None
-    events_queue = queue.Queue() if visualize else None
-    
+
+    # All console and file output goes through writer threads so the
+    # sampling loop never blocks on a write or flush.
+    console = RowWriter(sys.stdout, "{} signal={}% avg={:.2f}% std={:.2f} state={} level={}\n", flush_rows=64, flush_ms=200)
+    f = RowWriter(csv_path, "{},{},{:.4f},{:.4f},{}\n", header="timestamp,signal,avg,std,motion", flush_rows=flush_rows, flush_ms=flush_ms, max_bytes=rotate_bytes) if csv_path else None
+    fe = RowWriter(events_csv, "{},{},{},{},{}\n", header="start,end,duration_s,max_std,mean_signal", flush_rows=1, max_bytes=rotate_bytes) if events_csv else None
+    rec = RecordWriter(record_path, flush_rows=flush_rows, flush_ms=flush_ms) if record_path else None
+    store = EventStore(events_db) if events_db else None
+    # instrumentation is off unless asked for; the worker then only pays an `if m:` per stage
+    m = Metrics() if (metrics_port is not None or stats_every > 0 or profile) else None
+    msrv = None
+    if m:
+        m.watch_writer("console", console)
+        for name, wr in (("csv", f), ("events", fe), ("record", rec)):
+            if wr:
+                m.watch_writer(name, wr)
+        if store:
+            m.gauge("events_db_backlog", store.backlog)
+            m.gauge("events_db_dropped", lambda: store.dropped)
+        if data_queue:
+            m.gauge("data_queue", data_queue.qsize)
+        if metrics_port is not None:
+            msrv = MetricsServer(m, serve_host, metrics_port)
+            msrv.start()
+            print(f"metrics on http://{serve_host}:{msrv.port}/metrics")
+
+    # With a varying sample rate, debounce on time rather than sample count.
+    pacer = AdaptiveInterval(base=interval, fast=fast_interval or interval / 2, idle=idle_interval) if adaptive else None
+    seg = EventSegmenter(min_samples=1 if adaptive else min_samples, source=source_interface or "default", min_duration=min_duration if adaptive else 0.0)
+    hub = None
+    if serve_port is not None:
+        hub = PushHub()
+        hub.start(serve_host, serve_port)
+        seg.subscribe(hub.publish_event)
+        print(f"push api on http://{serve_host}:{hub.port}/events")
+    # interval and min_duration can change at runtime through the control socket
+    live = {"interval": interval, "min_duration": min_duration}
+
+    def get_settings():
+        return dict(det.params(), **live)
+
+    def apply_settings(kv):
+        kv = dict(kv)
+        if "window" in kv:
+            kv["window_size"] = kv.pop("window")
+        timing = {k: float(kv.pop(k)) for k in ("interval", "min_duration") if k in kv}
+        if any(v <= 0 for v in timing.values()):
+            raise ValueError("interval and min_duration must be > 0")
+        if stft is not None and timing.get("interval", live["interval"]) != live["interval"]:
+            # the STFT band bins are fixed to the startup rate
+            raise ValueError("interval cannot change while the spectral trigger is on")
+        det.configure(**kv)
+        live.update(timing)
+        if pacer:
+            pacer.base = live["interval"]
+            seg.min_duration = live["min_duration"]
+        else:
+            seg.min_samples = max(1, int(live["min_duration"] / live["interval"]))
+
+    ctl = None
+    if control:
+        ctl = ControlServer(control, get_settings, apply_settings)
+        ctl.start()
+        print(f"control socket on {control}")
+    if store:
+        seg.subscribe(store.on_event)
+    if fe:
+        seg.subscribe(lambda ev: ev.kind == END and fe.write(ev.start_label, ev.label, round(ev.duration, 3), round(ev.max_std, 3), round(ev.mean_signal, 3)))
+
+    stop = threading.Event()
+
     def worker():
-        active_count = 0
-        f = None
-        fe = None
-        if csv_path:
-            f = open(csv_path, "a", encoding="utf-8")
-            if f.tell() == 0:
-                f.write("timestamp,signal,avg,std,motion\n")
-        if events_csv:
-            fe = open(events_csv, "a", encoding="utf-8", newline="")
-            w = csv.writer(fe)
-            if fe.tell() == 0:
-                w.writerow(["start", "end", "duration_s", "max_std", "mean_signal"])
-        
-        last_event = False
-        ev_start_ts = None
-        ev_start_time = None
-        ev_max_std = 0.0
-        ev_sig_sum = 0.0
-        ev_count = 0
-        
-        while True:
+        last_event = None
+        clock = time.perf_counter_ns
+        next_stats = time.monotonic() + stats_every
+        while not stop.is_set():
             ts = datetime.utcnow().isoformat()
+            if m:
+                c0 = clock()
             try:
                 val = src.read()
             except Exception as e:
-                s = f"{ts} source_error {str(e)}"
-                print(s)
+                if m:
+                    m.inc("source_errors")
+                console.write_raw(f"{ts} source_error {str(e)}\n")
                 if f:
-                    f.write(f"{ts},,,,{0}\n")
-                    f.flush()
-                time.sleep(interval)
+                    f.write_raw(f"{ts},,,,0\n")
+                if rec:
+                    rec.append(time.monotonic_ns(), float("nan"), 0.0, 0.0, FLAG_ERROR)
+                stop.wait(live["interval"])
                 continue
             
+            if m:
+                c1 = clock()
+                m.record("read", c1 - c0)
             moving, avg, std, level = det.update(val)
-            if moving:
-                active_count += 1
-            else:
-                active_count = 0
-            
-            event = active_count >= min_samples
+            if m:
+                c2 = clock()
+                m.record("update", c2 - c1)
+            t_ns = time.monotonic_ns()
+            event = seg.push(val, moving, std, t_ns / 1e9, ts)
             state = "MOTION" if event else "IDLE"
+            if hub:
+                hub.publish_sample(seg.source, t_ns / 1e9, val, avg, std, event)
+                if event != last_event:
+                    hub.publish_state(seg.source, event, t_ns / 1e9, level=level, label=ts)
+            last_event = event
+            if m:
+                c3 = clock()
+                m.record("segment", c3 - c2)
             
-            print(f"{ts} signal={val}% avg={avg:.2f}% std={std:.2f} state={state} level={level}")
+            console.write(ts, val, avg, std, state, level)
             
             if f:
-                f.write(f"{ts},{val},{avg:.4f},{std:.4f},{1 if event else 0}\n")
-                f.flush()
+                f.write(ts, val, avg, std, 1 if event else 0)
+            if rec:
+                rec.append(t_ns, val, avg, std, (FLAG_MOTION if event else 0) | (FLAG_MOVING if moving else 0), level)
             
             if data_queue:
                 data_queue.put((ts, val, avg, std, event))
-            
-            if not last_event and event:
-                ev_start_ts = ts
-                ev_start_time = time.time()
-                ev_max_std = std
-                ev_sig_sum = val
-                ev_count = 1
-            elif last_event and event:
-                if std > ev_max_std:
-                    ev_max_std = std
-                ev_sig_sum += val
-                ev_count += 1
-            elif last_event and not event:
-                end_ts = ts
-                duration = time.time() - (ev_start_time or time.time())
-                mean_sig = (ev_sig_sum / ev_count) if ev_count else 0.0
-                if events_queue:
-                    events_queue.put((ev_start_ts, end_ts))
-                if events_csv and fe:
-                    w.writerow([ev_start_ts, end_ts, round(duration, 3), round(ev_max_std, 3), round(mean_sig, 3)])
-                    fe.flush()
-                ev_start_ts = None
-                ev_start_time = None
-                ev_max_std = 0.0
-                ev_sig_sum = 0.0
-                ev_count = 0
-            last_event = event
+            if keeper:
+                keeper.maybe_save()
+            wait = pacer.next(det) if pacer else live["interval"]
+            if m:
+                c4 = clock()
+                m.record("output", c4 - c3)
+                m.inc("samples")
+                if stats_every > 0 and time.monotonic() >= next_stats:
+                    next_stats += stats_every
+                    console.write_raw(f"{ts} stats {m.stats_line()}\n")
                 
-            time.sleep(interval)
+            stop.wait(wait)
+            if m and not stop.is_set():
+                # how late the loop wakes up beyond the requested interval
+                m.record("sleep_drift", clock() - c4 - int(wait * 1e9))
+
+    def shutdown():
+        stop.set()
+        t.join(live["interval"] + 5.0)
+        if pacer:
+            print(f"adaptive sampling mean_rate_hz={pacer.mean_rate():.3f} samples={pacer.samples}")
+        if keeper:
+            keeper.save()
+            print(f"snapshot saved to {keeper.path} ({keeper.saves} saves, {keeper.errors} errors)")
+        for name, wr in (("csv", f), ("events", fe), ("record", rec)):
+            if wr:
+                wr.close()
+                print(f"writer {name} {wr.stats_line()}")
+        if store:
+            store.close()
+            print(f"event store {store.path} ({store.inserted} events added, {store.dropped} dropped, {store.errors} errors)")
+        if hub:
+            hub.stop()
+        if ctl:
+            ctl.stop()
+        if msrv:
+            msrv.stop()
+        console.close()
+        if profile:
+            print(m.summary())
 
     # Start collection thread
     t = threading.Thread(target=worker, daemon=True)
@@ -113,88 +212,27 @@ def run(source_interface: Optional[str], interval: float, window: int, threshold
     if visualize:
         if not HAS_MATPLOTLIB:
             print("Error: matplotlib not installed. Cannot visualize.")
+            shutdown()
             return
 
         # Setup Plot
         fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
         fig.suptitle('WiFi Motion Tracker')
-        
-        # Signal Plot
-        xs = []
-        ys_signal = []
-        ys_avg = []
-        
-        # Stats Plot
-        ys_std = []
-        ys_thresh = []
-        events = []
-        
-        MAX_POINTS = 100
-        spans = []
-        
-        last_event = [False]
-        last_start = [None]
-        def animate(i):
+        plot = LivePlot(ax1, ax2, threshold, capacity=2000, span_s=max(60.0, interval * 200))
+
+        def animate():
+            changed = False
             while not data_queue.empty():
                 ts, val, avg, std, event = data_queue.get()
-                now = datetime.now()
-                xs.append(now)
-                ys_signal.append(val)
-                ys_avg.append(avg)
-                ys_std.append(std)
-                ys_thresh.append(threshold)
-                if event:
-                    events.append(now)
-                
-                # Trim
-                if len(xs) > MAX_POINTS:
-                    xs.pop(0)
-                    ys_signal.pop(0)
-                    ys_avg.pop(0)
-                    ys_std.pop(0)
-                    ys_thresh.pop(0)
-                if len(events) > MAX_POINTS:
-                    events = events[-MAX_POINTS:]
-            while events_queue and not events_queue.empty():
-                s_ts, e_ts = events_queue.get()
-                # approximate datetime for spans using current wall clock timestamps; used only for display
-                spans.append((s_ts, e_ts))
-                if len(spans) > 100:
-                    spans = spans[-100:]
-            if not xs:
-                return
-            
-            ax1.clear()
-            ax1.plot(xs, ys_signal, label='Signal %', color='blue', alpha=0.5)
-            ax1.plot(xs, ys_avg, label='Average', color='green', linewidth=2)
-            ax1.set_ylabel('Signal Strength (%)')
-            ax1.set_ylim(0, 100)
-            ax1.legend(loc='upper right')
-            ax1.grid(True)
-            for e in events:
-                ax1.axvline(e, color='red', alpha=0.25)
-            for s_ts, e_ts in spans:
-                ax1.axvspan(datetime.fromisoformat(s_ts), datetime.fromisoformat(e_ts), color='red', alpha=0.1)
-            
-            ax2.clear()
-            ax2.plot(xs, ys_std, label='Deviation', color='red')
-            ax2.plot(xs, ys_thresh, label='Threshold', color='orange', linestyle='--')
-            for e in events:
-                ax2.axvline(e, color='red', alpha=0.25)
-            for s_ts, e_ts in spans:
-                ax2.axvspan(datetime.fromisoformat(s_ts), datetime.fromisoformat(e_ts), color='red', alpha=0.1)
-            
-            if last_event[0]:
-                ax2.text(xs[-1], ys_std[-1], "MOTION", color='red', fontweight='bold')
-                fig.patch.set_facecolor('#ffebee')
-            else:
-                fig.patch.set_facecolor('white')
-
-            ax2.set_ylabel('Standard Deviation')
-            ax2.legend(loc='upper right')
-            ax2.grid(True)
+                plot.append(val, avg, std, event)
+                changed = True
+            if changed:
+                plot.threshold = det.params()["threshold"]
+                plot.draw()
 
-        ani = animation.FuncAnimation(fig, animate, interval=100)
+        timer = fig.canvas.new_timer(interval=100)
+        timer.add_callback(animate)
+        timer.start()
         plt.show()
     else:
         # Keep main thread alive if not visualizing
@@ -203,6 +241,18 @@ def run(source_interface: Optional[str], interval: float, window: int, threshold
                 time.sleep(1)
         except KeyboardInterrupt:
             pass
+    shutdown()
+
+def _band(spec: str) -> Tuple[float, float]:
+    lo, _, hi = spec.partition(":")
+    try:
+        band = (float(lo), float(hi))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LO:HI in Hz, got {spec!r}")
+    if not 0 <= band[0] < band[1]:
+        raise argparse.ArgumentTypeError(f"empty band {spec!r}")
+    return band
+
 
 def main():
     p = argparse.ArgumentParser(prog="wifi-motion-tracker")
@@ -214,8 +264,43 @@ def main():
     p.add_argument("--csv", default=None)
     p.add_argument("--visualize", action="store_true", help="Show real-time plot")
     p.add_argument("--events-csv", default=None)
+    p.add_argument("--events-db", default=None, help="Also store events in this SQLite database (query with python -m motion_tracker.store)")
+    p.add_argument("--record", default=None, help="Append samples to a binary .mtr log")
+    p.add_argument("--flush-rows", type=int, default=256, help="Flush the CSV and .mtr log after this many rows")
+    p.add_argument("--flush-ms", type=float, default=1000.0, help="...or after this many milliseconds")
+    p.add_argument("--rotate-mb", type=float, default=0.0, help="Rotate CSV logs at this size (0 = never)")
+    p.add_argument("--serve", type=int, default=None, metavar="PORT", help="Push states/events over SSE and WebSocket on this port")
+    p.add_argument("--serve-host", default="127.0.0.1")
+    p.add_argument("--control", default=None, metavar="ADDR", help="Accept live get/set commands on a Unix socket path or host:port")
+    p.add_argument("--snapshot", default=None, metavar="PATH", help="Restore the detector baseline from, and checkpoint it to, this .npz")
+    p.add_argument("--snapshot-every", type=float, default=60.0, help="Seconds between checkpoints (0 = only on exit)")
+    p.add_argument("--snapshot-max-age", type=float, default=3600.0, help="Ignore snapshots older than this many seconds")
+    p.add_argument("--adaptive", action="store_true", help="Sample faster near a trigger and back off when quiet; --interval is the base rate")
+    p.add_argument("--idle-interval", type=float, default=2.0, help="Slowest interval in --adaptive mode")
+    p.add_argument("--drift-baseline", action="store_true", help="Use the constant-memory drift/level-shift tracking baseline instead of the long median window")
+    p.add_argument("--baseline-memory", type=float, default=7200.0, metavar="SAMPLES", help="Samples the drift baseline takes to follow a one-MAD drift")
+    p.add_argument("--metrics-port", type=int, default=None, metavar="PORT", help="Serve Prometheus metrics at http://HOST:PORT/metrics (HOST from --serve-host)")
+    p.add_argument("--stats-every", type=float, default=0.0, metavar="S", help="Print a stage-latency/rate stats line every S seconds")
+    p.add_argument("--profile", action="store_true", help="Print a per-stage latency summary on exit")
+    p.add_argument("--fast-interval", type=float, default=None, help="Interval near/during motion in --adaptive mode (default interval/2)")
+    p.add_argument("--spectral", action="store_true", help="Also trigger on signal power in a frequency band (sliding STFT)")
+    p.add_argument("--spectral-fft", type=int, default=32, metavar="N", help="STFT window in samples")
+    p.add_argument("--spectral-hop", type=int, default=4, metavar="N", help="Recompute the STFT every N samples")
+    p.add_argument("--spectral-band", type=_band, default=(0.5, 1.0), metavar="LO:HI", help="Trigger band in Hz at the --interval rate; its RMS is compared with --threshold")
     a = p.parse_args()
-    run(a.interface, a.interval, a.window, a.threshold, a.min_duration, a.csv, a.visualize, a.events_csv)
+    if a.spectral and a.adaptive:
+        p.error("--spectral needs a fixed sample rate and cannot be combined with --adaptive")
+    if a.spectral and a.spectral_band[0] >= 0.5 / a.interval:
+        p.error(f"--spectral-band starts at or above the {0.5 / a.interval:g} Hz Nyquist rate of --interval {a.interval:g}")
+    # options are keyword-only in run(), so a new flag cannot shift the others
+    run(a.interface, a.interval, a.window, a.threshold, a.min_duration, a.csv, a.visualize, a.events_csv,
+        record_path=a.record, flush_rows=a.flush_rows, flush_ms=a.flush_ms, rotate_bytes=int(a.rotate_mb * 1024 * 1024),
+        serve_port=a.serve, serve_host=a.serve_host, control=a.control,
+        snapshot_path=a.snapshot, snapshot_every=a.snapshot_every, snapshot_max_age=a.snapshot_max_age,
+        adaptive=a.adaptive, idle_interval=a.idle_interval, fast_interval=a.fast_interval, events_db=a.events_db,
+        metrics_port=a.metrics_port, stats_every=a.stats_every, profile=a.profile,
+        drift_baseline=a.drift_baseline, baseline_memory=a.baseline_memory,
+        spectral=a.spectral, spectral_fft=a.spectral_fft, spectral_hop=a.spectral_hop, spectral_band=a.spectral_band)
 
 
 if __name__ == "__main__":
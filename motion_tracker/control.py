@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from typing import Callable, Dict, Optional
+
+
+def parse_assignments(args) -> Dict[str, str]:
+    out = {}
+    for a in args:
+        k, sep, v = a.partition("=")
+        if not sep or not k:
+            raise ValueError(f"expected key=value, got {a!r}")
+        out[k.strip()] = v.strip()
+    return out
+
+
+def _is_socket(path: str) -> bool:
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def _address(addr: str):
+    host, sep, port = addr.rpartition(":")
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, addr
+
+
+class ControlServer:
+    """Line-based control socket for reconfiguring a headless run.
+
+    `address` is a Unix socket path or host:port. Each line is one command:
+    `get` answers the current settings as JSON; `set key=value ...` passes
+    the assignments (as strings) to `apply` and answers `ok` plus the new
+    settings, or `error <message>` if apply raised.
+    """
+
+    def __init__(self, address: str, get: Callable[[], dict], apply: Callable[[Dict[str, str]], None]):
+        self.address = address
+        self.get = get
+        self.apply = apply
+        self._server: Optional[socketserver.BaseServer] = None
+        self._thread = None
+
+    def handle_line(self, line: str) -> str:
+        parts = line.split()
+        if not parts:
+            return ""
+        cmd = parts[0].lower()
+        try:
+            if cmd == "get":
+                return json.dumps(self.get())
+            if cmd == "set":
+                self.apply(parse_assignments(parts[1:]))
+                return "ok " + json.dumps(self.get())
+            return f"error unknown command {cmd!r}"
+        except (TypeError, ValueError) as e:
+            return f"error {e}"
+
+    def start(self) -> None:
+        ctl = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    reply = ctl.handle_line(raw.decode("utf-8", "replace"))
+                    if reply:
+                        self.wfile.write(reply.encode() + b"\n")
+
+        family, addr = _address(self.address)
+        if family == socket.AF_UNIX:
+            # only a stale socket is replaced; a mistyped path must not delete a file
+            if _is_socket(addr):
+                os.unlink(addr)
+            elif os.path.lexists(addr):
+                raise FileExistsError(f"{addr} exists and is not a socket")
+            cls = socketserver.ThreadingUnixStreamServer
+        else:
+            cls = socketserver.ThreadingTCPServer
+        cls.daemon_threads = True
+        self._server = cls(addr, Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        family, addr = _address(self.address)
+        if family == socket.AF_UNIX and _is_socket(addr):
+            os.unlink(addr)
+
+
+def send(address: str, line: str, timeout: float = 5.0) -> str:
+    family, addr = _address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(addr)
+        s.sendall(line.encode() + b"\n")
+        with s.makefile("rb") as f:
+            return f.readline().decode().rstrip("\n")
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-control", description="Query or change a running tracker's settings")
+    p.add_argument("address", help="Control socket path or host:port given to --control")
+    p.add_argument("command", choices=["get", "set"])
+    p.add_argument("assignments", nargs="*", help="key=value, e.g. threshold=10 window=40 interval=0.25")
+    a = p.parse_args()
+    reply = send(a.address, " ".join([a.command] + a.assignments))
+    print(reply)
+    if reply.startswith("error"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import struct
+from typing import Tuple
+
+import numpy as np
+
+_BFEE_CODE = 187
+
+
+def read_esp32_csv(path: str) -> np.ndarray:
+    """Load an ESP32 CSI log ("CSI_DATA,...,[imag real imag real ...]" lines).
+
+    Returns complex64 frames shaped (packets, subcarriers, 1). The first
+    CSI line fixes the subcarrier count; lines of another length are skipped.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = [ln for ln in f if ln.startswith("CSI_DATA") and "[" in ln]
+    if not lines:
+        return np.zeros((0, 0, 1), dtype=np.complex64)
+    first = lines[0]
+    n = len(first[first.index("[") + 1:first.rindex("]")].split())
+    frames = np.empty((len(lines), n // 2, 1), dtype=np.complex64)
+    k = 0
+    for ln in lines:
+        raw = np.array(ln[ln.index("[") + 1:ln.rindex("]")].split(), dtype=np.float32)
+        if len(raw) != n:
+            continue
+        frames[k, :, 0].real = raw[1::2]
+        frames[k, :, 0].imag = raw[0::2]
+        k += 1
+    return frames[:k]
+
+
+def read_intel5300(path: str) -> np.ndarray:
+    """Load an Intel 5300 CSI Tool .dat log (beamforming feedback records).
+
+    Returns complex64 frames shaped (packets, 30, Nrx * Ntx), unpacked in
+    one vectorised gather. The antenna permutation is not applied. Records
+    with a different antenna count from the first one are skipped.
+    """
+    with open(path, "rb") as f:
+        buf = f.read()
+    offsets = []
+    m = 0
+    pos = 0
+    while pos + 3 <= len(buf):
+        field_len, code = struct.unpack_from(">HB", buf, pos)
+        body = pos + 3
+        pos += 2 + field_len
+        if code != _BFEE_CODE or pos > len(buf):
+            continue
+        nrx, ntx = buf[body + 8], buf[body + 9]
+        if not m:
+            m = nrx * ntx
+        if nrx * ntx == m:
+            offsets.append(body + 20)
+    if not offsets:
+        return np.zeros((0, 30, 0), dtype=np.complex64)
+
+    data = np.frombuffer(buf + b"\0\0", dtype=np.uint8).astype(np.uint16)
+    i = np.arange(30)[:, None]
+    j = np.arange(m)[None, :]
+    bit = (3 * (i + 1) + 16 * (i * m + j)).ravel()
+    byte = bit // 8
+    rem = (bit % 8).astype(np.uint16)
+    base = np.asarray(offsets)[:, None] + byte[None, :]
+    re = ((data[base] >> rem) | (data[base + 1] << (8 - rem))) & 0xFF
+    im = ((data[base + 1] >> rem) | (data[base + 2] << (8 - rem))) & 0xFF
+    frames = np.empty((len(offsets), 30, m), dtype=np.complex64)
+    frames.real = re.astype(np.uint8).view(np.int8).reshape(-1, 30, m)
+    frames.imag = im.astype(np.uint8).view(np.int8).reshape(-1, 30, m)
+    return frames
+
+
+def read_csi(path: str) -> np.ndarray:
+    if path.endswith(".dat"):
+        return read_intel5300(path)
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return read_esp32_csv(path)
+
+
+class CsiReplaySource:
+    def __init__(self, frames: np.ndarray, loop: bool = False):
+        self.frames = frames
+        self.loop = loop
+        self.pos = 0
+
+    def read(self) -> np.ndarray:
+        if self.pos >= len(self.frames):
+            if not self.loop or not len(self.frames):
+                raise EOFError("end of CSI frames")
+            self.pos = 0
+        f = self.frames[self.pos]
+        self.pos += 1
+        return f
+
+
+class CsiMotionDetector:
+    """Per-subcarrier counterpart of MotionDetector for CSI amplitude frames.
+
+    Each subcarrier/antenna stream gets its own EMA and rolling mean/std,
+    kept as running sums over a preallocated ring buffer. The per-stream
+    stds are fused by averaging the top `top_fraction` of them, since motion
+    usually perturbs only part of the band. The result has the same
+    (moving, avg, std, level) contract and hysteresis as MotionDetector;
+    `threshold` is in amplitude units.
+    """
+
+    def __init__(self, window_size: int = 30, threshold: float = 2.0, ema_alpha: float = 0.3, down_ratio: float = 0.6, top_fraction: float = 0.25):
+        self.window_size = window_size
+        self.threshold = threshold
+        self.ema_alpha = ema_alpha
+        self.down_ratio = down_ratio
+        self.top_fraction = top_fraction
+        self.active = False
+        self.count = 0
+        self.ema = None
+        self._buf = None
+
+    def _alloc(self, k: int) -> None:
+        self.ema = np.zeros(k)
+        self._buf = np.zeros((self.window_size, k))
+        self._sum = np.zeros(k)
+        self._sq = np.zeros(k)
+        self._amp = np.empty(k)
+        self._tmp = np.empty(k)
+        self._top = max(1, int(k * self.top_fraction))
+
+    def state(self) -> dict:
+        if self._buf is None:
+            return {"active": np.bool_(self.active), "count": np.int64(0)}
+        return {"active": np.bool_(self.active), "count": np.int64(self.count), "ema": self.ema.copy(), "buf": self._buf.copy(),
+                "sum": self._sum.copy(), "sq": self._sq.copy()}
+
+    def load_state(self, state: dict) -> None:
+        self.active = bool(state["active"])
+        self.count = int(state["count"])
+        if not self.count:
+            self._buf = None
+            return
+        buf = np.asarray(state["buf"], dtype=float)
+        if buf.shape[0] != self.window_size:
+            raise ValueError(f"snapshot window {buf.shape[0]} != detector window {self.window_size}")
+        self._alloc(buf.shape[1])
+        self._buf[:] = buf
+        self.ema[:] = state["ema"]
+        self._sum[:] = state["sum"]
+        self._sq[:] = state["sq"]
+
+    def update(self, frame: np.ndarray) -> Tuple[bool, float, float, int]:
+        frame = np.asarray(frame)
+        if self._buf is None or self._buf.shape[1] != frame.size:
+            self._alloc(frame.size)
+            self.count = 0
+        amp = self._amp
+        np.abs(frame.reshape(-1), out=amp)
+        if self.count == 0:
+            self.ema[:] = amp
+        else:
+            self.ema *= 1.0 - self.ema_alpha
+            amp *= self.ema_alpha
+            self.ema += amp
+        slot = self._buf[self.count % self.window_size]
+        tmp = self._tmp
+        np.subtract(self.ema, slot, out=tmp)
+        self._sum += tmp
+        np.multiply(slot, slot, out=tmp)
+        self._sq -= tmp
+        np.multiply(self.ema, self.ema, out=tmp)
+        self._sq += tmp
+        slot[:] = self.ema
+        self.count += 1
+        n = min(self.count, self.window_size)
+        if n < 5:
+            return False, 0.0, 0.0, 0
+        np.divide(self._sum, n, out=amp)
+        avg = float(amp.mean())
+        np.divide(self._sq, n, out=tmp)
+        amp *= amp
+        tmp -= amp
+        np.maximum(tmp, 0.0, out=tmp)
+        np.sqrt(tmp, out=tmp)
+        k = self._top
+        if k < len(tmp):
+            tmp.partition(len(tmp) - k)
+        std = float(tmp[len(tmp) - k:].mean())
+
+        if self.active:
+            if std < self.threshold * self.down_ratio:
+                self.active = False
+        elif std > self.threshold:
+            self.active = True
+
+        level = 0
+        if self.active:
+            if std < self.threshold * 2.0:
+                level = 1
+            elif std < self.threshold * 4.0:
+                level = 2
+            else:
+                level = 3
+        return self.active, avg, std, level
@@ -1,7 +1,9 @@
+import csv
 import subprocess
 import re
+import sys
 import time
-from typing import Iterator, Optional
+from typing import Iterator, Optional, Tuple
 
 
 class WindowsWlanSignalSource:
@@ -36,3 +38,78 @@ class WindowsWlanSignalSource:
             yield self.read()
             time.sleep(interval_s)
 
+
+
+# "  wlan0: 0000   70.  -40.  -256 ..." -> name, link quality, signal level
+_PROC_WIRELESS_LINE = re.compile(rb"^\s*([^\s:]+):\s+\S+\s+(-?\d+)\.?\s+(-?\d+)\.?", re.M)
+
+
+class LinuxWirelessSignalSource:
+    def __init__(self, interface: Optional[str] = None, path: str = "/proc/net/wireless", max_quality: int = 70):
+        self.interface = interface.encode() if interface else None
+        self.path = path
+        self.max_quality = max_quality
+        self._f = None
+
+    def read_levels(self) -> Tuple[int, int]:
+        if self._f is None:
+            self._f = open(self.path, "rb", buffering=0)
+        self._f.seek(0)
+        out = self._f.read()
+        for m in _PROC_WIRELESS_LINE.finditer(out):
+            if self.interface is None or m.group(1) == self.interface:
+                return int(m.group(2)), int(m.group(3))
+        if self.interface:
+            raise RuntimeError("interface not found")
+        raise RuntimeError("no wireless interface in " + self.path)
+
+    def read(self) -> int:
+        quality, level = self.read_levels()
+        if level < 0:
+            # dBm, mapped to a percentage the same way netsh reports it
+            return max(0, min(100, 2 * (level + 100)))
+        return max(0, min(100, quality * 100 // self.max_quality))
+
+    def stream(self, interval_s: float) -> Iterator[int]:
+        while True:
+            yield self.read()
+            time.sleep(interval_s)
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+class CsvReplaySource:
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = csv.reader(f)
+            next(rows, None)
+            self.values = [float(r[1]) for r in rows if len(r) > 1 and r[1]]
+        self.pos = 0
+
+    def read(self) -> float:
+        if self.pos >= len(self.values):
+            if not self.loop or not self.values:
+                raise EOFError("end of " + self.path)
+            self.pos = 0
+        v = self.values[self.pos]
+        self.pos += 1
+        return v
+
+    def stream(self, interval_s: float) -> Iterator[float]:
+        while True:
+            try:
+                yield self.read()
+            except EOFError:
+                return
+            time.sleep(interval_s)
+
+
+def default_source(interface: Optional[str] = None):
+    if sys.platform.startswith("linux"):
+        return LinuxWirelessSignalSource(interface=interface)
+    return WindowsWlanSignalSource(interface=interface)
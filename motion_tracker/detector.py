@@ -1,49 +1,163 @@
-from collections import deque
-from statistics import mean, median
-import math
-from typing import Tuple
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .baseline import DriftBaseline
+from .rolling import RollingMeanStd, RollingMedian
+from .spectral import StftFeatures
 
 
 class MotionDetector:
-    def __init__(self, window_size: int = 30, threshold: float = 8.0, ema_alpha: float = 0.3, long_window: int = 120, dev_factor: float = 3.0, down_ratio: float = 0.6):
+    PARAMS = ("window_size", "threshold", "ema_alpha", "long_window", "dev_factor", "down_ratio")
+
+    def __init__(self, window_size: int = 30, threshold: float = 8.0, ema_alpha: float = 0.3, long_window: int = 120, dev_factor: float = 3.0, down_ratio: float = 0.6, spectral: Optional[StftFeatures] = None, baseline: Optional[DriftBaseline] = None):
         self.window_size = window_size
         self.threshold = threshold
-        self.short = deque(maxlen=window_size)
-        self.long = deque(maxlen=max(long_window, window_size * 4))
+        self.short_stats = RollingMeanStd(window_size)
+        self.long_window = long_window
+        self.long_stats = RollingMedian(max(long_window, window_size * 4))
+        self.short = self.short_stats.values
+        self.long = self.long_stats.values
         self.ema_alpha = ema_alpha
         self.ema = None
         self.dev_factor = dev_factor
         self.down_ratio = down_ratio
         self.active = False
+        self.spectral = spectral
+        # with a DriftBaseline the long window is not kept at all
+        self.baseline = baseline
+        self.last_std = 0.0
+        self.last_dev = 0.0
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def configure(self, **params) -> None:
+        """Change parameters on a running detector, from any thread.
+
+        Changes are applied before the next sample. Window changes resize
+        the existing buffers keeping the newest samples, so the EMA,
+        baseline and hysteresis state all carry over.
+        """
+        unknown = set(params) - set(self.PARAMS)
+        if unknown:
+            raise TypeError(f"unknown detector parameter(s): {', '.join(sorted(unknown))}")
+        for k in ("window_size", "long_window"):
+            if k in params:
+                params[k] = int(params[k])
+                if params[k] < 1:
+                    raise ValueError(f"{k} must be >= 1")
+        for k in ("threshold", "ema_alpha", "dev_factor", "down_ratio"):
+            if k in params:
+                params[k] = float(params[k])
+        if "ema_alpha" in params and not 0.0 < params["ema_alpha"] <= 1.0:
+            raise ValueError("ema_alpha must be in (0, 1]")
+        with self._lock:
+            self._pending = dict(self._pending or {}, **params)
+
+    def params(self) -> dict:
+        p = {k: getattr(self, k) for k in self.PARAMS}
+        p.update(self._pending or {})
+        return p
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            p, self._pending = self._pending, None
+        for k in ("threshold", "ema_alpha", "dev_factor", "down_ratio"):
+            if k in p:
+                setattr(self, k, p[k])
+        w = p.get("window_size", self.window_size)
+        lw = p.get("long_window", self.long_window)
+        if w != self.window_size:
+            self.short_stats.resize(w)
+            self.short = self.short_stats.values
+        long_size = max(lw, w * 4)
+        if long_size != self.long.maxlen:
+            self.long_stats.resize(long_size)
+            self.long = self.long_stats.values
+        self.window_size = w
+        self.long_window = lw
+
+    def state(self) -> dict:
+        """Everything needed to resume detection exactly where it left off."""
+        if self._pending is not None:
+            self._apply_pending()
+        return {
+            "params": self.params(),
+            "ema": np.float64(np.nan if self.ema is None else self.ema),
+            "active": np.bool_(self.active),
+            "short": np.fromiter(self.short, float, len(self.short)),
+            "short_sum": np.float64(self.short_stats.sum),
+            "short_sq": np.float64(self.short_stats.sq),
+            "long": np.fromiter(self.long, float, len(self.long)),
+            "baseline": np.zeros(0) if self.baseline is None else self.baseline.state(),
+        }
+
+    def load_state(self, state: dict) -> None:
+        """Restore state(); window sizes come from this detector, not the saved params."""
+        ema = float(state["ema"])
+        self.ema = None if ema != ema else ema
+        self.active = bool(state["active"])
+        short = np.asarray(state["short"], dtype=float)
+        if len(short) <= self.window_size:
+            self.short_stats.reset(short.tolist(), float(state["short_sum"]), float(state["short_sq"]))
+        else:
+            self.short_stats.reset([], 0.0, 0.0)
+            for v in short[-self.window_size:].tolist():
+                self.short_stats.push(v)
+        self.long_stats.reset(np.asarray(state["long"], dtype=float)[-self.long.maxlen:].tolist())
+        saved = state.get("baseline")
+        if self.baseline is not None and saved is not None and len(saved):
+            self.baseline.load_state(saved)
 
-    def update(self, value: float) -> Tuple[bool, float, float]:
+    def update(self, value: float) -> Tuple[bool, float, float, int]:
+        if self._pending is not None:
+            self._apply_pending()
         if self.ema is None:
             self.ema = float(value)
         else:
             self.ema = self.ema_alpha * float(value) + (1.0 - self.ema_alpha) * self.ema
         v = self.ema
-        self.short.append(v)
-        self.long.append(v)
+        if self.spectral is not None:
+            self.spectral.push(float(value))
+        self.short_stats.push(v)
+        bl = self.baseline
+        if bl is None:
+            self.long_stats.push(v)
         if len(self.short) < 5:
+            if bl is not None:
+                bl.update(v)
             return False, 0.0, 0.0, 0
-        avg = mean(self.short)
-        var = mean([(x - avg) ** 2 for x in self.short])
-        std = math.sqrt(var)
-        if len(self.long) < 10:
+        avg = self.short_stats.mean()
+        std = self.short_stats.std()
+        dev = 0.0
+        if bl is not None:
+            # score against the baseline as it stood before this sample
+            if len(bl) >= 10:
+                rs = bl.mad * 1.4826
+                dev = abs(v - bl.median) / rs if rs > 1e-9 else 0.0
+            trig = dev > self.dev_factor or std > self.threshold
+            bl.update(v, std < self.threshold * self.down_ratio)
+        elif len(self.long) < 10:
             trig = std > self.threshold
         else:
-            med = median(self.long)
-            mad = median([abs(x - med) for x in self.long])
+            med = self.long_stats.median()
+            mad = self.long_stats.mad(med)
             rs = mad * 1.4826 if mad > 1e-9 else 0.0
             dev = abs(v - med) / rs if rs > 1e-9 else 0.0
             trig = dev > self.dev_factor or std > self.threshold
+        self.last_std = std
+        self.last_dev = dev
+        if self.spectral is not None and self.spectral.triggered(self.threshold):
+            trig = True
         if self.active:
             if std < self.threshold * self.down_ratio:
                 self.active = False
         else:
             if trig:
                 self.active = True
-        
+
         # Crowd/Intensity Estimation
         level = 0
         if self.active:
@@ -53,5 +167,155 @@ class MotionDetector:
                 level = 2
             else:
                 level = 3
-        
+
         return self.active, avg, std, level
+
+    def process_batch(self, values) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Score a whole array of samples; same results as calling update() on each in turn."""
+        if self._pending is not None:
+            self._apply_pending()
+        x = np.asarray(values, dtype=np.float64).ravel()
+        n = len(x)
+        moving = np.zeros(n, dtype=bool)
+        avg = np.zeros(n)
+        std = np.zeros(n)
+        level = np.zeros(n, dtype=np.int8)
+
+        # Until both windows are full (a fresh detector, or one just
+        # resized by configure()) they grow each sample, so run that prefix
+        # through the incremental path. The spectral stage
+        # is per-hop and the drift baseline is a scalar recurrence, so they
+        # stay on that path too.
+        k = 0
+        while k < n and (len(self.long) < self.long.maxlen or len(self.short) < self.window_size or self.window_size < 5
+                         or self.spectral is not None or self.baseline is not None):
+            moving[k], avg[k], std[k], level[k] = self.update(x[k])
+            k += 1
+        if k == n:
+            return moving, avg, std, level
+
+        e = _ema(x[k:], self.ema, self.ema_alpha)
+        w = self.window_size
+        lw = self.long.maxlen
+
+        short = np.concatenate((np.fromiter(self.short, float, w), e))
+        old = short[:len(e)]
+        sums = np.cumsum(np.concatenate(([self.short_stats.sum], e - old)))[1:]
+        sqs = np.cumsum(np.concatenate(([self.short_stats.sq], e * e - old * old)))[1:]
+        a = sums / w
+        var = sqs / w - a * a
+        s = np.sqrt(np.maximum(var, 0.0))
+
+        long = np.concatenate((np.fromiter(self.long, float, lw), e))
+        dev = np.zeros(len(e))
+        if lw < 10:
+            trig = s > self.threshold
+        else:
+            if lw < _SORT_MAX_WINDOW:
+                med, mad = _rolling_median_mad(sliding_window_view(long, lw)[1:])
+            else:
+                med, mad = _sliding_median_mad(long, lw)
+            rs = np.where(mad > 1e-9, mad * 1.4826, 0.0)
+            np.divide(np.abs(e - med), rs, out=dev, where=rs > 1e-9)
+            trig = (dev > self.dev_factor) | (s > self.threshold)
+        low = s < self.threshold * self.down_ratio
+
+        act = _hysteresis(trig, low, self.active)
+        active = bool(act[-1])
+
+        moving[k:] = act
+        avg[k:] = a
+        std[k:] = s
+        level[k:] = np.where(act, np.where(s < self.threshold * 2.0, 1, np.where(s < self.threshold * 4.0, 2, 3)), 0)
+
+        self.ema = float(e[-1])
+        self.active = active
+        self.last_std = float(s[-1])
+        self.last_dev = float(dev[-1])
+        self.short_stats.reset(short[-w:].tolist(), float(sums[-1]), float(sqs[-1]))
+        self.long_stats.reset(long[-lw:].tolist())
+        return moving, avg, std, level
+
+
+def _ema(x: np.ndarray, start: float, alpha: float) -> np.ndarray:
+    # The recurrence is inherently sequential; a plain float loop keeps the
+    # rounding identical to update().
+    e = start
+    b = 1.0 - alpha
+    return np.array([e := alpha * v + b * e for v in x.tolist()])
+
+
+def _hysteresis(trig: np.ndarray, low: np.ndarray, active: bool) -> np.ndarray:
+    # Per sample: trig & ~low forces on, ~trig & low forces off, neither
+    # holds and both toggles. So the state is the last forced value XOR the
+    # parity of toggles seen since then.
+    idx = np.arange(len(trig))
+    forced = trig != low
+    last = np.maximum.accumulate(np.where(forced, idx, -1))
+    base = np.where(last >= 0, trig[np.maximum(last, 0)], active)
+    ctog = np.cumsum(trig & low)
+    since = ctog - np.where(last >= 0, ctog[np.maximum(last, 0)], 0)
+    return base ^ (since % 2 == 1)
+
+
+def _rolling_median_mad(windows: np.ndarray, chunk_elems: int = 1 << 22) -> Tuple[np.ndarray, np.ndarray]:
+    # Row-wise sorts of short rows beat np.partition; the MAD is then a
+    # vectorised version of RollingMedian._kth over the sorted rows.
+    n, lw = windows.shape
+    h = lw // 2
+    med = np.empty(n)
+    mad = np.empty(n)
+    step = max(1, chunk_elems // lw)
+    for i in range(0, n, step):
+        srt = np.sort(windows[i:i + step], axis=1)
+        m = srt[:, h] if lw % 2 else (srt[:, h - 1] + srt[:, h]) / 2
+        p = (srt < m[:, None]).sum(axis=1)
+        med[i:i + step] = m
+        if lw % 2:
+            mad[i:i + step] = _kth_dist(srt, m, p, h)
+        else:
+            mad[i:i + step] = (_kth_dist(srt, m, p, h - 1) + _kth_dist(srt, m, p, h)) / 2
+    return med, mad
+
+
+# Re-sorting every window is O(lw log lw) per sample; from about 600-700
+# samples up (benchmarks/bench_detector.py) sliding the update() path's
+# sorted list along is cheaper, and equally exact.
+_SORT_MAX_WINDOW = 640
+
+
+def _sliding_median_mad(long: np.ndarray, lw: int) -> Tuple[np.ndarray, np.ndarray]:
+    r = RollingMedian(lw)
+    r.reset(long[:lw].tolist())
+    push, median, kmad = r.push, r.median, r.mad
+    med = []
+    mad = []
+    for v in long[lw:].tolist():
+        push(v)
+        m = median()
+        med.append(m)
+        mad.append(kmad(m))
+    return np.array(med), np.array(mad)
+
+
+def _kth_dist(srt: np.ndarray, m: np.ndarray, p: np.ndarray, k: int) -> np.ndarray:
+    n, lw = srt.shape
+    rows = np.arange(n)
+    need = k + 1
+    lo = np.maximum(0, need - (lw - p))
+    hi = np.minimum(need, p)
+    while True:
+        act = lo < hi
+        if not act.any():
+            break
+        i = (lo + hi) // 2
+        j = need - i
+        left = m - srt[rows, np.clip(p - 1 - i, 0, lw - 1)]
+        right = srt[rows, np.clip(p + j - 1, 0, lw - 1)] - m
+        more = act & (left < right)
+        lo = np.where(more, i + 1, lo)
+        hi = np.where(act & ~more, i, hi)
+    j = need - lo
+    left = np.where(lo > 0, m - srt[rows, np.clip(p - lo, 0, lw - 1)], -np.inf)
+    right = np.where(j > 0, srt[rows, np.clip(p + j - 1, 0, lw - 1)] - m, -np.inf)
+    return np.maximum(left, right)
@@ -0,0 +1,240 @@
+import argparse
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .detector import MotionDetector
+from .events import EventSegmenter, MotionEvent
+
+SAMPLE = np.dtype([("id", "<u4"), ("pad", "<u4"), ("t", "<f8"), ("value", "<f8")])
+_HEAD, _TAIL, _STOP = 0, 1, 2
+_CTRL_BYTES = 64
+
+
+class ShmRing:
+    """Single-producer/single-consumer ring of SAMPLE records in shared memory.
+
+    head and tail are free-running int64 counters in the first cache line;
+    the producer copies records in before publishing head, the consumer
+    copies them out before publishing tail, so neither side takes a lock.
+    """
+
+    def __init__(self, capacity: int = 1 << 16, name: Optional[str] = None):
+        create = name is None
+        size = _CTRL_BYTES + capacity * SAMPLE.itemsize
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size if create else 0)
+        self.capacity = capacity
+        self.ctrl = np.ndarray(8, dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray(capacity, dtype=SAMPLE, buffer=self.shm.buf, offset=_CTRL_BYTES)
+        if create:
+            self.ctrl[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __len__(self) -> int:
+        return int(self.ctrl[_HEAD] - self.ctrl[_TAIL])
+
+    def write(self, recs: np.ndarray) -> int:
+        head = int(self.ctrl[_HEAD])
+        n = min(len(recs), self.capacity - (head - int(self.ctrl[_TAIL])))
+        if n <= 0:
+            return 0
+        i = head % self.capacity
+        first = min(n, self.capacity - i)
+        self.data[i:i + first] = recs[:first]
+        if n > first:
+            self.data[:n - first] = recs[first:n]
+        self.ctrl[_HEAD] = head + n
+        return n
+
+    def read(self, max_items: int = 0) -> np.ndarray:
+        tail = int(self.ctrl[_TAIL])
+        n = int(self.ctrl[_HEAD]) - tail
+        if max_items:
+            n = min(n, max_items)
+        if n <= 0:
+            return self.data[:0].copy()
+        i = tail % self.capacity
+        first = min(n, self.capacity - i)
+        out = self.data[i:i + first].copy() if n == first else np.concatenate((self.data[i:], self.data[:n - first]))
+        self.ctrl[_TAIL] = tail + n
+        return out
+
+    def close(self, unlink: bool = False) -> None:
+        del self.ctrl, self.data
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(ring_name: str, capacity: int, out, detector_kwargs: dict, min_samples: int, update_every: int, idle_s: float) -> None:
+    ring = ShmRing(capacity, name=ring_name)
+    detectors: Dict[int, MotionDetector] = {}
+    segmenters: Dict[int, EventSegmenter] = {}
+    processed = 0
+    busy = 0.0
+    try:
+        while True:
+            recs = ring.read()
+            if not len(recs):
+                if ring.ctrl[_STOP] and not len(ring):
+                    break
+                time.sleep(idle_s)
+                continue
+            c0 = time.perf_counter()
+            order = np.argsort(recs["id"], kind="stable")
+            recs = recs[order]
+            ids = recs["id"]
+            cuts = np.flatnonzero(np.diff(ids)) + 1
+            for lo, hi in zip(np.concatenate(([0], cuts)).tolist(), np.concatenate((cuts, [len(recs)])).tolist()):
+                sid = int(ids[lo])
+                det = detectors.get(sid)
+                if det is None:
+                    det = detectors[sid] = MotionDetector(**detector_kwargs)
+                    seg = segmenters[sid] = EventSegmenter(min_samples, update_every, source=sid)
+                    seg.subscribe(lambda ev: out.put((ev.kind, ev.source, ev.start, ev.t, ev.max_std, ev.mean_signal, ev.samples)))
+                vals = recs["value"][lo:hi]
+                moving, _, std, _ = det.process_batch(vals)
+                segmenters[sid].push_batch(recs["t"][lo:hi], vals, moving, std)
+            processed += len(recs)
+            busy += time.perf_counter() - c0
+    finally:
+        out.put(("stats", processed, len(detectors), busy))
+        ring.close()
+
+
+class ShardedEngine:
+    """Runs MotionDetector/EventSegmenter pairs for many streams on a process pool.
+
+    Streams are sharded by id (id % workers). Samples reach each worker
+    through its own ShmRing; detectors and segmenters live only in the
+    worker, which scores each drained chunk per stream with process_batch.
+    Events come back over a multiprocessing queue and are delivered to
+    `on_event` from a collector thread with the stream name as `source`.
+    """
+
+    def __init__(self, workers: int = 4, on_event: Optional[Callable[[MotionEvent], None]] = None, capacity: int = 1 << 16,
+                 min_samples: int = 1, update_every: int = 0, idle_s: float = 0.0005, **detector_kwargs):
+        self.workers = workers
+        self.on_event = on_event
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.dropped = 0
+        self.processed = 0
+        self.busy: List[float] = []
+        ctx = mp.get_context()
+        self._out = ctx.Queue()
+        self.rings = [ShmRing(capacity) for _ in range(workers)]
+        self.procs = [ctx.Process(target=_worker, args=(r.name, capacity, self._out, detector_kwargs, min_samples, update_every, idle_s), daemon=True)
+                      for r in self.rings]
+        for p in self.procs:
+            p.start()
+        self._done = 0
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    def stream_id(self, name: str) -> int:
+        sid = self.ids.get(name)
+        if sid is None:
+            sid = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return sid
+
+    def push(self, stream_id: int, t: float, value: float, block: bool = True) -> bool:
+        rec = np.zeros(1, dtype=SAMPLE)
+        rec["id"] = stream_id
+        rec["t"] = t
+        rec["value"] = value
+        return self._put(self.rings[stream_id % self.workers], rec, block) == 1
+
+    def push_batch(self, ids: np.ndarray, t: np.ndarray, values: np.ndarray, block: bool = True) -> int:
+        """Queue many samples at once; returns how many were accepted."""
+        ids = np.asarray(ids, dtype=np.uint32)
+        recs = np.zeros(len(ids), dtype=SAMPLE)
+        recs["id"] = ids
+        recs["t"] = t
+        recs["value"] = values
+        if self.workers == 1:
+            return self._put(self.rings[0], recs, block)
+        shard = ids % self.workers
+        accepted = 0
+        for w in range(self.workers):
+            part = recs[shard == w]
+            if len(part):
+                accepted += self._put(self.rings[w], part, block)
+        return accepted
+
+    def _put(self, ring: ShmRing, recs: np.ndarray, block: bool) -> int:
+        done = ring.write(recs)
+        while block and done < len(recs):
+            time.sleep(0.0002)
+            done += ring.write(recs[done:])
+        self.dropped += len(recs) - done
+        return done
+
+    def _collect(self) -> None:
+        while self._done < self.workers:
+            try:
+                msg = self._out.get(timeout=0.1)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.procs):
+                    break
+                continue
+            if msg[0] == "stats":
+                self.processed += msg[1]
+                self.busy.append(msg[3])
+                self._done += 1
+            elif self.on_event is not None:
+                kind, sid, start, t, max_std, mean_signal, samples = msg
+                name = self.names[sid] if sid < len(self.names) else sid
+                self.on_event(MotionEvent(kind, name, start, t, max_std, mean_signal, samples))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Let workers drain their rings, then stop them and free the shared memory."""
+        for r in self.rings:
+            r.ctrl[_STOP] = 1
+        for p in self.procs:
+            p.join(timeout)
+        self._collector.join(timeout)
+        for r in self.rings:
+            r.close(unlink=True)
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-engine")
+    p.add_argument("paths", nargs="+", help="Recorded CSV or .mtr files, one stream each")
+    p.add_argument("--workers", type=int, default=mp.cpu_count())
+    p.add_argument("--interval", type=float, default=0.5, help="Sample interval when a recording has no timestamps")
+    p.add_argument("--window", type=int, default=30)
+    p.add_argument("--threshold", type=float, default=8.0)
+    p.add_argument("--min-duration", type=float, default=1.0)
+    a = p.parse_args()
+
+    from .replay import load_signal
+
+    def on_event(ev):
+        if ev.kind == "end":
+            print(f"{ev.source} event start={ev.start:.2f} duration={ev.duration:.2f} max_std={ev.max_std:.2f} mean_signal={ev.mean_signal:.2f}")
+
+    eng = ShardedEngine(a.workers, on_event=on_event, min_samples=max(1, int(a.min_duration / a.interval)),
+                        window_size=a.window, threshold=a.threshold)
+    t0 = time.perf_counter()
+    total = 0
+    for path in a.paths:
+        _, sig = load_signal(path)
+        sid = eng.stream_id(path)
+        total += eng.push_batch(np.full(len(sig), sid), np.arange(len(sig)) * a.interval, sig)
+    eng.close()
+    el = time.perf_counter() - t0
+    print(f"streams={len(a.paths)} samples={total} workers={a.workers} elapsed={el:.2f}s rate={total / el:,.0f}/s dropped={eng.dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+def runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(starts, ends) of the True runs in a boolean array, end exclusive."""
+    edges = np.diff(np.concatenate(([False], np.asarray(mask, dtype=bool), [False])).astype(np.int8))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def score_events(pred: np.ndarray, truth: np.ndarray, sample_rate: float = 1.0) -> Dict[str, float]:
+    """Event-level precision/recall and latency-to-detect.
+
+    A predicted event counts as a true positive if it overlaps any truth
+    event; a truth event is detected if any predicted event overlaps it.
+    Latency is measured from the truth start to the first predicted motion
+    sample inside it, in seconds.
+    """
+    ps, pe = runs(pred)
+    ts, te = runs(truth)
+    cum = np.concatenate(([0], np.cumsum(pred)))
+    hit = cum[te] - cum[ts] > 0
+    tcum = np.concatenate(([0], np.cumsum(truth)))
+    tp = tcum[pe] - tcum[ps] > 0
+    lat = []
+    pred_idx = np.flatnonzero(pred)
+    for s, e in zip(ts[hit].tolist(), te[hit].tolist()):
+        first = pred_idx[np.searchsorted(pred_idx, s)]
+        lat.append((first - s) / sample_rate)
+    return {
+        "predicted": int(len(ps)),
+        "truth": int(len(ts)),
+        "precision": float(tp.mean()) if len(ps) else 0.0,
+        "recall": float(hit.mean()) if len(ts) else 0.0,
+        "latency_mean_s": float(np.mean(lat)) if lat else float("nan"),
+        "latency_p90_s": float(np.percentile(lat, 90)) if lat else float("nan"),
+        "false_alarms": int(len(ps) - tp.sum()),
+    }
@@ -0,0 +1,209 @@
+import asyncio
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+
+START = "start"
+UPDATE = "update"
+END = "end"
+
+
+class MotionEvent:
+    """A start/update/end notification for one motion event.
+
+    `start` and `t` are monotonic seconds (for END, `t` is the first
+    sample after the event). `start_label`/`label` carry whatever the
+    caller passed alongside the samples, e.g. ISO wall-clock strings.
+    """
+
+    __slots__ = ("kind", "source", "start", "t", "max_std", "mean_signal", "samples", "start_label", "label")
+
+    def __init__(self, kind: str, source, start: float, t: float, max_std: float, mean_signal: float, samples: int, start_label=None, label=None):
+        self.kind = kind
+        self.source = source
+        self.start = start
+        self.t = t
+        self.max_std = max_std
+        self.mean_signal = mean_signal
+        self.samples = samples
+        self.start_label = start_label
+        self.label = label
+
+    @property
+    def duration(self) -> float:
+        return self.t - self.start
+
+    def __repr__(self) -> str:
+        return f"MotionEvent({self.kind}, source={self.source!r}, start={self.start:.3f}, duration={self.duration:.3f}, max_std={self.max_std:.3f}, samples={self.samples})"
+
+
+class EventSegmenter:
+    """Turns detector output into debounced motion events.
+
+    A sample is part of an event once the detector has reported moving for
+    `min_samples` consecutive samples and, when `min_duration` is set, for
+    at least that many seconds (the run from its first sample's time up to
+    the current sample, plus the current sample's own spacing, so k samples
+    at a fixed interval dt count as k * dt). The time rule keeps debouncing
+    meaningful when the sample rate varies. Subscribers get START on the first
+    event sample, UPDATE every `update_every` event samples (0 = never) and
+    END on the first sample after it. push() and push_batch() share state
+    and produce identical events, so live runs and offline replay agree.
+    """
+
+    def __init__(self, min_samples: int = 1, update_every: int = 0, source=None, min_duration: float = 0.0):
+        self.min_samples = max(1, min_samples)
+        self.min_duration = min_duration
+        self.run_start = 0.0
+        self.prev_t = None
+        self.update_every = update_every
+        self.source = source
+        self.subscribers: List[Callable[[MotionEvent], None]] = []
+        self.active_count = 0
+        self.in_event = False
+        self.ev_start = 0.0
+        self.ev_start_label = None
+        self.ev_max_std = 0.0
+        self.ev_sig_sum = 0.0
+        self.ev_count = 0
+
+    def subscribe(self, callback: Callable[[MotionEvent], None]) -> Callable[[], None]:
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback)
+
+    def _emit(self, kind: str, t: float, label) -> None:
+        if not self.subscribers:
+            return
+        ev = MotionEvent(kind, self.source, self.ev_start, t, self.ev_max_std, self.ev_sig_sum / self.ev_count if self.ev_count else 0.0, self.ev_count, self.ev_start_label, label)
+        for cb in self.subscribers:
+            cb(ev)
+
+    def push(self, value: float, moving: bool, std: float, t: Optional[float] = None, label=None) -> bool:
+        if moving:
+            self.active_count += 1
+        else:
+            self.active_count = 0
+        event = self.active_count >= self.min_samples
+        if self.min_duration > 0:
+            if t is None:
+                t = time.monotonic()
+            if self.active_count == 1:
+                self.run_start = t
+            gap = t - self.prev_t if self.prev_t is not None else 0.0
+            self.prev_t = t
+            event = event and t - self.run_start + gap >= self.min_duration
+        if event:
+            if t is None:
+                t = time.monotonic()
+            if not self.in_event:
+                self.in_event = True
+                self.ev_start = t
+                self.ev_start_label = label
+                self.ev_max_std = std
+                self.ev_sig_sum = value
+                self.ev_count = 1
+                self._emit(START, t, label)
+            else:
+                if std > self.ev_max_std:
+                    self.ev_max_std = std
+                self.ev_sig_sum += value
+                self.ev_count += 1
+                if self.update_every and self.ev_count % self.update_every == 0:
+                    self._emit(UPDATE, t, label)
+        elif self.in_event:
+            self._emit(END, time.monotonic() if t is None else t, label)
+            self.in_event = False
+            self.ev_start_label = None
+            self.ev_max_std = 0.0
+            self.ev_sig_sum = 0.0
+            self.ev_count = 0
+        return event
+
+    def push_batch(self, t: np.ndarray, values: np.ndarray, moving: np.ndarray, std: np.ndarray, labels=None) -> np.ndarray:
+        """Vectorised push() over arrays; returns the per-sample event mask."""
+        moving = np.asarray(moving, dtype=bool)
+        n = len(moving)
+        if not n:
+            return np.zeros(0, dtype=bool)
+        t = np.asarray(t, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        std = np.asarray(std, dtype=np.float64)
+        c = np.cumsum(moving)
+        run = c - np.maximum.accumulate(np.where(moving, 0, c))
+        run = run + np.where(np.cumsum(~moving) == 0, self.active_count, 0)
+        event = run >= self.min_samples
+        if self.min_duration > 0:
+            first = np.arange(n) - run + 1
+            t_start = np.where(first >= 0, t[np.clip(first, 0, n - 1)], self.run_start)
+            gap = np.diff(t, prepend=t[0] if self.prev_t is None else self.prev_t)
+            event &= t - t_start + gap >= self.min_duration
+            if run[-1] > 0:
+                self.run_start = float(t_start[-1])
+            self.prev_t = float(t[-1])
+        self.active_count = int(run[-1])
+
+        prev = np.concatenate(([self.in_event], event[:-1]))
+        starts = np.flatnonzero(event & ~prev)
+        ends = np.flatnonzero(~event & prev)
+        # walk segments in order; a leading segment continues the open event
+        si = 0
+        ei = 0
+        pos = 0
+        while pos < n:
+            if self.in_event:
+                e = int(ends[ei]) if ei < len(ends) else n
+                self._absorb(t, values, std, labels, pos, e)
+                if e < n:
+                    self._emit(END, float(t[e]), labels[e] if labels is not None else None)
+                    self.in_event = False
+                    self.ev_start_label = None
+                    self.ev_max_std = 0.0
+                    self.ev_sig_sum = 0.0
+                    self.ev_count = 0
+                    ei += 1
+                pos = e
+            else:
+                while si < len(starts) and starts[si] < pos:
+                    si += 1
+                if si >= len(starts):
+                    break
+                s = int(starts[si])
+                self.in_event = True
+                self.ev_start = float(t[s])
+                self.ev_start_label = labels[s] if labels is not None else None
+                self.ev_max_std = float(std[s])
+                self.ev_sig_sum = float(values[s])
+                self.ev_count = 1
+                self._emit(START, self.ev_start, self.ev_start_label)
+                pos = s + 1
+        return event
+
+    def _absorb(self, t, values, std, labels, s: int, e: int) -> None:
+        if e <= s:
+            return
+        # sequential sums so the float result matches push() exactly
+        sums = np.cumsum(np.concatenate(([self.ev_sig_sum], values[s:e])))[1:]
+        maxes = np.maximum.accumulate(np.concatenate(([self.ev_max_std], std[s:e])))[1:]
+        base = self.ev_count
+        if self.update_every and self.subscribers:
+            k = np.arange(base + 1, base + 1 + e - s)
+            for i in np.flatnonzero(k % self.update_every == 0).tolist():
+                self.ev_sig_sum = float(sums[i])
+                self.ev_max_std = float(maxes[i])
+                self.ev_count = base + 1 + i
+                self._emit(UPDATE, float(t[s + i]), labels[s + i] if labels is not None else None)
+        self.ev_sig_sum = float(sums[-1])
+        self.ev_max_std = float(maxes[-1])
+        self.ev_count = base + e - s
+
+    async def events(self, maxsize: int = 0):
+        """Async iterator over events; safe to feed from another thread."""
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize)
+        unsubscribe = self.subscribe(lambda ev: loop.call_soon_threadsafe(q.put_nowait, ev))
+        try:
+            while True:
+                yield await q.get()
+        finally:
+            unsubscribe()
@@ -0,0 +1,253 @@
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .detector import MotionDetector
+
+
+class ZoneEvent:
+    """A zone turning occupied (active=True) or clear on the fused timeline."""
+
+    __slots__ = ("t", "zone", "active", "score")
+
+    def __init__(self, t: float, zone: int, active: bool, score: float):
+        self.t = t
+        self.zone = zone
+        self.active = active
+        self.score = score
+
+    def __repr__(self) -> str:
+        return f"ZoneEvent(t={self.t:.2f}, zone={self.zone}, active={self.active}, score={self.score:.2f})"
+
+
+def grid_zones(width: float, height: float, nx: int, ny: int) -> np.ndarray:
+    """Centres of an nx by ny grid of zones over a width x height room, row-major, shape (nx*ny, 2)."""
+    xs = (np.arange(nx) + 0.5) * width / nx
+    ys = (np.arange(ny) + 0.5) * height / ny
+    gx, gy = np.meshgrid(xs, ys)
+    return np.column_stack([gx.ravel(), gy.ravel()])
+
+
+def all_links(nodes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Every unordered node pair as (tx, rx) position arrays."""
+    i, j = np.triu_indices(len(nodes), k=1)
+    return nodes[i], nodes[j]
+
+
+def excess_path(tx: np.ndarray, rx: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """|p - tx| + |p - rx| - |tx - rx| for every link and point, shape (links, points)."""
+    dt = np.linalg.norm(points[None, :, :] - tx[:, None, :], axis=2)
+    dr = np.linalg.norm(points[None, :, :] - rx[:, None, :], axis=2)
+    return dt + dr - np.linalg.norm(tx - rx, axis=1)[:, None]
+
+
+def link_zone_matrix(tx: np.ndarray, rx: np.ndarray, centers: np.ndarray, width: float = 0.3, cutoff: float = 1e-3) -> np.ndarray:
+    """Link-to-zone weights (links, zones) from the excess path length.
+
+    A body near the line of sight perturbs a link most; the weight decays
+    as exp(-excess / width) across the ellipses around each link, as in
+    radio tomographic imaging, and is scaled by 1/sqrt(link length) so long
+    links do not dominate. Weights below `cutoff` are zeroed.
+    """
+    w = np.exp(-excess_path(tx, rx, centers) / width)
+    w /= np.sqrt(np.maximum(np.linalg.norm(tx - rx, axis=1), 1e-9))[:, None]
+    w[w < cutoff] = 0.0
+    return w
+
+
+class LinkAligner:
+    """Resamples per-link scores onto a common monotonic timeline.
+
+    The timeline is bins of `step` seconds. Each bin keeps the largest score
+    a link reported inside it; links without a sample in a bin hold their
+    last value for up to `stale` seconds and are reported as not live after
+    that. A bin closes once every live link has reported past its end, or
+    once the newest sample (or `now`) is `max_delay` past it, so one slow
+    or dead link delays output by at most `max_delay`. Samples for bins that
+    already closed are counted in `late` and dropped. The ring holds
+    max_delay / step + 2 bins; a sample further ahead force-closes the oldest.
+    A jump longer than the ring plus `stale` (a node clock step, or
+    advance() after a long idle) closes the bins still holding data, then
+    emits a single all-dead bin for the gap instead of one per step; the
+    skipped bins are counted in `skipped`.
+    """
+
+    def __init__(self, links: int, step: float = 0.5, max_delay: float = 1.0, stale: float = 5.0):
+        self.links = links
+        self.step = step
+        self.max_delay = max_delay
+        self.stale = stale
+        self.depth = int(math.ceil(max_delay / step)) + 2
+        self.ring = np.full((self.depth, links), np.nan)
+        self.latest = np.full(links, -np.inf)
+        self.hold = np.zeros(links)
+        self.hold_bin = np.full(links, np.iinfo(np.int64).min // 2, dtype=np.int64)
+        self.next_bin: Optional[int] = None
+        self.late = 0
+        self.closed = 0
+        self.skipped = 0
+        self._gap = self.depth + int(math.ceil(stale / step))
+        self._ready: List[Tuple[float, np.ndarray, np.ndarray]] = []
+
+    def push(self, link: int, t: float, score: float) -> None:
+        k = int(t // self.step)
+        if self.next_bin is None:
+            self.next_bin = k
+        if k < self.next_bin:
+            self.late += 1
+            return
+        self._skip(k - self.depth + 1)
+        while k >= self.next_bin + self.depth:
+            self._close()
+        row = self.ring[k % self.depth]
+        # an empty slot is NaN, which never compares >= score
+        if not row[link] >= score:
+            row[link] = score
+        if t > self.latest[link]:
+            self.latest[link] = t
+
+    def push_batch(self, links: np.ndarray, t: np.ndarray, scores: np.ndarray) -> None:
+        """Vectorized push() for samples in time order."""
+        links = np.asarray(links, dtype=np.int64)
+        t = np.asarray(t, dtype=np.float64)
+        scores = np.asarray(scores, dtype=np.float64)
+        if not len(t):
+            return
+        k = (t // self.step).astype(np.int64)
+        if self.next_bin is None:
+            self.next_bin = int(k[0])
+        # chunk so no chunk spans more bins than the ring holds
+        i = 0
+        while i < len(k):
+            self._skip(int(k[i]) - self.depth + 1)
+            while k[i] >= self.next_bin + self.depth:
+                self._close()
+            j = i + int(np.searchsorted(k[i:], self.next_bin + self.depth))
+            kk, ll, ss = k[i:j], links[i:j], scores[i:j]
+            ok = kk >= self.next_bin
+            self.late += int(len(ok) - ok.sum())
+            kk, ll, ss = kk[ok], ll[ok], ss[ok]
+            # fmax.at ignores the NaN of an empty slot and keeps the bin max on duplicates
+            np.fmax.at(self.ring, (kk % self.depth, ll), ss)
+            np.maximum.at(self.latest, links[i:j], t[i:j])
+            i = j
+
+    def _close(self) -> None:
+        k = self.next_bin
+        row = self.ring[k % self.depth]
+        got = ~np.isnan(row)
+        self.hold[got] = row[got]
+        self.hold_bin[got] = k
+        live = (k - self.hold_bin) * self.step <= self.stale
+        self._ready.append(((k + 1) * self.step, np.where(live, self.hold, 0.0), live))
+        row.fill(np.nan)
+        self.next_bin = k + 1
+        self.closed += 1
+
+    def _skip(self, target: int) -> None:
+        # every hold is older than `stale` by the end of the gap, so the whole gap is one dead bin
+        if target - self.next_bin <= self._gap:
+            return
+        for _ in range(self.depth):
+            self._close()
+        self.skipped += target - self.next_bin - 1
+        self._ready.append((target * self.step, np.zeros(self.links), np.zeros(self.links, dtype=bool)))
+        self.next_bin = target
+        self.closed += 1
+
+    def advance(self, now: Optional[float] = None) -> List[Tuple[float, np.ndarray, np.ndarray]]:
+        """Close every bin the watermark has passed; returns [(bin end time, scores, live mask)]."""
+        if self.next_bin is not None:
+            lat = self.latest
+            newest = lat.max()
+            recent = lat >= newest - self.stale
+            wm = max(lat[recent].min(), newest - self.max_delay)
+            if now is not None:
+                wm = max(wm, now - self.max_delay)
+            self._skip(int(wm // self.step))
+            while (self.next_bin + 1) * self.step <= wm:
+                self._close()
+        out, self._ready = self._ready, []
+        return out
+
+
+class ZoneFusion:
+    """Per-zone motion scores and occupancy with hysteresis.
+
+    A zone's score is the weighted mean of the live links' scores, with the
+    link-to-zone matrix as weights. A zone turns occupied above `on` and
+    clears below `off`. With std / threshold link scores, a single moving
+    link scores 1.0, but a zone averages every link near it, so a person
+    lifts their zone to roughly 0.3 against ~0.05 for an empty room;
+    hence the low defaults. update() is a couple of (links x zones) products
+    plus elementwise ops, so it stays in the tens of microseconds for
+    hundreds of links.
+    """
+
+    def __init__(self, matrix: np.ndarray, on: float = 0.25, off: float = 0.18):
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        self.on = on
+        self.off = off
+        self.active = np.zeros(self.matrix.shape[1], dtype=bool)
+        self.scores = np.zeros(self.matrix.shape[1])
+
+    @property
+    def zones(self) -> int:
+        return self.matrix.shape[1]
+
+    def update(self, scores: np.ndarray, live: Optional[np.ndarray] = None, t: float = 0.0) -> List[ZoneEvent]:
+        if live is None:
+            num = scores @ self.matrix
+            den = self.matrix.sum(axis=0)
+        else:
+            m = live.astype(np.float64)
+            num = (scores * m) @ self.matrix
+            den = m @ self.matrix
+        z = np.divide(num, den, out=np.zeros_like(num), where=den > 1e-12)
+        self.scores = z
+        active = np.where(self.active, z > self.off, z > self.on)
+        changed = np.flatnonzero(active != self.active)
+        self.active = active
+        return [ZoneEvent(t, int(i), bool(active[i]), float(z[i])) for i in changed]
+
+
+class FusionEngine:
+    """Per-link MotionDetectors feeding a LinkAligner and ZoneFusion.
+
+    push(link, t, value) runs the link's detector and queues its std /
+    threshold as the link score at monotonic time t; poll() closes ready
+    bins, updates the zones and hands ZoneEvents to subscribers.
+    """
+
+    def __init__(self, matrix: np.ndarray, step: float = 0.5, max_delay: float = 1.0, stale: float = 5.0, on: float = 0.25,
+                 off: float = 0.18, **detector_kwargs):
+        links = matrix.shape[0]
+        self.detectors = [MotionDetector(**detector_kwargs) for _ in range(links)]
+        self.aligner = LinkAligner(links, step, max_delay, stale)
+        self.fusion = ZoneFusion(matrix, on, off)
+        self.subscribers: List[Callable[[ZoneEvent], None]] = []
+        self.updates = 0
+
+    def subscribe(self, callback: Callable[[ZoneEvent], None]) -> Callable[[], None]:
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback)
+
+    def push(self, link: int, t: float, value: float) -> None:
+        det = self.detectors[link]
+        _, _, std, _ = det.update(value)
+        self.aligner.push(link, t, std / det.threshold if det.threshold > 0 else 0.0)
+
+    def poll(self, now: Optional[float] = None) -> List[Tuple[float, np.ndarray]]:
+        """Returns [(bin end time, zone scores)] for the bins closed by this call."""
+        out = []
+        for t, scores, live in self.aligner.advance(now):
+            for ev in self.fusion.update(scores, live, t):
+                for cb in self.subscribers:
+                    cb(ev)
+            out.append((t, self.fusion.scores))
+            self.updates += 1
+        return out
+
+    def occupied(self) -> Sequence[int]:
+        return np.flatnonzero(self.fusion.active).tolist()
@@ -1,21 +1,38 @@
+import argparse
+import glob
+import os
 import threading
 import queue
 import time
+from collections import deque
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk
-import csv
 
-from .datasource import WindowsWlanSignalSource
+from .adaptive import AdaptiveInterval
+from .channel import SampleChannel
+from .classifier import OccupancyClassifier, OccupancyModel, build_dataset, load_training
+from .datasource import default_source
 from .detector import MotionDetector
+from .events import END, EventSegmenter
+from .metrics import Metrics, MetricsServer
+from .plotting import LivePlot
+from .push import PushHub
+from .snapshot import SnapshotKeeper
+from .store import EventStore
+from .writer import RowWriter
 
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
+CROWD_LEVELS = ("Empty", "Low", "Medium", "High")
+
 
 class App:
-    def __init__(self, root):
+    def __init__(self, root, hub=None, metrics=None):
         self.root = root
+        self.hub = hub
+        self.metrics = metrics
         self.root.title("WiFi Motion Tracker")
         self.interval = tk.DoubleVar(value=0.5)
         self.threshold = tk.DoubleVar(value=8.0)
@@ -23,9 +40,18 @@ class App:
         self.state_str = tk.StringVar(value="IDLE")
         self.crowd_str = tk.StringVar(value="Empty")
         self.running = False
-        self.queue = queue.Queue()
-        self.source = WindowsWlanSignalSource()
+        self.starting = False
+        self.stop = threading.Event()
+        self.channel = SampleChannel(capacity=4096)
+        self.source = default_source()
         self.detector = MotionDetector(window_size=self.window.get(), threshold=self.threshold.get())
+        self.snapshots = SnapshotKeeper('motion_baseline.npz', self.detector, environment="default")
+        self.snapshot_status = self.snapshots.restore()[1]
+        self.model_path = 'occupancy_model.npz'
+        self.occupancy = None
+        self.model_str = tk.StringVar(value=self._load_model())
+        self.train_messages = queue.Queue()
+        self.worker_thread = None
 
         # Setup Tabs
         self.notebook = ttk.Notebook(root)
@@ -39,21 +65,27 @@ class App:
         self._setup_monitor_tab()
         self._setup_train_tab()
 
-        self.xs = []
-        self.sig = []
-        self.avg = []
-        self.std = []
-        self.thr = []
-        self.events = []
-        self.max_points = 200
-        self.events_queue = queue.Queue()
+        self.max_points = 2000
+        self.plot = LivePlot(self.ax1, self.ax2, self.threshold.get(), capacity=self.max_points, span_s=120.0)
+        self.last_sig = None
+        self.max_events = 500
+        self.max_log_lines = 1000
+        self.events_queue = deque(maxlen=self.max_events)
         self.log_events = tk.BooleanVar(value=True)
+        self.adaptive = tk.BooleanVar(value=False)
         self.events_csv = 'motion_events.csv'
+        self.events_writer = None
+        self.events_store = None
+        if metrics:
+            metrics.gauge("channel", self.channel.__len__)
+            metrics.gauge("channel_dropped", lambda: self.channel.dropped)
+            metrics.gauge("events_queue", self.events_queue.__len__)
 
         # Move Checkbutton to Monitor Tab
         side = ttk.Frame(self.tab_monitor)
         side.pack(fill=tk.BOTH, expand=False, padx=10, pady=5)
         ttk.Checkbutton(side, text="Log Events", variable=self.log_events).pack(side=tk.LEFT)
+        ttk.Checkbutton(side, text="Adaptive Rate", variable=self.adaptive).pack(side=tk.LEFT, padx=(10, 0))
         ttk.Label(side, text=self.events_csv).pack(side=tk.LEFT, padx=(10, 0))
 
         # Move Treeview to Monitor Tab
@@ -63,8 +95,39 @@ class App:
             self.tree.column(col, anchor=tk.CENTER, width=120)
         self.tree.pack(fill=tk.X, padx=10)
 
+        self.threshold.trace_add("write", self.on_params)
+        self.window.trace_add("write", self.on_params)
+        # the worker reads plain copies: a Tk call from it would have to wait for the main thread
+        self.on_settings()
+        for var in (self.interval, self.adaptive, self.log_events):
+            var.trace_add("write", self.on_settings)
         self.root.after(100, self.update_ui)
 
+    def _load_model(self):
+        if not os.path.exists(self.model_path):
+            return "Model: none (crowd from motion level)"
+        try:
+            model = OccupancyModel.load(self.model_path)
+        except Exception as e:
+            return f"Model: unusable ({e})"
+        # the worker picks the new classifier up on its next sample
+        self.occupancy = OccupancyClassifier(model)
+        return f"Model: {len(model.classes)} classes"
+
+    def on_params(self, *_):
+        try:
+            self.detector.configure(window_size=int(self.window.get()), threshold=float(self.threshold.get()))
+        except (tk.TclError, ValueError):
+            pass
+
+    def on_settings(self, *_):
+        try:
+            self.interval_s = float(self.interval.get())
+            self.adaptive_on = bool(self.adaptive.get())
+            self.log_on = bool(self.log_events.get())
+        except (tk.TclError, ValueError):
+            pass
+
     def _setup_monitor_tab(self):
         top = ttk.Frame(self.tab_monitor)
         top.pack(fill=tk.X, padx=10, pady=10)
@@ -86,6 +149,8 @@ class App:
         ttk.Label(ctl, text="Crowd:").pack(side=tk.LEFT, padx=(10, 0))
         self.crowd_label = ttk.Label(ctl, textvariable=self.crowd_str, font=("Helvetica", 10, "bold"))
         self.crowd_label.pack(side=tk.LEFT)
+        ttk.Label(ctl, text=f"Baseline: {self.snapshot_status}").pack(side=tk.RIGHT)
+        ttk.Label(ctl, textvariable=self.model_str).pack(side=tk.RIGHT, padx=(0, 10))
 
         fig = Figure(figsize=(9, 5))
         self.ax1 = fig.add_subplot(211)
@@ -116,6 +181,8 @@ class App:
         
         self.btn_rec = ttk.Button(ctl, text="Start Recording", command=self.toggle_record)
         self.btn_rec.pack(side=tk.LEFT, padx=10)
+        self.btn_fit = ttk.Button(ctl, text="Train Model", command=self.train_model)
+        self.btn_fit.pack(side=tk.LEFT, padx=10)
         
         ttk.Label(frame, textvariable=self.train_status, foreground="blue").pack(pady=10)
         
@@ -128,14 +195,13 @@ class App:
             self.btn_rec.config(text="Start Recording")
             self.train_status.set("Recording stopped.")
             if self.train_file:
-                self.train_file.close()
+                train_file = self.train_file
                 self.train_file = None
+                train_file.close()
         else:
             count = self.train_people.get()
             fname = f"train_data_{count}people_{int(time.time())}.csv"
-            self.train_file = open(fname, "w", encoding="utf-8", newline="")
-            self.train_writer = csv.writer(self.train_file)
-            self.train_writer.writerow(["timestamp", "signal"])
+            self.train_file = RowWriter(fname, "{},{}\n", header="timestamp,signal")
             
             self.is_recording = True
             self.btn_rec.config(text="Stop Recording")
@@ -146,154 +212,210 @@ class App:
                 self.start()
 
 
+    def train_model(self):
+        self.btn_fit.config(state=tk.DISABLED)
+        self.train_status.set("Training model...")
+        threading.Thread(target=self._train, daemon=True).start()
+
+    def _train(self):
+        # runs off the Tk thread; update_ui posts the (message, model status) result
+        try:
+            paths = sorted(glob.glob("train_data_*people_*.csv"))
+            X, y, _ = build_dataset(load_training(paths), 32, 4)
+            if len(set(y.tolist())) < 2:
+                self.train_messages.put(("Need recordings for at least two different people counts.", None))
+                return
+            OccupancyModel.fit(X, y, 32).save(self.model_path)
+        except (OSError, ValueError) as e:
+            self.train_messages.put((f"Training failed: {e}", None))
+            return
+        self.train_messages.put((f"Trained on {len(y)} windows from {len(paths)} recordings.", self._load_model()))
+
     def start(self):
         if self.running:
             self.running = False
+            self.stop.set()
             self.btn.config(text="Start")
             return
+        # the previous worker wakes from stop.wait() at once; poll until it is past its
+        # last read so only one thread ever drives the detector and writes the SampleChannel.
+        # Never join() here: that would block the Tk loop.
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            if not self.starting:
+                self.starting = True
+                self.btn.config(state=tk.DISABLED)
+                self.root.after(50, self._start_when_idle)
+            return
+        self.stop.clear()
         self.running = True
         self.btn.config(text="Stop")
-        self.detector = MotionDetector(window_size=int(self.window.get()), threshold=float(self.threshold.get()))
-        t = threading.Thread(target=self.worker, daemon=True)
-        t.start()
+        # keep the warmed-up detector across Stop/Start; just bring its settings up to date
+        self.on_params()
+        self.worker_thread = threading.Thread(target=self.worker, daemon=True)
+        self.worker_thread.start()
+
+    def _start_when_idle(self):
+        self.starting = False
+        self.btn.config(state=tk.NORMAL)
+        if not self.running:
+            self.start()
+
+    def on_event(self, ev):
+        if ev.kind != END:
+            return
+        self.events_queue.append((ev.start_label, ev.label, ev.duration, ev.max_std, ev.mean_signal))
+        if self.log_on:
+            if self.events_writer is None:
+                self.events_writer = RowWriter(self.events_csv, "{},{},{},{},{}\n", header="start,end,duration_s,max_std,mean_signal", flush_rows=1)
+            self.events_writer.write(ev.start_label, ev.label, round(ev.duration, 3), round(ev.max_std, 3), round(ev.mean_signal, 3))
+            if self.events_store is None:
+                self.events_store = EventStore('motion_events.db')
+            self.events_store.on_event(ev)
 
     def worker(self):
-        active_count = 0
-        last_event = False
-        ev_start_ts = None
-        ev_start_time = None
-        ev_max_std = 0.0
-        ev_sig_sum = 0.0
-        ev_count = 0
-        min_samples = max(1, int(1.0 / max(self.interval.get(), 0.1)))
+        min_samples = max(1, int(1.0 / max(self.interval_s, 0.1)))
+        seg = EventSegmenter(min_samples=min_samples, source="gui")
+        pacer = AdaptiveInterval()
+        seg.subscribe(self.on_event)
+        hub = self.hub
+        if hub:
+            seg.subscribe(hub.publish_event)
+        last_event = None
+        m = self.metrics
+        clock = time.perf_counter_ns
         while self.running:
+            if m:
+                c0 = clock()
             try:
                 val = self.source.read()
             except Exception as e:
-                self.queue.put((datetime.utcnow().isoformat(), None, 0.0, 0.0, False, 0, str(e)))
-                time.sleep(self.interval.get())
+                if m:
+                    m.inc("source_errors")
+                self.channel.fail(str(e))
+                self.stop.wait(self.interval_s)
                 continue
+            if m:
+                c1 = clock()
+                m.record("read", c1 - c0)
             moving, avg, std, level = self.detector.update(val)
-            if moving:
-                active_count += 1
-            else:
-                active_count = 0
-            event = active_count >= min_samples
-            if not last_event and event:
-                ev_start_ts = datetime.utcnow().isoformat()
-                ev_start_time = time.time()
-                ev_max_std = std
-                ev_sig_sum = val
-                ev_count = 1
-            elif last_event and event:
-                if std > ev_max_std:
-                    ev_max_std = std
-                ev_sig_sum += val
-                ev_count += 1
-            elif last_event and not event:
-                end_ts = datetime.utcnow().isoformat()
-                duration = time.time() - (ev_start_time or time.time())
-                mean_sig = (ev_sig_sum / ev_count) if ev_count else 0.0
-                self.events_queue.put((ev_start_ts, end_ts, duration, ev_max_std, mean_sig))
-                if self.log_events.get():
-                    with open(self.events_csv, 'a', encoding='utf-8', newline='') as fe:
-                        w = csv.writer(fe)
-                        if fe.tell() == 0:
-                            w.writerow(["start", "end", "duration_s", "max_std", "mean_signal"])
-                        w.writerow([ev_start_ts, end_ts, round(duration, 3), round(ev_max_std, 3), round(mean_sig, 3)])
-                ev_start_ts = None
-                ev_start_time = None
-                ev_max_std = 0.0
-                ev_sig_sum = 0.0
-                ev_count = 0
+            occ = self.occupancy
+            crowd = occ.label if occ is not None and occ.push(val) is not None else CROWD_LEVELS[level]
+            if m:
+                c2 = clock()
+                m.record("update", c2 - c1)
+            # adaptive mode varies the spacing, so debounce on 1 s of motion instead of a sample count
+            adaptive = self.adaptive_on
+            seg.min_samples = 1 if adaptive else max(1, int(1.0 / max(self.interval_s, 0.1)))
+            seg.min_duration = 1.0 if adaptive else 0.0
+            ts = datetime.utcnow().isoformat()
+            t = time.monotonic()
+            event = seg.push(val, moving, std, t, ts)
+            if hub:
+                hub.publish_sample(seg.source, t, val, avg, std, event)
+                if event != last_event:
+                    hub.publish_state(seg.source, event, t, level=level, crowd=crowd, label=ts)
             last_event = event
-            self.queue.put((datetime.utcnow().isoformat(), val, avg, std, event, level, None))
+            self.channel.write(t, val, avg, std, event, (val, event, crowd))
+            if m:
+                m.record("segment", clock() - c2)
+                m.inc("samples")
             
             # Training Data Log
-            if self.is_recording and self.train_file:
-                try:
-                    self.train_writer.writerow([datetime.utcnow().isoformat(), val])
-                except:
-                    pass
-            
-            time.sleep(self.interval.get())
+            train_file = self.train_file
+            if self.is_recording and train_file:
+                train_file.write(ts, val)
+            self.snapshots.maybe_save()
+
+            base = self.interval_s
+            if adaptive:
+                pacer.base, pacer.fast, pacer.idle = base, base / 2, base * 4
+                self.stop.wait(pacer.next(self.detector))
+            else:
+                self.stop.wait(base)
+        self.snapshots.save()
+
+    def _log(self, line):
+        self.train_log.insert(tk.END, line + "\n")
+        # the Text widget keeps every line otherwise; drop the oldest past the cap
+        lines = int(self.train_log.index("end-1c").split(".")[0]) - 1
+        if lines > self.max_log_lines:
+            self.train_log.delete("1.0", f"{lines - self.max_log_lines + 1}.0")
+        self.train_log.see(tk.END)
 
     def update_ui(self):
-        changed = False
-        error = None
-        event = False
-        level = 0
-        while not self.queue.empty():
-            ts, val, avg, std, ev, lvl, err = self.queue.get()
-            if err:
-                error = err
-                continue
-            now = datetime.now()
-            self.xs.append(now)
-            self.sig.append(val)
-            self.avg.append(avg)
-            self.std.append(std)
-            self.thr.append(self.threshold.get())
-            if ev:
-                self.events.append(now)
-            if len(self.xs) > self.max_points:
-                self.xs.pop(0)
-                self.sig.pop(0)
-                self.avg.pop(0)
-                self.std.pop(0)
-                self.thr.pop(0)
-            if len(self.events) > self.max_points:
-                self.events = self.events[-self.max_points:]
-            changed = True
-            event = ev
-            level = lvl
-        if changed:
-            self.ax1.clear()
-            self.ax1.plot(self.xs, self.sig, label="Signal %", color="blue")
-            self.ax1.plot(self.xs, self.avg, label="Average", color="green")
-            self.ax1.set_ylim(0, 100)
-            self.ax1.legend(loc="upper right")
-            self.ax1.grid(True)
-            for e in self.events:
-                self.ax1.axvline(e, color="red", alpha=0.25)
-            self.ax2.clear()
-            self.ax2.plot(self.xs, self.std, label="Deviation", color="red")
-            self.ax2.plot(self.xs, self.thr, label="Threshold", color="orange", linestyle="--")
-            self.ax2.legend(loc="upper right")
-            self.ax2.grid(True)
-            for e in self.events:
-                self.ax2.axvline(e, color="red", alpha=0.25)
+        m = self.metrics
+        if m:
+            c0 = time.perf_counter_ns()
+        # one compacted batch per frame, however far the worker got ahead
+        rows, latest, error = self.channel.read(self.max_points)
+        if len(rows):
+            self.plot.extend(rows)
+            self.last_sig, event, crowd = latest
             self.state_str.set("MOTION" if event else "IDLE")
             
-            # Update Crowd Estimate
-            if level == 0:
-                self.crowd_str.set("Empty")
-            elif level == 1:
-                self.crowd_str.set("Low")
-            elif level == 2:
-                self.crowd_str.set("Medium")
-            elif level == 3:
-                self.crowd_str.set("High")
+            # Update Crowd Estimate (trained model if loaded, else the std ladder)
+            self.crowd_str.set(crowd)
                 
-            self.canvas.draw()
+            self.plot.threshold = self.threshold.get()
+            self.plot.draw()
             
             # Update Training Log (Sample)
-            if self.is_recording and len(self.sig) > 0:
-                self.train_log.insert(tk.END, f"Recorded: {self.sig[-1]}%\n")
-                self.train_log.see(tk.END)
+            if self.is_recording and self.last_sig is not None:
+                self._log(f"Recorded: {self.last_sig}%")
                 
-        while not self.events_queue.empty():
-            s_ts, e_ts, duration, max_std, mean_sig = self.events_queue.get()
-            self.tree.insert('', tk.END, values=(s_ts, e_ts, f"{duration:.2f}", f"{max_std:.2f}", f"{mean_sig:.2f}"))
+        while not self.train_messages.empty():
+            msg, status = self.train_messages.get()
+            self._log(msg)
+            self.train_status.set(status or msg)
+            if status:
+                self.model_str.set(status)
+            self.btn_fit.config(state=tk.NORMAL)
+        if self.events_queue:
+            while self.events_queue:
+                s_ts, e_ts, duration, max_std, mean_sig = self.events_queue.popleft()
+                self.tree.insert('', tk.END, values=(s_ts, e_ts, f"{duration:.2f}", f"{max_std:.2f}", f"{mean_sig:.2f}"))
+            rows = self.tree.get_children()
+            if len(rows) > self.max_events:
+                self.tree.delete(*rows[:len(rows) - self.max_events])
         if error:
             self.state_str.set(error)
+        if m:
+            m.record("ui", time.perf_counter_ns() - c0)
         self.root.after(100, self.update_ui)
 
 
 def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-gui")
+    p.add_argument("--serve", type=int, default=None, metavar="PORT", help="Push states/events over SSE and WebSocket on this port")
+    p.add_argument("--serve-host", default="127.0.0.1")
+    p.add_argument("--metrics-port", type=int, default=None, metavar="PORT", help="Serve Prometheus metrics at /metrics on this port")
+    p.add_argument("--profile", action="store_true", help="Print a per-stage latency summary on exit")
+    a = p.parse_args()
+    metrics = Metrics() if (a.metrics_port is not None or a.profile) else None
+    msrv = None
+    if a.metrics_port is not None:
+        msrv = MetricsServer(metrics, a.serve_host, a.metrics_port)
+        msrv.start()
+    hub = None
+    if a.serve is not None:
+        hub = PushHub()
+        hub.start(a.serve_host, a.serve)
     root = tk.Tk()
-    App(root)
+    app = App(root, hub, metrics)
     root.mainloop()
+    app.running = False
+    app.stop.set()
+    if app.worker_thread is not None:
+        app.worker_thread.join(app.interval_s + 5.0)
+    if hub:
+        hub.stop()
+    if msrv:
+        msrv.stop()
+    if a.profile:
+        print(metrics.summary())
+    for w in (app.events_writer, app.train_file, app.events_store):
+        if w:
+            w.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,196 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+
+class Histogram:
+    """Fixed-memory log-linear histogram of non-negative integers (HDR style).
+
+    Values below 2**sub_bits get one bucket each; above that every power
+    of two is split into 2**(sub_bits - 1) buckets and reported at the
+    bucket midpoint, so any recorded value comes back within 1 / 2**sub_bits
+    of itself (about 1.6% at the default). Values at or above 2**max_bits land in the last bucket.
+    Memory is fixed at construction; record() is a few integer ops.
+    """
+
+    def __init__(self, sub_bits: int = 6, max_bits: int = 40):
+        self.sub_bits = sub_bits
+        self.size = 1 << sub_bits
+        self.half = self.size >> 1
+        self.limit = (1 << max_bits) - 1
+        self.counts = [0] * (self.size + (max_bits - sub_bits) * self.half)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, v: int) -> int:
+        if v < self.size:
+            return v
+        e = v.bit_length() - self.sub_bits
+        return self.size + (e - 1) * self.half + (v >> e) - self.half
+
+    def _value(self, i: int) -> int:
+        # midpoint of bucket i
+        if i < self.size:
+            return i
+        e, m = divmod(i - self.size, self.half)
+        e += 1
+        lo = (m + self.half) << e
+        return lo + ((1 << e) >> 1)
+
+    def record(self, v: int) -> None:
+        v = int(v)
+        if v < 0:
+            v = 0
+        elif v > self.limit:
+            v = self.limit
+        self.counts[self._index(v)] += 1
+        if self.count == 0 or v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+        self.count += 1
+        self.total += v
+
+    def percentile(self, q: float) -> int:
+        if self.count == 0:
+            return 0
+        rank = max(1, int(q / 100.0 * self.count + 0.5))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(max(self._value(i), self.min), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        self.counts = [0] * len(self.counts)
+        self.count = self.total = self.min = self.max = 0
+
+
+def _ms(ns: float) -> str:
+    return f"{ns / 1e6:.3f}"
+
+
+class Metrics:
+    """Per-stage latency histograms (nanoseconds), counters and gauges.
+
+    Call sites hold an Optional[Metrics] and guard with `if metrics:`, so
+    with instrumentation off the only cost is that branch. Gauges are
+    callables read at export time (queue depths, writer backlogs).
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self._last = (self.started, 0)
+
+    def stage(self, name: str) -> Histogram:
+        h = self.stages.get(name)
+        if h is None:
+            h = self.stages[name] = Histogram()
+        return h
+
+    def record(self, name: str, ns: int) -> None:
+        h = self.stages.get(name)
+        if h is None:
+            h = self.stages[name] = Histogram()
+        h.record(ns)
+
+    def inc(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        self.gauges[name] = fn
+
+    def watch_writer(self, name: str, writer) -> None:
+        """Track a RowWriter's flush latency, backlog and drops."""
+        writer.flush_hist = self.stage(f"{name}_flush")
+        self.gauge(f"{name}_backlog", writer.backlog)
+        self.gauge(f"{name}_dropped", lambda: writer.dropped)
+
+    def rate(self, counter: str = "samples") -> float:
+        return self.counters.get(counter, 0) / max(1e-9, time.monotonic() - self.started)
+
+    def stats_line(self, counter: str = "samples") -> str:
+        # rate is over the interval since the previous stats_line() call
+        now = time.monotonic()
+        n = self.counters.get(counter, 0)
+        t, last = self._last
+        self._last = (now, n)
+        parts = [f"rate={(n - last) / max(1e-9, now - t):.2f}Hz"]
+        parts += [f"{k}={v}" for k, v in list(self.counters.items())]
+        parts += [f"{k}={fn():g}" for k, fn in list(self.gauges.items())]
+        parts += [f"{k}_p50={_ms(h.percentile(50))}ms {k}_p99={_ms(h.percentile(99))}ms" for k, h in list(self.stages.items()) if h.count]
+        return " ".join(parts)
+
+    def prometheus(self, prefix: str = "motion_tracker") -> str:
+        out = []
+        for k, v in list(self.counters.items()):
+            out.append(f"# TYPE {prefix}_{k}_total counter\n{prefix}_{k}_total {v}\n")
+        for k, fn in list(self.gauges.items()):
+            out.append(f"# TYPE {prefix}_{k} gauge\n{prefix}_{k} {fn():g}\n")
+        out.append(f"# TYPE {prefix}_uptime_seconds gauge\n{prefix}_uptime_seconds {time.monotonic() - self.started:.3f}\n")
+        name = f"{prefix}_stage_seconds"
+        out.append(f"# TYPE {name} summary\n")
+        for k, h in list(self.stages.items()):
+            for q in (0.5, 0.9, 0.99, 0.999):
+                out.append(f'{name}{{stage="{k}",quantile="{q}"}} {h.percentile(q * 100) / 1e9:.9f}\n')
+            out.append(f'{name}_sum{{stage="{k}"}} {h.total / 1e9:.9f}\n{name}_count{{stage="{k}"}} {h.count}\n')
+        return "".join(out)
+
+    def summary(self) -> str:
+        """Per-stage table for --profile."""
+        wall = time.monotonic() - self.started
+        lines = [f"profile over {wall:.1f}s: " + " ".join(f"{k}={v}" for k, v in list(self.counters.items())),
+                 f"{'stage':<16} {'count':>8} {'mean ms':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9} {'% wall':>7}"]
+        for k, h in sorted(self.stages.items(), key=lambda kv: -kv[1].total):
+            lines.append(f"{k:<16} {h.count:>8} {_ms(h.mean()):>9} {_ms(h.percentile(50)):>9} {_ms(h.percentile(90)):>9} "
+                         f"{_ms(h.percentile(99)):>9} {_ms(h.max):>9} {h.total / 1e9 / max(wall, 1e-9) * 100:>6.1f}%")
+        return "\n".join(lines)
+
+
+class MetricsServer:
+    """Serves Metrics.prometheus() at /metrics over HTTP on a daemon thread."""
+
+    def __init__(self, metrics: Metrics, host: str = "127.0.0.1", port: int = 9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,209 @@
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+
+class RingSeries:
+    """Preallocated ring of (t, signal, avg, std, event) samples."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.t = np.zeros(capacity)
+        self.sig = np.zeros(capacity)
+        self.avg = np.zeros(capacity)
+        self.std = np.zeros(capacity)
+        self.ev = np.zeros(capacity, dtype=bool)
+        self.n = 0
+        self.pos = 0
+
+    def append(self, t: float, sig: float, avg: float, std: float, ev: bool) -> None:
+        i = self.pos
+        self.t[i] = t
+        self.sig[i] = sig
+        self.avg[i] = avg
+        self.std[i] = std
+        self.ev[i] = ev
+        self.pos = (i + 1) % self.capacity
+        if self.n < self.capacity:
+            self.n += 1
+
+    def extend(self, t: np.ndarray, sig: np.ndarray, avg: np.ndarray, std: np.ndarray, ev: np.ndarray) -> None:
+        k = len(t)
+        if k > self.capacity:
+            # only the newest `capacity` rows survive; land them where append() would
+            skip = k - self.capacity
+            t, sig, avg, std, ev = (a[skip:] for a in (t, sig, avg, std, ev))
+            self.pos = (self.pos + skip) % self.capacity
+            k = self.capacity
+        idx = (self.pos + np.arange(k)) % self.capacity
+        self.t[idx] = t
+        self.sig[idx] = sig
+        self.avg[idx] = avg
+        self.std[idx] = std
+        self.ev[idx] = ev
+        self.pos = (self.pos + k) % self.capacity
+        self.n = min(self.n + k, self.capacity)
+
+    def ordered(self, a: np.ndarray) -> np.ndarray:
+        if self.n < self.capacity:
+            return a[:self.n]
+        return np.concatenate((a[self.pos:], a[:self.pos]))
+
+    def since(self, t0: float) -> int:
+        """Number of newest samples with t >= t0; timestamps must not go backwards."""
+        if self.n < self.capacity:
+            return self.n - int(np.searchsorted(self.t[:self.n], t0))
+        # [pos:] holds the older run, [:pos] the newer, each sorted
+        k = int(np.searchsorted(self.t[:self.pos], t0))
+        if k:
+            return self.pos - k
+        return self.capacity - int(np.searchsorted(self.t[self.pos:], t0))
+
+    def last(self, a: np.ndarray, k: int) -> np.ndarray:
+        """The newest k values of column `a`, oldest first."""
+        if k <= self.pos:
+            return a[self.pos - k:self.pos]
+        return np.concatenate((a[self.capacity - (k - self.pos):], a[:self.pos]))
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, max_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Keep each bucket's min and max so spikes survive decimation.
+    n = len(x)
+    buckets = max_points // 2
+    if n <= max_points or buckets < 1:
+        return x, y
+    size = n // buckets
+    m = buckets * size
+    yb = y[n - m:].reshape(buckets, size)
+    xb = x[n - m:].reshape(buckets, size)
+    lo = yb.argmin(axis=1)
+    hi = yb.argmax(axis=1)
+    first = np.minimum(lo, hi)
+    second = np.maximum(lo, hi)
+    rows = np.arange(buckets)
+    xs = np.empty(2 * buckets)
+    ys = np.empty(2 * buckets)
+    xs[0::2] = xb[rows, first]
+    xs[1::2] = xb[rows, second]
+    ys[0::2] = yb[rows, first]
+    ys[1::2] = yb[rows, second]
+    return xs, ys
+
+
+def event_spans(x: np.ndarray, ev: np.ndarray, min_gap: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+    # Runs of motion samples become (start, end) spans; spans separated by
+    # less than min_gap (about a pixel) are merged. A run lasts until the
+    # next sample (the newest one gets the previous step), so a one-sample
+    # run still has width.
+    edges = np.diff(np.concatenate(([False], ev, [False])).astype(np.int8))
+    starts = x[np.flatnonzero(edges == 1)]
+    last = np.flatnonzero(edges == -1) - 1
+    nxt = np.append(x[1:], x[-1] + (x[-1] - x[-2] if len(x) > 1 else 0.0)) if len(x) else x
+    ends = nxt[last]
+    if len(starts) > 1 and min_gap > 0:
+        gap = starts[1:] - ends[:-1] >= min_gap
+        starts = starts[np.concatenate(([True], gap))]
+        ends = ends[np.concatenate((gap, [True]))]
+    return starts, ends
+
+
+class LivePlot:
+    """Signal/deviation plot drawn with persistent, blitted artists.
+
+    The x axis is "seconds ago" with fixed limits, so the static parts of
+    the figure are rendered once and cached; each frame only restores that
+    background, updates the Line2D data, the threshold line and one span
+    collection per axis, and blits. Long histories are min/max decimated
+    to at most `max_draw` points per line. Only the samples inside `span_s`
+    are sliced out of the ring (a binary search on its time column), so
+    frame cost follows the visible samples, not `capacity`. A full redraw happens only when the deviation outgrows the y
+    range or the canvas is resized.
+    """
+
+    def __init__(self, ax_sig, ax_std, threshold: float, capacity: int = 200, span_s: float = 60.0, max_draw: int = 1000):
+        self.ax_sig = ax_sig
+        self.ax_std = ax_std
+        self.threshold = threshold
+        self.data = RingSeries(capacity)
+        self.span_s = span_s
+        self.max_draw = max_draw
+        self.canvas = ax_sig.figure.canvas
+        self._bg = None
+
+        (self.l_sig,) = ax_sig.plot([], [], label="Signal %", color="blue", alpha=0.5, animated=True)
+        (self.l_avg,) = ax_sig.plot([], [], label="Average", color="green", linewidth=2, animated=True)
+        (self.l_std,) = ax_std.plot([], [], label="Deviation", color="red", animated=True)
+        (self.l_thr,) = ax_std.plot([-span_s, 0], [threshold, threshold], label="Threshold", color="orange", linestyle="--", animated=True)
+        self.spans = [PolyCollection([], facecolor="red", alpha=0.15, animated=True) for _ in (ax_sig, ax_std)]
+        ax_sig.add_collection(self.spans[0])
+        ax_std.add_collection(self.spans[1])
+        self.state_text = ax_std.text(0.01, 0.9, "", transform=ax_std.transAxes, color="red", fontweight="bold", animated=True)
+
+        for ax in (ax_sig, ax_std):
+            ax.set_xlim(-span_s, 0)
+            ax.grid(True)
+            ax.legend(loc="upper right")
+        ax_sig.set_ylim(0, 100)
+        ax_sig.set_ylabel("Signal Strength (%)")
+        ax_std.set_ylim(0, threshold * 3)
+        ax_std.set_ylabel("Standard Deviation")
+        ax_std.set_xlabel("Seconds ago")
+        self._cid = self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    @property
+    def artists(self):
+        return [self.l_sig, self.l_avg, self.l_std, self.l_thr, self.spans[0], self.spans[1], self.state_text]
+
+    def append(self, sig: float, avg: float, std: float, event: bool, t: Optional[float] = None) -> None:
+        self.data.append(time.monotonic() if t is None else t, sig, avg, std, event)
+
+    def extend(self, rows: np.ndarray) -> None:
+        """Append a batch of channel.FRAME rows."""
+        self.data.extend(rows["t"], rows["sig"], rows["avg"], rows["std"], rows["ev"])
+
+    def update(self, now: Optional[float] = None) -> list:
+        d = self.data
+        if not d.n:
+            return self.artists
+        now = d.t[d.pos - 1] if now is None else now
+        k = d.since(now - self.span_s)
+        x = d.last(d.t, k) - now
+        std = d.last(d.std, k)
+        ev = d.last(d.ev, k)
+        self.l_sig.set_data(*minmax_decimate(x, d.last(d.sig, k), self.max_draw))
+        self.l_avg.set_data(*minmax_decimate(x, d.last(d.avg, k), self.max_draw))
+        self.l_std.set_data(*minmax_decimate(x, std, self.max_draw))
+        self.l_thr.set_ydata([self.threshold, self.threshold])
+        starts, ends = event_spans(x, ev, self.span_s / self.max_draw)
+        for coll, ax in zip(self.spans, (self.ax_sig, self.ax_std)):
+            y0, y1 = ax.get_ylim()
+            verts = np.empty((len(starts), 4, 2))
+            verts[:, 0, 0] = verts[:, 3, 0] = starts
+            verts[:, 1, 0] = verts[:, 2, 0] = ends
+            verts[:, :2, 1] = y0
+            verts[:, 2:, 1] = y1
+            coll.set_verts(verts)
+        self.state_text.set_text("MOTION" if len(ev) and ev[-1] else "")
+        top = max(float(std.max()) if len(std) else 0.0, self.threshold)
+        if top > self.ax_std.get_ylim()[1]:
+            self.ax_std.set_ylim(0, top * 1.5)
+            self._bg = None
+        return self.artists
+
+    def _on_draw(self, event) -> None:
+        self._bg = self.canvas.copy_from_bbox(self.ax_sig.figure.bbox)
+        for a in self.artists:
+            a.axes.draw_artist(a)
+
+    def draw(self) -> None:
+        """Update and blit; falls back to a full draw when the background is stale."""
+        self.update()
+        if self._bg is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._bg)
+            for a in self.artists:
+                a.axes.draw_artist(a)
+            self.canvas.blit(self.ax_sig.figure.bbox)
@@ -0,0 +1,317 @@
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import struct
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .events import MotionEvent
+
+STATE = "state"
+EVENT = "event"
+SAMPLE = "sample"
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# clients only send control frames (ping/pong/close); anything bigger is refused with 1009
+WS_MAX_FRAME = 4096
+
+
+class _Client:
+    def __init__(self, sample_hz: float, maxsize: int):
+        self.queue = collections.deque(maxlen=maxsize)
+        self.wake = asyncio.Event()
+        self.sample_period = 1.0 / sample_hz if sample_hz > 0 else 0.0
+        self.sample_seq: Dict[object, int] = {}
+        self.dropped = 0
+
+    def put(self, msg: dict) -> None:
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(msg)
+        self.wake.set()
+
+
+class PushHub:
+    """Pushes detector output to local HTTP clients as it happens.
+
+    publish_*() may be called from any thread; messages are handed to the
+    hub's event loop with call_soon_threadsafe, which wakes it immediately,
+    so there is no polling interval between detection and delivery. State
+    changes and events go to every client at once and into a bounded
+    history ring. Samples are high-rate, so only the latest per source is
+    kept and each client gets them at most `sample_hz` times per second
+    (?hz= on the URL overrides it, 0 disables them).
+
+    Endpoints: GET /events (Server-Sent Events; honours Last-Event-ID or
+    ?since= against the history), GET /ws (WebSocket, same JSON messages),
+    GET /history?n=, GET /state.
+    """
+
+    def __init__(self, history: int = 1000, sample_hz: float = 5.0, client_queue: int = 1000):
+        self.history = collections.deque(maxlen=history)
+        self.sample_hz = sample_hz
+        self.client_queue = client_queue
+        self.states: Dict[object, dict] = {}
+        self.samples: Dict[object, dict] = {}
+        self.clients = set()
+        self.published = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._seq = 0
+        self._server = None
+        self._tasks = set()
+        self._thread = None
+        self._ready = threading.Event()
+
+    # -- publishing (any thread) --
+
+    def publish(self, kind: str, data: dict) -> None:
+        msg = dict(data, kind=kind, t_pub=time.monotonic())
+        loop = self.loop
+        if loop is None:
+            self._dispatch(msg)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, msg)
+
+    def publish_state(self, source, moving: bool, t: float, **extra) -> None:
+        self.publish(STATE, dict(extra, source=source, moving=moving, t=t))
+
+    def publish_event(self, ev: MotionEvent) -> None:
+        self.publish(EVENT, {"type": ev.kind, "source": ev.source, "start": ev.start, "t": ev.t, "duration": ev.duration,
+                             "max_std": ev.max_std, "mean_signal": ev.mean_signal, "samples": ev.samples,
+                             "start_label": ev.start_label, "label": ev.label})
+
+    def publish_sample(self, source, t: float, signal: float, avg: float, std: float, moving: bool) -> None:
+        self.publish(SAMPLE, {"source": source, "t": t, "signal": signal, "avg": avg, "std": std, "moving": moving})
+
+    # -- event loop side --
+
+    def _dispatch(self, msg: dict) -> None:
+        self._seq += 1
+        msg["id"] = self._seq
+        self.published += 1
+        if msg["kind"] == SAMPLE:
+            self.samples[msg["source"]] = msg
+            for c in self.clients:
+                if c.sample_period:
+                    c.wake.set()
+            return
+        if msg["kind"] == STATE:
+            self.states[msg["source"]] = msg
+        self.history.append(msg)
+        for c in self.clients:
+            c.put(msg)
+
+    def start(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """Serve from a daemon thread with its own event loop."""
+        self._thread = threading.Thread(target=self._serve_forever, args=(host, port), daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _serve_forever(self, host: str, port: int) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self.serve(host, port))
+        self._ready.set()
+        loop.run_forever()
+        loop.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        """Start serving on the running loop (for callers that own one)."""
+        self.loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, host, port)
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self._server.close()
+        for t in list(self._tasks):
+            t.cancel()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=1.0)
+
+    def stop(self) -> None:
+        """Stop a hub started with start()."""
+        loop = self.loop
+        if loop is None or self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result(2.0)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(2.0)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            await self._route(reader, writer)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._tasks.discard(task)
+            writer.close()
+
+    async def _route(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split(" ")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        url = urlsplit(parts[1] if len(parts) > 1 else "/")
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        # parse every numeric parameter before any stream headers go out
+        since = headers.get("last-event-id", q.get("since")) if url.path == "/events" else q.get("since")
+        try:
+            n = int(q.get("n", len(self.history)))
+            hz = float(q.get("hz", self.sample_hz))
+            since = int(since) if since is not None else None
+        except ValueError as e:
+            await self._respond(writer, 400, {"error": f"bad query parameter: {e}"})
+            return
+        if parts[0] != "GET":
+            await self._respond(writer, 405, {"error": "method not allowed"})
+        elif url.path == "/events":
+            await self._sse(writer, hz, since)
+        elif url.path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+            if headers.get("sec-websocket-key"):
+                await self._ws(reader, writer, headers, hz, since)
+            else:
+                await self._respond(writer, 400, {"error": "missing Sec-WebSocket-Key"})
+        elif url.path == "/history":
+            await self._respond(writer, 200, list(self.history)[-n:] if n > 0 else [])
+        elif url.path == "/state":
+            await self._respond(writer, 200, list(self.states.values()))
+        else:
+            await self._respond(writer, 404, {"error": "not found"})
+
+    async def _respond(self, writer, status: int, body) -> None:
+        data = json.dumps(body, default=str).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    def _client(self, hz: float, since: Optional[int]) -> _Client:
+        c = _Client(hz, self.client_queue)
+        if since is not None:
+            for msg in self.history:
+                if msg["id"] > since:
+                    c.queue.append(msg)
+        self.clients.add(c)
+        return c
+
+    async def _pump(self, c: _Client, send, closed: Optional[asyncio.Future] = None) -> None:
+        # Immediate messages go out as soon as they are queued; samples are
+        # flushed on the client's own period, latest value per source only.
+        next_sample = time.monotonic()
+        while closed is None or not closed.done():
+            timeout = None
+            if c.sample_period and self.samples:
+                timeout = max(0.0, next_sample - time.monotonic())
+            if not c.queue:
+                c.wake.clear()
+                try:
+                    await asyncio.wait_for(c.wake.wait(), timeout if timeout is not None else 15.0)
+                except asyncio.TimeoutError:
+                    if timeout is None:
+                        await send(None)
+            while c.queue:
+                await send(c.queue.popleft())
+            if c.sample_period and time.monotonic() >= next_sample:
+                for src, msg in list(self.samples.items()):
+                    if c.sample_seq.get(src) != msg["id"]:
+                        c.sample_seq[src] = msg["id"]
+                        await send(msg)
+                next_sample = time.monotonic() + c.sample_period
+
+    async def _sse(self, writer, hz: float, since: Optional[int]) -> None:
+        c = self._client(hz, since)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+
+        async def send(msg):
+            if msg is None:
+                writer.write(b": keep-alive\n\n")
+            else:
+                writer.write(f"id: {msg['id']}\nevent: {msg['kind']}\ndata: {json.dumps(msg, default=str)}\n\n".encode())
+            await writer.drain()
+
+        try:
+            await self._pump(c, send)
+        finally:
+            self.clients.discard(c)
+
+    async def _ws(self, reader, writer, headers: dict, hz: float, since: Optional[int]) -> None:
+        key = headers.get("sec-websocket-key", "").encode()
+        accept = base64.b64encode(hashlib.sha1(key + _WS_GUID).digest()).decode()
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode())
+        c = self._client(hz, since)
+        closed = asyncio.get_running_loop().create_future()
+
+        async def send(msg):
+            if msg is None:
+                writer.write(_ws_frame(b"", 0x9))
+            else:
+                writer.write(_ws_frame(json.dumps(msg, default=str).encode(), 0x1))
+            await writer.drain()
+
+        async def read_loop():
+            try:
+                while True:
+                    opcode, payload = await _ws_read(reader)
+                    if opcode == 0x8:
+                        writer.write(_ws_frame(payload[:2], 0x8))
+                        break
+                    if opcode == 0x9:
+                        writer.write(_ws_frame(payload, 0xA))
+            except ValueError:
+                # oversized frame: 1009 "message too big", then drop the connection
+                writer.write(_ws_frame(struct.pack("!H", 1009), 0x8))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            if not closed.done():
+                closed.set_result(True)
+            c.wake.set()
+
+        rt = asyncio.ensure_future(read_loop())
+        try:
+            await self._pump(c, send, closed)
+        finally:
+            rt.cancel()
+            self.clients.discard(c)
+
+
+def _ws_frame(payload: bytes, opcode: int) -> bytes:
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+async def _ws_read(reader: asyncio.StreamReader, limit: int = WS_MAX_FRAME):
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        (n,) = struct.unpack("!H", await reader.readexactly(2))
+    elif n == 127:
+        (n,) = struct.unpack("!Q", await reader.readexactly(8))
+    if n > limit:
+        raise ValueError(f"frame of {n} bytes")
+    mask = await reader.readexactly(4) if b1 & 0x80 else None
+    payload = await reader.readexactly(n)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return b0 & 0x0F, payload
@@ -0,0 +1,306 @@
+import argparse
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+MAGIC = b"MTREC001"
+HEADER = struct.Struct("<8sIIqq")
+HEADER_SIZE = 64
+
+RECORD = np.dtype([
+    ("ts", "<i8"),
+    ("signal", "<f4"),
+    ("avg", "<f4"),
+    ("std", "<f4"),
+    ("flags", "u1"),
+    ("level", "u1"),
+    ("pad", "<u2"),
+])
+INDEX = np.dtype([("record", "<i8"), ("ts", "<i8")])
+
+FLAG_MOTION = 1
+FLAG_MOVING = 2
+FLAG_ERROR = 4
+
+_STOP = object()
+_FLUSH = object()
+
+
+class RecordWriter:
+    """Append-only writer for the fixed-width binary log.
+
+    The file is a 64-byte header (magic, header and record size, and the
+    monotonic/wall clock pair captured when the file was created) followed
+    by contiguous RECORD rows. Like RowWriter, append() never blocks: rows
+    go onto a bounded queue (dropped and counted when it is full) and a
+    writer thread writes and flushes them once `flush_rows` have piled up
+    or `flush_ms` has passed, and on flush()/close(). Every
+    `chunk_records` rows it adds a (first record, first ts) entry to the
+    sparse `<path>.idx` index. A torn trailing record after a crash is
+    ignored by the reader.
+
+    Timestamps passed in are this process's time.monotonic_ns(). When an
+    existing file is reopened (possibly after a reboot, when the monotonic
+    clock has restarted) they are shifted onto the file's timeline through
+    the wall clock, never landing before the last stored record, and any
+    record older than its predecessor is refused with ValueError so `ts`
+    stays sorted.
+    """
+
+    def __init__(self, path: str, chunk_records: int = 4096, t0_mono_ns: Optional[int] = None, t0_wall_ns: Optional[int] = None,
+                 flush_rows: int = 256, flush_ms: float = 1000.0, max_queue: int = 10000):
+        self.path = path
+        self.chunk_records = chunk_records
+        self.flush_rows = max(1, min(flush_rows, chunk_records))
+        self.flush_s = flush_ms / 1000.0
+        self._chunk = np.zeros(self.flush_rows, dtype=RECORD)
+        self._n = 0
+        self.dropped = 0
+        self.errors = 0
+        # optional metrics.Histogram of flush latency (ns), set by Metrics.watch_writer
+        self.flush_hist = None
+        new = not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE
+        self._f = open(path, "r+b" if not new else "wb")
+        if new:
+            self.t0_mono_ns = time.monotonic_ns() if t0_mono_ns is None else t0_mono_ns
+            self.t0_wall_ns = time.time_ns() if t0_wall_ns is None else t0_wall_ns
+            self._f.write(HEADER.pack(MAGIC, HEADER_SIZE, RECORD.itemsize, self.t0_mono_ns, self.t0_wall_ns).ljust(HEADER_SIZE, b"\0"))
+            self.count = 0
+            self.offset_ns = 0
+            self.last_ts = None
+        else:
+            _, _, _, self.t0_mono_ns, self.t0_wall_ns = _read_header(self._f)
+            self.count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+            self.last_ts = None
+            if self.count:
+                self._f.seek(HEADER_SIZE + (self.count - 1) * RECORD.itemsize)
+                self.last_ts = int(np.frombuffer(self._f.read(RECORD.itemsize), dtype=RECORD)["ts"][0])
+            mono = time.monotonic_ns()
+            # file timeline = t0_mono + (wall - t0_wall); a wall clock stepped back cannot move us before the last record
+            self.offset_ns = self.t0_mono_ns + time.time_ns() - self.t0_wall_ns - mono
+            if self.last_ts is not None:
+                self.offset_ns = max(self.offset_ns, self.last_ts - mono)
+        self._f.seek(HEADER_SIZE + self.count * RECORD.itemsize)
+        self._f.truncate()
+        # a new file must not inherit a stale index left by an earlier one of the
+        # same name; on reopen drop entries past the records that made it to disk
+        idx_path = path + ".idx"
+        keep = np.zeros(0, dtype=INDEX)
+        if not new and os.path.exists(idx_path):
+            keep = np.fromfile(idx_path, dtype=INDEX)
+            keep = keep[keep["record"] < self.count]
+        self._idx = open(idx_path, "wb")
+        keep.tofile(self._idx)
+        self._idx.flush()
+        self._next_index = self.count
+        self._q = queue.Queue(maxsize=max_queue)
+        self._t = threading.Thread(target=self._run, daemon=True)
+        self._t.start()
+
+    def append(self, ts_ns: int, signal: float, avg: float, std: float, flags: int = 0, level: int = 0) -> bool:
+        ts_ns += self.offset_ns
+        if self.last_ts is not None and ts_ns < self.last_ts:
+            raise ValueError(f"{self.path}: timestamp {ts_ns} is before the last record ({self.last_ts})")
+        self.last_ts = ts_ns
+        try:
+            self._q.put_nowait((ts_ns, signal, avg, std, flags, level, 0))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def write_array(self, records: np.ndarray) -> None:
+        if not len(records):
+            return
+        records = np.array(records, dtype=RECORD)
+        records["ts"] += self.offset_ns
+        ts = records["ts"]
+        if (self.last_ts is not None and ts[0] < self.last_ts) or (np.diff(ts) < 0).any():
+            raise ValueError(f"{self.path}: records are not in time order after the last stored one")
+        self.last_ts = int(ts[-1])
+        # bulk imports wait for room rather than drop rows
+        self._q.put(records)
+
+    def backlog(self) -> int:
+        return self._q.qsize()
+
+    def stats_line(self) -> str:
+        return f"records={self.count} dropped={self.dropped} errors={self.errors}"
+
+    def flush(self) -> None:
+        """Block until everything appended so far is written and flushed."""
+        if self._t.is_alive():
+            self._q.put(_FLUSH)
+            self._q.join()
+
+    def close(self) -> None:
+        if self._t.is_alive():
+            self._q.put(_STOP)
+            self._t.join()
+        self._f.close()
+        self._idx.close()
+
+    def _run(self) -> None:
+        last_flush = time.monotonic()
+        stop = False
+        while not stop:
+            timeout = max(0.0, last_flush + self.flush_s - time.monotonic())
+            try:
+                item = self._q.get(timeout=timeout if self._n else None)
+            except queue.Empty:
+                item = None
+            force = item is _FLUSH
+            if item is _STOP:
+                stop = True
+            elif isinstance(item, np.ndarray):
+                self._flush()
+                for i in range(0, len(item), self.chunk_records):
+                    self._write(item[i:i + self.chunk_records])
+            elif item is not None and not force:
+                self._chunk[self._n] = item
+                self._n += 1
+            if stop or force or self._n >= self.flush_rows or (self._n and time.monotonic() - last_flush >= self.flush_s):
+                self._flush()
+                last_flush = time.monotonic()
+            if item is not None:
+                self._q.task_done()
+
+    def _flush(self) -> None:
+        if self._n:
+            self._write(self._chunk[:self._n])
+            self._n = 0
+
+    def _write(self, rows: np.ndarray) -> None:
+        t0 = time.perf_counter_ns()
+        try:
+            if self.count >= self._next_index:
+                np.array([(self.count, rows["ts"][0])], dtype=INDEX).tofile(self._idx)
+                self._idx.flush()
+                self._next_index = self.count + self.chunk_records
+            self._f.write(rows.tobytes())
+            self._f.flush()
+        except Exception:
+            self.errors += 1
+            return
+        self.count += len(rows)
+        if self.flush_hist is not None:
+            self.flush_hist.record(time.perf_counter_ns() - t0)
+
+
+def _read_header(f):
+    f.seek(0)
+    magic, header_size, record_size, t0_mono_ns, t0_wall_ns = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError("not a motion_tracker recording")
+    if header_size != HEADER_SIZE or record_size != RECORD.itemsize:
+        raise ValueError("unsupported recording layout")
+    return magic, header_size, record_size, t0_mono_ns, t0_wall_ns
+
+
+class Recording:
+    """Memory-mapped reader; columns are zero-copy views into the file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            _, _, _, self.t0_mono_ns, self.t0_wall_ns = _read_header(f)
+        n = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+        if n:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(n,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+        idx_path = path + ".idx"
+        self.index = np.fromfile(idx_path, dtype=INDEX) if os.path.exists(idx_path) else np.zeros(0, dtype=INDEX)
+        self.index = self.index[self.index["record"] < n]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getattr__(self, name):
+        if name in RECORD.names:
+            return self.records[name]
+        raise AttributeError(name)
+
+    def _search(self, ts_ns: int) -> int:
+        lo, hi = 0, len(self.records)
+        if len(self.index):
+            k = int(np.searchsorted(self.index["ts"], ts_ns, side="left"))
+            if k > 0:
+                lo = int(self.index["record"][k - 1])
+            if k < len(self.index):
+                hi = int(self.index["record"][k])
+        return lo + int(np.searchsorted(self.records["ts"][lo:hi], ts_ns, side="left"))
+
+    def slice_time(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> np.ndarray:
+        lo = 0 if start_ns is None else self._search(start_ns)
+        hi = len(self.records) if end_ns is None else self._search(end_ns)
+        return self.records[lo:hi]
+
+    def wall_time(self, ts_ns) -> np.ndarray:
+        return (np.asarray(ts_ns) - self.t0_mono_ns + self.t0_wall_ns).astype("datetime64[ns]")
+
+
+def csv_to_recording(csv_path: str, out_path: str) -> int:
+    if os.path.exists(out_path):
+        # the CSV's own clock has no place on another recording's timeline
+        raise FileExistsError(f"{out_path} already exists")
+    cols = np.loadtxt(csv_path, delimiter=",", skiprows=1, dtype=str, ndmin=2)
+    wall = cols[:, 0].astype("datetime64[ns]").astype(np.int64)
+    rec = np.zeros(len(cols), dtype=RECORD)
+    if len(cols):
+        rec["ts"] = wall - wall[0]
+    err = cols[:, 1] == ""
+    rec["signal"] = np.where(err, "nan", cols[:, 1]).astype(np.float32)
+    if cols.shape[1] >= 5:
+        rec["avg"] = np.where(cols[:, 2] == "", "0", cols[:, 2]).astype(np.float32)
+        rec["std"] = np.where(cols[:, 3] == "", "0", cols[:, 3]).astype(np.float32)
+        rec["flags"] = np.where(cols[:, 4] == "1", FLAG_MOTION, 0)
+    rec["flags"] |= np.where(err, FLAG_ERROR, 0).astype(np.uint8)
+    w = RecordWriter(out_path, t0_mono_ns=0, t0_wall_ns=int(wall[0]) if len(wall) else time.time_ns())
+    w.write_array(rec)
+    w.close()
+    return len(rec)
+
+
+def recording_to_csv(path: str, csv_path: str) -> int:
+    r = Recording(path)
+    ts = np.datetime_as_string(r.wall_time(r.ts).astype("datetime64[us]"))
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("timestamp,signal,avg,std,motion\n")
+        for t, sig, avg, std, flags in zip(ts.tolist(), r.signal.tolist(), r.avg.tolist(), r.std.tolist(), r.flags.tolist()):
+            if flags & FLAG_ERROR:
+                f.write(f"{t},,,,0\n")
+            else:
+                f.write(f"{t},{sig:g},{avg:.4f},{std:.4f},{1 if flags & FLAG_MOTION else 0}\n")
+    return len(r)
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-recording")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("from-csv")
+    c.add_argument("csv")
+    c.add_argument("out")
+    c = sub.add_parser("to-csv")
+    c.add_argument("path")
+    c.add_argument("out")
+    c = sub.add_parser("info")
+    c.add_argument("path")
+    a = p.parse_args()
+    if a.cmd == "from-csv":
+        print(f"wrote {csv_to_recording(a.csv, a.out)} records")
+    elif a.cmd == "to-csv":
+        print(f"wrote {recording_to_csv(a.path, a.out)} rows")
+    else:
+        r = Recording(a.path)
+        span = (int(r.ts[-1]) - int(r.ts[0])) / 1e9 if len(r) else 0.0
+        print(f"records={len(r)} index_entries={len(r.index)} span_s={span:.3f} start={r.wall_time(r.ts[0]) if len(r) else '-'}")
+
+
+if __name__ == "__main__":
+    main()
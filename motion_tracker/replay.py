@@ -0,0 +1,82 @@
+import argparse
+import time
+from typing import Tuple
+
+import numpy as np
+
+from .baseline import DriftBaseline
+from .detector import MotionDetector
+from .events import END, EventSegmenter
+from .recording import FLAG_ERROR, Recording
+
+
+def load_signal_csv(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Works for both the CLI --csv log (timestamp,signal,avg,std,motion) and
+    # the GUI training files (timestamp,signal). Source-error rows have an
+    # empty signal and are dropped, as the live loop never fed them in.
+    cols = np.loadtxt(path, delimiter=",", skiprows=1, usecols=(0, 1), dtype=str, ndmin=2)
+    ok = cols[:, 1] != ""
+    return cols[ok, 0], cols[ok, 1].astype(np.float64)
+
+
+def load_signal(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    if not path.endswith(".mtr"):
+        return load_signal_csv(path)
+    rec = Recording(path)
+    ok = (rec.flags & FLAG_ERROR) == 0
+    ts = np.datetime_as_string(rec.wall_time(rec.ts[ok]).astype("datetime64[us]"))
+    return ts, rec.signal[ok].astype(np.float64)
+
+
+def debounce(moving: np.ndarray, min_samples: int) -> np.ndarray:
+    c = np.cumsum(moving)
+    run = c - np.maximum.accumulate(np.where(moving, 0, c))
+    return run >= min_samples
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-replay")
+    p.add_argument("path")
+    p.add_argument("--interval", type=float, default=0.5)
+    p.add_argument("--window", type=int, default=30)
+    p.add_argument("--threshold", type=float, default=8.0)
+    p.add_argument("--min-duration", type=float, default=1.0)
+    p.add_argument("--drift-baseline", action="store_true", help="Use the constant-memory drift/level-shift tracking baseline")
+    p.add_argument("--baseline-memory", type=float, default=7200.0)
+    p.add_argument("--out", default=None, help="Write scored samples as CSV")
+    p.add_argument("--events-out", default=None, help="Write motion events as CSV")
+    a = p.parse_args()
+
+    ts, sig = load_signal(a.path)
+    try:
+        t = ts.astype("datetime64[us]").astype(np.int64) / 1e6
+    except ValueError:
+        t = np.arange(len(sig)) * a.interval
+    det = MotionDetector(window_size=a.window, threshold=a.threshold, baseline=DriftBaseline(memory=a.baseline_memory) if a.drift_baseline else None)
+    seg = EventSegmenter(min_samples=max(1, int(a.min_duration / a.interval)))
+    ended = []
+    seg.subscribe(lambda ev: ev.kind == END and ended.append(ev))
+    t0 = time.perf_counter()
+    moving, avg, std, level = det.process_batch(sig)
+    event = seg.push_batch(t, sig, moving, std, labels=ts)
+    elapsed = time.perf_counter() - t0
+
+    n = len(sig)
+    starts = len(ended) + (1 if seg.in_event else 0)
+    rate = n / elapsed if elapsed > 0 else float("inf")
+    print(f"samples={n} motion_samples={int(event.sum())} events={starts} elapsed={elapsed:.3f}s rate={rate:,.0f}/s")
+
+    if a.out:
+        with open(a.out, "w", encoding="utf-8") as f:
+            f.write("timestamp,signal,avg,std,motion,level\n")
+            for row in zip(ts.tolist(), sig.tolist(), avg.tolist(), std.tolist(), event.tolist(), level.tolist()):
+                f.write(f"{row[0]},{row[1]:g},{row[2]:.4f},{row[3]:.4f},{1 if row[4] else 0},{row[5]}\n")
+    if a.events_out:
+        with open(a.events_out, "w", encoding="utf-8") as f:
+            f.write("start,end,duration_s,max_std,mean_signal\n")
+            for ev in ended:
+                f.write(f"{ev.start_label},{ev.label},{round(ev.duration, 3)},{round(ev.max_std, 3)},{round(ev.mean_signal, 3)}\n")
+
+
+if __name__ == "__main__":
+    main()
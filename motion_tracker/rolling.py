@@ -0,0 +1,115 @@
+from bisect import bisect_left, insort
+from collections import deque
+import math
+from typing import List
+
+
+class RollingMeanStd:
+    """Fixed-size window mean/std kept as running sum and sum of squares."""
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self.sum = 0.0
+        self.sq = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, v: float) -> None:
+        old = self.values[0] if len(self.values) == self.values.maxlen else 0.0
+        self.sum += v - old
+        self.sq += v * v - old * old
+        self.values.append(v)
+
+    def reset(self, values, total: float, sq: float) -> None:
+        self.values.clear()
+        self.values.extend(values)
+        self.sum = total
+        self.sq = sq
+
+    def resize(self, size: int) -> None:
+        """Change the window length, keeping the newest samples."""
+        self.values = deque(self.values, maxlen=size)
+        self.sum = math.fsum(self.values)
+        self.sq = math.fsum(v * v for v in self.values)
+
+    def mean(self) -> float:
+        return self.sum / len(self.values)
+
+    def std(self) -> float:
+        n = len(self.values)
+        avg = self.sum / n
+        var = self.sq / n - avg * avg
+        return math.sqrt(var) if var > 0.0 else 0.0
+
+
+class RollingMedian:
+    """Fixed-size window median and MAD over a bisect-maintained sorted list.
+
+    median() is an index lookup and mad() O(log n), but push() is not
+    constant-cost: the bisect is O(log n) and the list insert/delete is an
+    O(n) memmove. That term is small at the default 120 samples and about
+    doubles the per-sample cost by 20000 (benchmarks/bench_detector.py).
+    """
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self.sorted: List[float] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, v: float) -> None:
+        s = self.sorted
+        if len(self.values) == self.values.maxlen:
+            del s[bisect_left(s, self.values[0])]
+        self.values.append(v)
+        insort(s, v)
+
+    def reset(self, values) -> None:
+        self.values.clear()
+        self.values.extend(values)
+        self.sorted = sorted(self.values)
+
+    def resize(self, size: int) -> None:
+        """Change the window length, keeping the newest samples."""
+        self.values = deque(self.values, maxlen=size)
+        self.sorted = sorted(self.values)
+
+    def median(self) -> float:
+        s = self.sorted
+        n = len(s)
+        i = n // 2
+        if n % 2:
+            return s[i]
+        return (s[i - 1] + s[i]) / 2
+
+    def mad(self, med: float) -> float:
+        n = len(self.sorted)
+        p = bisect_left(self.sorted, med)
+        i = n // 2
+        if n % 2:
+            return self._kth(i, med, p)
+        return (self._kth(i - 1, med, p) + self._kth(i, med, p)) / 2
+
+    def _kth(self, k: int, med: float, p: int) -> float:
+        # left[j] = med - s[p-1-j] and right[j] = s[p+j] - med are both
+        # ascending; pick the k-th smallest of their union by bisecting on
+        # how many come from the left run.
+        s = self.sorted
+        need = k + 1
+        nl = p
+        nr = len(s) - p
+        lo = max(0, need - nr)
+        hi = min(need, nl)
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = need - i
+            if med - s[p - 1 - i] < s[p + j - 1] - med:
+                lo = i + 1
+            else:
+                hi = i
+        j = need - lo
+        left = med - s[p - lo] if lo > 0 else -math.inf
+        right = s[p + j - 1] - med if j > 0 else -math.inf
+        return left if left > right else right
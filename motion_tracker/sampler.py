@@ -0,0 +1,187 @@
+import argparse
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from .datasource import CsvReplaySource, default_source
+from .detector import MotionDetector
+from .events import END, EventSegmenter
+
+
+class StreamStats:
+    def __init__(self):
+        self.samples = 0
+        self.errors = 0
+        self.missed = 0
+        self.jitter_sum = 0.0
+        self.jitter_max = 0.0
+
+    def jitter_mean(self) -> float:
+        return self.jitter_sum / self.samples if self.samples else 0.0
+
+
+class Stream:
+    def __init__(self, name: str, source, interval: float, detector: MotionDetector, segmenter: EventSegmenter):
+        self.name = name
+        self.source = source
+        self.interval = interval
+        self.detector = detector
+        self.segmenter = segmenter
+        self.stats = StreamStats()
+        self.done = False
+
+
+class Sampler:
+    """Drives many sources from one scheduler thread on absolute deadlines.
+
+    Each stream's n-th sample is due at start + n * interval, so read and
+    callback time never accumulate into drift; a stream that falls more
+    than one interval behind skips the lost slots and counts them as
+    missed. With workers > 0 reads run on a small thread pool, which suits
+    blocking sources such as netsh; with workers=0 they run inline.
+    """
+
+    def __init__(self, on_sample: Optional[Callable] = None, on_error: Optional[Callable] = None, workers: int = 0, on_event: Optional[Callable] = None, min_duration: float = 1.0):
+        self.on_sample = on_sample
+        self.on_error = on_error
+        self.on_event = on_event
+        self.min_duration = min_duration
+        self.streams: List[Stream] = []
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        self._running = False
+        self._thread = None
+
+    def add(self, name: str, source, interval: float, detector: Optional[MotionDetector] = None) -> Stream:
+        seg = EventSegmenter(min_samples=max(1, int(self.min_duration / interval)), source=name)
+        if self.on_event:
+            seg.subscribe(self.on_event)
+        st = Stream(name, source, interval, detector or MotionDetector(), seg)
+        self.streams.append(st)
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic(), next(self._seq), st))
+            self._cond.notify()
+        return st
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    def run(self, duration: Optional[float] = None) -> None:
+        self._running = True
+        end = time.monotonic() + duration if duration is not None else None
+        while True:
+            with self._cond:
+                while self._running:
+                    now = time.monotonic()
+                    if end is not None and now >= end:
+                        self._running = False
+                        break
+                    if self._heap and self._heap[0][0] <= now:
+                        break
+                    wait = self._heap[0][0] - now if self._heap else None
+                    if end is not None:
+                        wait = end - now if wait is None else min(wait, end - now)
+                    self._cond.wait(wait)
+                if not self._running:
+                    return
+                deadline, _, st = heapq.heappop(self._heap)
+            if self._pool is not None:
+                self._pool.submit(self._sample, st, deadline)
+            else:
+                self._sample(st, deadline)
+
+    def _sample(self, st: Stream, deadline: float) -> None:
+        t = time.monotonic()
+        jitter = t - deadline
+        stats = st.stats
+        try:
+            val = st.source.read()
+        except EOFError:
+            st.done = True
+            return
+        except Exception as e:
+            stats.errors += 1
+            if self.on_error:
+                self.on_error(st, t, e)
+        else:
+            stats.samples += 1
+            stats.jitter_sum += jitter
+            if jitter > stats.jitter_max:
+                stats.jitter_max = jitter
+            res = st.detector.update(val)
+            st.segmenter.push(val, res[0], res[2], t)
+            if self.on_sample:
+                self.on_sample(st, t, val, res)
+        nxt = deadline + st.interval
+        now = time.monotonic()
+        if now > nxt:
+            lost = int((now - nxt) / st.interval) + 1
+            stats.missed += lost
+            nxt += lost * st.interval
+        with self._cond:
+            heapq.heappush(self._heap, (nxt, next(self._seq), st))
+            self._cond.notify()
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-sampler")
+    p.add_argument("--interface", action="append", default=[])
+    p.add_argument("--replay", action="append", default=[], help="Replay a recorded CSV as a stream")
+    p.add_argument("--interval", type=float, default=0.5)
+    p.add_argument("--window", type=int, default=30)
+    p.add_argument("--threshold", type=float, default=8.0)
+    p.add_argument("--min-duration", type=float, default=1.0)
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--stats", type=float, default=10.0, help="Seconds between stats lines")
+    a = p.parse_args()
+
+    last = {}
+
+    def on_sample(st, t, val, res):
+        moving = res[0]
+        if last.get(st.name) != moving:
+            last[st.name] = moving
+            print(f"{t:.3f} {st.name} state={'MOTION' if moving else 'IDLE'} signal={val} std={res[2]:.2f} level={res[3]}")
+
+    def on_error(st, t, e):
+        print(f"{t:.3f} {st.name} source_error {e}")
+
+    def on_event(ev):
+        if ev.kind == END:
+            print(f"{ev.t:.3f} {ev.source} event duration={ev.duration:.2f} max_std={ev.max_std:.2f} mean_signal={ev.mean_signal:.2f}")
+
+    s = Sampler(on_sample=on_sample, on_error=on_error, workers=a.workers, on_event=on_event, min_duration=a.min_duration)
+    for name in a.interface or ([] if a.replay else [None]):
+        s.add(name or "default", default_source(interface=name), a.interval, MotionDetector(window_size=a.window, threshold=a.threshold))
+    for path in a.replay:
+        s.add(path, CsvReplaySource(path), a.interval, MotionDetector(window_size=a.window, threshold=a.threshold))
+    s.start()
+    try:
+        while any(not st.done for st in s.streams):
+            time.sleep(a.stats)
+            for st in s.streams:
+                ss = st.stats
+                print(f"stats {st.name} samples={ss.samples} errors={ss.errors} missed={ss.missed} jitter_mean_ms={ss.jitter_mean() * 1e3:.3f} jitter_max_ms={ss.jitter_max * 1e3:.3f}")
+    except KeyboardInterrupt:
+        pass
+    s.stop()
+
+
+if __name__ == "__main__":
+    main()
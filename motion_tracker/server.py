@@ -0,0 +1,471 @@
+import argparse
+import asyncio
+import socket
+import struct
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from .csi import CsiMotionDetector
+from .detector import MotionDetector
+from .events import END, EventSegmenter
+
+# Wire format, little endian. Every packet is a 24-byte header followed by
+# `count` records; a UDP datagram or TCP stream may carry several packets.
+#   magic "MT", version u8, kind u8, node u32, seq u32, t0_ns i64, count u16, width u16
+# KIND_RSSI records: dt_us u32, value f32                      (width = 0)
+# KIND_CSI records:  dt_us u32, width x (re i16, im i16)
+# A record's time is t0_ns + dt_us on the node's clock.
+HEADER = struct.Struct("<2sBBIIqHH")
+MAGIC = b"MT"
+VERSION = 1
+KIND_RSSI = 1
+KIND_CSI = 2
+RSSI_RECORD = np.dtype([("dt_us", "<u4"), ("value", "<f4")])
+MAX_WIDTH = 2048
+# largest packet accepted (header + records), the UDP datagram limit; also the TCP receive buffer size
+MAX_PACKET = 1 << 16
+
+DROP_NEWEST = "drop-newest"
+DROP_OLDEST = "drop-oldest"
+
+_csi_dtypes: Dict[int, np.dtype] = {}
+
+
+def csi_record(width: int) -> np.dtype:
+    dt = _csi_dtypes.get(width)
+    if dt is None:
+        dt = _csi_dtypes[width] = np.dtype([("dt_us", "<u4"), ("iq", "<i2", (width, 2))])
+    return dt
+
+
+def encode_rssi(node: int, seq: int, t0_ns: int, dt_us, values) -> bytes:
+    recs = np.empty(len(values), dtype=RSSI_RECORD)
+    recs["dt_us"] = dt_us
+    recs["value"] = values
+    return HEADER.pack(MAGIC, VERSION, KIND_RSSI, node, seq, t0_ns, len(recs), 0) + recs.tobytes()
+
+
+def encode_csi(node: int, seq: int, t0_ns: int, dt_us, frames: np.ndarray) -> bytes:
+    """frames: complex (count, width) array, quantised to int16 I/Q."""
+    frames = np.asarray(frames).reshape(len(frames), -1)
+    width = frames.shape[1]
+    recs = np.empty(len(frames), dtype=csi_record(width))
+    recs["dt_us"] = dt_us
+    recs["iq"][..., 0] = np.clip(np.round(frames.real), -32768, 32767)
+    recs["iq"][..., 1] = np.clip(np.round(frames.imag), -32768, 32767)
+    return HEADER.pack(MAGIC, VERSION, KIND_CSI, node, seq, t0_ns, len(recs), width) + recs.tobytes()
+
+
+class NodeBuffer:
+    """Bounded ring of (t, value-or-frame) rows for one node.
+
+    put() copies straight from the parsed receive-buffer view into the
+    preallocated arrays, so steady-state ingest allocates nothing per
+    packet. When full, DROP_NEWEST discards the incoming rows and
+    DROP_OLDEST overwrites the oldest unprocessed ones; either way the
+    discarded rows are counted.
+    """
+
+    def __init__(self, capacity: int, width: int = 0, policy: str = DROP_NEWEST):
+        self.capacity = capacity
+        self.policy = policy
+        self.t = np.zeros(capacity)
+        self.v = np.zeros((capacity, width), dtype=np.float32) if width else np.zeros(capacity)
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return self.head - self.tail
+
+    def put(self, t: np.ndarray, v: np.ndarray) -> int:
+        n = len(t)
+        free = self.capacity - (self.head - self.tail)
+        if n > free:
+            if self.policy == DROP_OLDEST:
+                if n > self.capacity:
+                    t, v = t[n - self.capacity:], v[n - self.capacity:]
+                    self.dropped += n - self.capacity
+                    n = self.capacity
+                over = n - (self.capacity - (self.head - self.tail))
+                if over > 0:
+                    self.tail += over
+                    self.dropped += over
+            else:
+                self.dropped += n - free
+                n = free
+                t, v = t[:n], v[:n]
+        if n <= 0:
+            return 0
+        i = self.head % self.capacity
+        first = min(n, self.capacity - i)
+        self.t[i:i + first] = t[:first]
+        self.v[i:i + first] = v[:first]
+        if n > first:
+            self.t[:n - first] = t[first:]
+            self.v[:n - first] = v[first:]
+        self.head += n
+        return n
+
+    def take(self):
+        n = self.head - self.tail
+        i = self.tail % self.capacity
+        if i + n <= self.capacity:
+            t, v = self.t[i:i + n].copy(), self.v[i:i + n].copy()
+        else:
+            t = np.concatenate((self.t[i:], self.t[:n - (self.capacity - i)]))
+            v = np.concatenate((self.v[i:], self.v[:n - (self.capacity - i)]))
+        self.tail = self.head
+        return t, v
+
+
+class Node:
+    def __init__(self, node_id: int, kind: int, width: int, buffer: NodeBuffer, detector, segmenter: EventSegmenter):
+        self.node_id = node_id
+        self.kind = kind
+        self.width = width
+        self.buffer = buffer
+        self.detector = detector
+        self.segmenter = segmenter
+        self.packets = 0
+        self.samples = 0
+        self.lost = 0
+        self.reordered = 0
+        self.duplicate = 0
+        self.last_seq = None
+        self.moving = False
+        self.std = 0.0
+        self.last_rx = 0.0
+
+
+class IngestServer:
+    """Accepts RSSI/CSI packets from remote nodes and runs per-node detection.
+
+    Parsing happens on the event loop straight from the receive buffer
+    (np.frombuffer views, no per-record objects) into each node's
+    NodeBuffer; a separate task drains the buffers through the node's
+    detector and EventSegmenter at most every `batch_ms`, so detectors
+    see hundreds of rows per call rather than one packet's worth. TCP is
+    lossless: a connection is paused once a node it feeds passes
+    `high_water` of its buffer, a packet that does not fit stays in the
+    connection's buffer, and both resume after the next drain. UDP has no
+    such lever, so the node's drop policy applies and bursts rely on
+    `udp_rcvbuf`.
+    """
+
+    def __init__(self, capacity: int = 4096, policy: str = DROP_NEWEST, high_water: float = 0.75, min_samples: int = 1, batch_ms: float = 20.0,
+                 on_event: Optional[Callable] = None, on_state: Optional[Callable] = None, detector_kwargs: Optional[dict] = None,
+                 csi_kwargs: Optional[dict] = None):
+        self.capacity = capacity
+        self.policy = policy
+        self.high_water = int(capacity * high_water)
+        self.min_samples = min_samples
+        self.batch_ms = batch_ms
+        self.on_event = on_event
+        self.on_state = on_state
+        self.detector_kwargs = detector_kwargs or {}
+        self.csi_kwargs = csi_kwargs or {}
+        self.nodes: Dict[int, Node] = {}
+        self.packets = 0
+        self.bytes = 0
+        self.malformed = 0
+        self.paused = 0
+        self._paused = set()
+        self._wake = asyncio.Event()
+        self._urgent = asyncio.Event()
+        self._servers = []
+        self._task = None
+
+    def _node(self, node_id: int, kind: int, width: int) -> Optional[Node]:
+        node = self.nodes.get(node_id)
+        if node is None:
+            if kind == KIND_CSI:
+                det = CsiMotionDetector(**self.csi_kwargs)
+            else:
+                det = MotionDetector(**self.detector_kwargs)
+            seg = EventSegmenter(self.min_samples, source=node_id)
+            if self.on_event:
+                seg.subscribe(self.on_event)
+            node = self.nodes[node_id] = Node(node_id, kind, width, NodeBuffer(self.capacity, width, self.policy), det, seg)
+        elif node.kind != kind or node.width != width:
+            return None
+        return node
+
+    def feed(self, data, conn=None) -> int:
+        """Parse whole packets from `data`; returns the number of bytes consumed."""
+        mv = memoryview(data)
+        size = len(mv)
+        pos = 0
+        now = time.monotonic()
+        while size - pos >= HEADER.size:
+            magic, version, kind, node_id, seq, t0_ns, count, width = HEADER.unpack_from(mv, pos)
+            if magic != MAGIC or version != VERSION or kind not in (KIND_RSSI, KIND_CSI) or width > MAX_WIDTH or (kind == KIND_RSSI) != (width == 0):
+                self.malformed += 1
+                return -1
+            dt = RSSI_RECORD if kind == KIND_RSSI else csi_record(width)
+            if HEADER.size + count * dt.itemsize > MAX_PACKET:
+                self.malformed += 1
+                return -1
+            end = pos + HEADER.size + count * dt.itemsize
+            if end > size:
+                break
+            node = self._node(node_id, kind, width)
+            if node is None:
+                self.malformed += 1
+                pos = end
+                continue
+            if conn is not None and node.buffer.capacity - len(node.buffer) < count <= node.buffer.capacity:
+                self._pause(conn)
+                break
+            if node.last_seq is not None:
+                # signed distance mod 2**32: only forward gaps are losses, and last_seq only moves forward
+                d = ((seq - node.last_seq + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+                if d == 0:
+                    node.duplicate += 1
+                    pos = end
+                    continue
+                if d < 0:
+                    node.reordered += 1
+                else:
+                    node.lost += d - 1
+                    node.last_seq = seq
+            else:
+                node.last_seq = seq
+            recs = np.frombuffer(mv, dt, count, pos + HEADER.size)
+            t = t0_ns * 1e-9 + recs["dt_us"] * 1e-6
+            if kind == KIND_RSSI:
+                v = recs["value"]
+            else:
+                iq = recs["iq"].astype(np.float32)
+                v = np.hypot(iq[..., 0], iq[..., 1])
+            node.buffer.put(t, v)
+            node.packets += 1
+            node.samples += count
+            node.last_rx = now
+            self.packets += 1
+            if conn is not None and len(node.buffer) >= self.high_water:
+                self._pause(conn)
+            pos = end
+        self.bytes += pos
+        if pos:
+            self._wake.set()
+        return pos
+
+    def _pause(self, conn) -> None:
+        if conn not in self._paused:
+            conn.transport.pause_reading()
+            self._paused.add(conn)
+            self.paused += 1
+            self._urgent.set()
+
+    def process(self) -> int:
+        """Run every node's pending rows through its detector; returns rows processed."""
+        done = 0
+        for node in self.nodes.values():
+            if not len(node.buffer):
+                continue
+            t, v = node.buffer.take()
+            if node.kind == KIND_RSSI:
+                moving, _, std, _ = node.detector.process_batch(v)
+            else:
+                upd = node.detector.update
+                res = [upd(f) for f in v]
+                moving = np.fromiter((r[0] for r in res), dtype=bool, count=len(res))
+                std = np.fromiter((r[2] for r in res), dtype=float, count=len(res))
+            node.segmenter.push_batch(t, v if v.ndim == 1 else v.mean(axis=1), moving, std)
+            was = node.moving
+            node.moving = bool(moving[-1])
+            node.std = float(std[-1])
+            if self.on_state and was != node.moving:
+                self.on_state(node, float(t[-1]))
+            done += len(t)
+        if self._paused:
+            paused = list(self._paused)
+            self._paused.clear()
+            for conn in paused:
+                conn.resume()
+        return done
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            if not self._paused:
+                # a paused connection cuts the coalescing delay short
+                self._urgent.clear()
+                try:
+                    await asyncio.wait_for(self._urgent.wait(), self.batch_ms / 1e3)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            self.process()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 9750, udp: bool = True, tcp: bool = True, udp_rcvbuf: int = 4 << 20) -> None:
+        loop = asyncio.get_running_loop()
+        if udp:
+            transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(self), local_addr=(host, port))
+            try:
+                transport.get_extra_info("socket").setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, udp_rcvbuf)
+            except OSError:
+                pass
+            self._servers.append(transport)
+        if tcp:
+            self._servers.append(await loop.create_server(lambda: _TcpProtocol(self), host, port))
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        for s in self._servers:
+            s.close()
+        if self._task is not None:
+            self._task.cancel()
+        self.process()
+
+    @property
+    def dropped(self) -> int:
+        return sum(n.buffer.dropped for n in self.nodes.values())
+
+    def stats_line(self) -> str:
+        return (f"packets={self.packets} bytes={self.bytes} nodes={len(self.nodes)} malformed={self.malformed} "
+                f"lost={sum(n.lost for n in self.nodes.values())} reordered={sum(n.reordered for n in self.nodes.values())} "
+                f"duplicate={sum(n.duplicate for n in self.nodes.values())} dropped={self.dropped} paused={self.paused}")
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: IngestServer):
+        self.server = server
+
+    def datagram_received(self, data, addr):
+        n = self.server.feed(data)
+        if n != len(data) and n >= 0:
+            self.server.malformed += 1
+
+
+class _TcpProtocol(asyncio.BufferedProtocol):
+    def __init__(self, server: IngestServer, size: int = MAX_PACKET):
+        self.server = server
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.filled = 0
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        # feed() rejects packets over MAX_PACKET, so a full buffer always holds a
+        # whole packet and is consumed before more is read; it never grows
+        return self.view[self.filled:]
+
+    def buffer_updated(self, nbytes):
+        self.filled += nbytes
+        self._consume()
+
+    def resume(self):
+        if self.transport.is_closing():
+            return
+        self.transport.resume_reading()
+        self._consume()
+
+    def _consume(self):
+        n = self.server.feed(self.view[:self.filled], self)
+        if n < 0:
+            self.filled = 0
+            self.transport.close()
+            return
+        if n:
+            rest = self.filled - n
+            self.buf[:rest] = self.buf[n:self.filled]
+            self.filled = rest
+
+    def connection_lost(self, exc):
+        if self.filled:
+            # drain whatever the peer sent before closing, regardless of buffer space
+            self.server.feed(self.view[:self.filled])
+        self.server._paused.discard(self)
+        self.view.release()
+
+
+async def fake_node(host: str, port: int, node: int, rate: float = 100.0, duration: float = 5.0, batch: int = 10,
+                    proto: str = "udp", width: int = 0, seed: Optional[int] = None) -> int:
+    """Loopback client that streams synthetic RSSI (width=0) or CSI packets; returns packets sent."""
+    from .sources.synthetic import generate_csi, generate_rssi
+
+    n = max(batch, int(rate * duration))
+    if width:
+        frames, _ = generate_csi(n=n, seed=node if seed is None else seed, subcarriers=width, sample_rate=rate)
+        data = (frames.reshape(n, -1) * 50).astype(np.complex64)
+    else:
+        data = generate_rssi(n=n, seed=node if seed is None else seed, sample_rate=rate).values
+    loop = asyncio.get_running_loop()
+    if proto == "udp":
+        transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+        send = transport.sendto
+        writer = None
+    else:
+        _, writer = await asyncio.open_connection(host, port)
+        send = writer.write
+    dt_us = (np.arange(batch) * 1e6 / rate).astype(np.uint32)
+    period = batch / rate
+    start = time.monotonic()
+    sent = 0
+    for seq, i in enumerate(range(0, n - batch + 1, batch)):
+        t0 = time.time_ns()
+        chunk = data[i:i + batch]
+        send(encode_csi(node, seq, t0, dt_us, chunk) if width else encode_rssi(node, seq, t0, dt_us, chunk))
+        sent += 1
+        if writer is not None:
+            await writer.drain()
+        delay = start + (seq + 1) * period - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    if writer is not None:
+        writer.close()
+        await writer.wait_closed()
+    else:
+        transport.close()
+    return sent
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-server")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=9750)
+    p.add_argument("--no-udp", action="store_true")
+    p.add_argument("--no-tcp", action="store_true")
+    p.add_argument("--capacity", type=int, default=4096, help="Per-node buffer size in samples")
+    p.add_argument("--policy", choices=[DROP_NEWEST, DROP_OLDEST], default=DROP_NEWEST)
+    p.add_argument("--window", type=int, default=30)
+    p.add_argument("--threshold", type=float, default=8.0)
+    p.add_argument("--min-samples", type=int, default=2)
+    p.add_argument("--batch-ms", type=float, default=20.0, help="Max delay before buffered samples are scored")
+    p.add_argument("--stats", type=float, default=10.0, help="Seconds between stats lines")
+    a = p.parse_args()
+
+    def on_state(node, t):
+        print(f"{t:.3f} node={node.node_id} state={'MOTION' if node.moving else 'IDLE'} std={node.std:.2f}")
+
+    def on_event(ev):
+        if ev.kind == END:
+            print(f"{ev.t:.3f} node={ev.source} event duration={ev.duration:.2f} max_std={ev.max_std:.2f}")
+
+    async def run():
+        srv = IngestServer(a.capacity, a.policy, min_samples=a.min_samples, batch_ms=a.batch_ms, on_event=on_event, on_state=on_state,
+                           detector_kwargs={"window_size": a.window, "threshold": a.threshold})
+        await srv.start(a.host, a.port, udp=not a.no_udp, tcp=not a.no_tcp)
+        print(f"listening on {a.host}:{a.port}")
+        try:
+            while True:
+                await asyncio.sleep(a.stats)
+                print("stats " + srv.stats_line())
+        finally:
+            await srv.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
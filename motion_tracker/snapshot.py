@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+VERSION = 1
+
+
+def save_snapshot(path: str, detector, environment: str = "") -> None:
+    """Write the detector's state to a compressed .npz, atomically.
+
+    `environment` names what the baseline was learned against (interface,
+    AP, room); a snapshot is only restored into the same environment.
+    """
+    write_snapshot(path, detector.state(), type(detector).__name__, environment)
+
+
+def write_snapshot(path: str, state: dict, kind: str, environment: str = "") -> None:
+    """save_snapshot() for a state() already taken, e.g. handed to another thread."""
+    state = dict(state)
+    meta = {
+        "version": VERSION,
+        "kind": kind,
+        "environment": environment,
+        "saved_at": time.time(),
+        "params": state.pop("params", None),
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, _meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8), **state)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: str, detector, environment: str = "", max_age_s: Optional[float] = 3600.0) -> Tuple[bool, str]:
+    """Restore a snapshot into `detector` if it is usable.
+
+    Returns (restored, reason). A snapshot is refused when it is missing,
+    unreadable, from another detector type, environment or format version,
+    or older than `max_age_s` (None disables the age check).
+    """
+    if not os.path.exists(path):
+        return False, "no snapshot"
+    try:
+        with np.load(path) as z:
+            meta = json.loads(z["_meta"].tobytes().decode())
+            state = {k: z[k] for k in z.files if k != "_meta"}
+    except Exception as e:
+        # a crash mid-save can leave a truncated (BadZipFile) or empty (EOFError) file
+        return False, f"unreadable snapshot: {e}"
+    if meta.get("version") != VERSION:
+        return False, f"snapshot version {meta.get('version')} != {VERSION}"
+    if meta.get("kind") != type(detector).__name__:
+        return False, f"snapshot is for {meta.get('kind')}"
+    if meta.get("environment", "") != environment:
+        return False, f"snapshot is for environment {meta.get('environment')!r}"
+    age = time.time() - float(meta.get("saved_at", 0.0))
+    if max_age_s is not None and (age > max_age_s or age < -60.0):
+        return False, f"snapshot is stale ({age:.0f}s old)"
+    try:
+        detector.load_state(state)
+    except (KeyError, ValueError) as e:
+        return False, f"incompatible snapshot: {e}"
+    return True, f"restored baseline ({age:.0f}s old)"
+
+
+class SnapshotKeeper:
+    """Checkpoints a detector every `every_s` seconds and on close().
+
+    maybe_save() only copies the detector's state on the calling (sampling)
+    thread; compression and fsync happen on a background thread. A
+    checkpoint that comes due while the previous one is still being written
+    replaces any not yet started. save()/close() wait for that thread and
+    write synchronously.
+    """
+
+    def __init__(self, path: str, detector, environment: str = "", every_s: float = 60.0):
+        self.path = path
+        self.detector = detector
+        self.environment = environment
+        self.every_s = every_s
+        self.saves = 0
+        self.errors = 0
+        self._next = time.monotonic() + every_s
+        self._cond = threading.Condition()
+        self._queued: Optional[dict] = None
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+
+    def restore(self, max_age_s: Optional[float] = 3600.0) -> Tuple[bool, str]:
+        return load_snapshot(self.path, self.detector, self.environment, max_age_s)
+
+    def maybe_save(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self.every_s <= 0 or now < self._next:
+            return False
+        self._next = now + self.every_s
+        state = self.detector.state()
+        with self._cond:
+            self._queued = state
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._queued is None:
+                    self._cond.wait()
+                state, self._queued = self._queued, None
+                self._busy = True
+            self._write(state)
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _write(self, state: dict) -> bool:
+        try:
+            write_snapshot(self.path, state, type(self.detector).__name__, self.environment)
+        except OSError:
+            self.errors += 1
+            return False
+        self.saves += 1
+        return True
+
+    def wait(self) -> None:
+        """Block until no background checkpoint is queued or being written."""
+        with self._cond:
+            while self._queued is not None or self._busy:
+                self._cond.wait()
+
+    def save(self) -> bool:
+        self.wait()
+        return self._write(self.detector.state())
+
+    close = save
@@ -0,0 +1,212 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+class SyntheticTrace:
+    """A generated signal plus its ground truth.
+
+    `motion` marks samples inside a motion burst, `breathing` marks samples
+    with the periodic low-amplitude component, and `events` lists the
+    (start, end) sample ranges of the bursts, end exclusive.
+    """
+
+    def __init__(self, values: np.ndarray, motion: np.ndarray, breathing: np.ndarray, events: List[Tuple[int, int]], sample_rate: float, seed: int):
+        self.values = values
+        self.motion = motion
+        self.breathing = breathing
+        self.events = events
+        self.sample_rate = sample_rate
+        self.seed = seed
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _bursts(rng: np.random.Generator, n: int, count: int, min_len: int, max_len: int) -> List[Tuple[int, int]]:
+    events = []
+    if count <= 0 or n <= max_len:
+        return events
+    # one burst per equal slot keeps bursts apart and the layout reproducible
+    slot = n // count
+    for k in range(count):
+        length = int(rng.integers(min_len, max_len + 1))
+        if slot <= length:
+            continue
+        start = k * slot + int(rng.integers(0, slot - length))
+        events.append((start, start + length))
+    return events
+
+
+def generate_rssi(n: int = 20000, seed: int = 0, sample_rate: float = 2.0, base: float = 60.0, noise: float = 1.0,
+                  steps: int = 4, step_size: float = 6.0, breathing_amp: float = 0.0, breathing_hz: float = 0.25,
+                  breathing_fraction: float = 0.3, bursts: int = 20, burst_len: Tuple[int, int] = (10, 60),
+                  burst_std: float = 15.0, walk_hz: float = 0.2, quantize: bool = True) -> SyntheticTrace:
+    """Seeded RSSI-percentage trace like netsh/proc sources produce.
+
+    Level steps model furniture moves or AP power changes and are not
+    labelled as motion; bursts are labelled motion; breathing is a small
+    periodic component over `breathing_fraction` of the trace.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / sample_rate
+    x = base + rng.normal(0.0, noise, n)
+
+    if steps > 0:
+        at = np.sort(rng.integers(0, n, steps))
+        sizes = rng.choice([-1.0, 1.0], steps) * step_size
+        level = np.zeros(n)
+        np.add.at(level, at, sizes)
+        x += np.cumsum(level)
+
+    breathing = np.zeros(n, dtype=bool)
+    if breathing_amp > 0 and breathing_fraction > 0:
+        m = int(n * breathing_fraction)
+        s = int(rng.integers(0, n - m + 1))
+        breathing[s:s + m] = True
+        x += np.where(breathing, breathing_amp * np.sin(2 * np.pi * breathing_hz * t), 0.0)
+
+    motion = np.zeros(n, dtype=bool)
+    events = _bursts(rng, n, bursts, *burst_len)
+    for s, e in events:
+        motion[s:e] = True
+        x[s:e] += rng.normal(0.0, burst_std, e - s) * 0.5 + burst_std * np.sin(2 * np.pi * walk_hz * t[s:e] + rng.uniform(0, 2 * np.pi))
+
+    if quantize:
+        x = np.clip(np.round(x), 0, 100)
+    return SyntheticTrace(x, motion, breathing, events, sample_rate, seed)
+
+
+def generate_csi(n: int = 5000, seed: int = 0, subcarriers: int = 64, antennas: int = 1, sample_rate: float = 100.0,
+                 noise: float = 0.5, bursts: int = 10, burst_len: Tuple[int, int] = (50, 300), burst_gain: float = 4.0,
+                 affected_fraction: float = 0.3) -> Tuple[np.ndarray, SyntheticTrace]:
+    """Seeded complex CSI frames (n, subcarriers, antennas) with labelled bursts.
+
+    Motion perturbs the amplitude of a random subset of subcarriers, which
+    is what CsiMotionDetector's top-fraction fusion is meant to pick up.
+    The returned trace's `values` is the mean amplitude per packet.
+    """
+    rng = np.random.default_rng(seed)
+    k = subcarriers * antennas
+    profile = 20.0 + 5.0 * np.sin(np.linspace(0, 3 * np.pi, k)) + rng.normal(0, 1, k)
+    amp = profile[None, :] + rng.normal(0.0, noise, (n, k))
+    motion = np.zeros(n, dtype=bool)
+    events = _bursts(rng, n, bursts, *burst_len)
+    t = np.arange(n) / sample_rate
+    for s, e in events:
+        motion[s:e] = True
+        sel = rng.random(k) < affected_fraction
+        hz = rng.uniform(0.5, 3.0)
+        amp[s:e, sel] += burst_gain * np.sin(2 * np.pi * hz * t[s:e, None] + rng.uniform(0, 2 * np.pi, sel.sum()))
+    np.abs(amp, out=amp)
+    phase = rng.uniform(-np.pi, np.pi, k)
+    frames = (amp * np.exp(1j * phase)[None, :]).astype(np.complex64).reshape(n, subcarriers, antennas)
+    trace = SyntheticTrace(amp.mean(axis=1), motion, np.zeros(n, dtype=bool), events, sample_rate, seed)
+    return frames, trace
+
+
+class MultiLinkTrace:
+    """Per-link sample streams from a room walked by one person.
+
+    `times[i]`/`values[i]` are link i's monotonic sample times and RSSI
+    values, each link on its own slightly different clock and rate.
+    `truth_t`/`truth_pos` give the person's position every 0.1 s, NaN
+    while the room is empty.
+    """
+
+    def __init__(self, tx: np.ndarray, rx: np.ndarray, times: List[np.ndarray], values: List[np.ndarray], truth_t: np.ndarray, truth_pos: np.ndarray, seed: int):
+        self.tx = tx
+        self.rx = rx
+        self.times = times
+        self.values = values
+        self.truth_t = truth_t
+        self.truth_pos = truth_pos
+        self.seed = seed
+
+    def merged(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All samples as (link, t, value) arrays sorted by time."""
+        link = np.concatenate([np.full(len(t), i) for i, t in enumerate(self.times)])
+        t = np.concatenate(self.times)
+        v = np.concatenate(self.values)
+        order = np.argsort(t, kind="stable")
+        return link[order], t[order], v[order]
+
+
+def perimeter_nodes(count: int, width: float, height: float) -> np.ndarray:
+    """`count` node positions spaced evenly around a width x height room's walls."""
+    d = np.arange(count) * 2 * (width + height) / count
+    pos = np.empty((count, 2))
+    for i, s in enumerate(d):
+        if s < width:
+            pos[i] = (s, 0.0)
+        elif s < width + height:
+            pos[i] = (width, s - width)
+        elif s < 2 * width + height:
+            pos[i] = (2 * width + height - s, height)
+        else:
+            pos[i] = (0.0, 2 * (width + height) - s)
+    return pos
+
+
+def generate_multilink(tx: np.ndarray, rx: np.ndarray, seconds: float = 600.0, seed: int = 0, width: float = 6.0, height: float = 6.0,
+                       sample_rate: float = 2.0, noise: float = 1.0, motion_std: float = 12.0, reach: float = 0.3,
+                       stay: Tuple[float, float] = (15.0, 45.0), empty_fraction: float = 0.25, jitter_s: float = 0.02) -> MultiLinkTrace:
+    """Seeded multi-link RSSI for one person moving between spots in a room.
+
+    The person stays at a random spot for `stay` seconds (or the room is
+    empty with probability `empty_fraction`), fidgeting within ~0.3 m. A
+    link fluctuates with std `motion_std * exp(-excess / reach)`, where
+    excess is the extra path length via the person, on top of `noise`.
+    """
+    rng = np.random.default_rng(seed)
+    truth_t = np.arange(0.0, seconds, 0.1)
+    pos = np.full((len(truth_t), 2), np.nan)
+    t = 0.0
+    while t < seconds:
+        d = rng.uniform(*stay)
+        if rng.random() >= empty_fraction:
+            sel = (truth_t >= t) & (truth_t < t + d)
+            spot = rng.uniform([0.3, 0.3], [width - 0.3, height - 0.3])
+            pos[sel] = spot + np.cumsum(rng.normal(0.0, 0.03, (sel.sum(), 2)), axis=0).clip(-0.3, 0.3)
+        t += d
+    length = np.linalg.norm(tx - rx, axis=1)
+    times, values = [], []
+    for i in range(len(tx)):
+        rate = sample_rate * rng.uniform(0.9, 1.1)
+        ts = rng.uniform(0.0, 1.0 / rate) + np.arange(int(seconds * rate)) / rate
+        ts = np.sort(ts + rng.normal(0.0, jitter_s, len(ts)))
+        p = pos[np.minimum((ts / 0.1).astype(int), len(pos) - 1)]
+        excess = np.linalg.norm(p - tx[i], axis=1) + np.linalg.norm(p - rx[i], axis=1) - length[i]
+        gain = np.where(np.isnan(excess), 0.0, np.exp(-np.nan_to_num(excess, nan=np.inf) / reach))
+        v = rng.uniform(40, 80) + rng.normal(0.0, noise, len(ts)) + gain * motion_std * rng.normal(0.0, 1.0, len(ts))
+        times.append(ts)
+        values.append(np.clip(np.round(v), 0, 100))
+    return MultiLinkTrace(tx, rx, times, values, truth_t, pos, seed)
+
+
+class SyntheticSource:
+    """Plays a trace through the usual read()/stream() interface."""
+
+    def __init__(self, trace: Optional[SyntheticTrace] = None, loop: bool = False, **kwargs):
+        self.trace = trace if trace is not None else generate_rssi(**kwargs)
+        self.values = self.trace.values.tolist()
+        self.loop = loop
+        self.pos = 0
+
+    def read(self) -> float:
+        if self.pos >= len(self.values):
+            if not self.loop or not self.values:
+                raise EOFError("end of synthetic trace")
+            self.pos = 0
+        v = self.values[self.pos]
+        self.pos += 1
+        return v
+
+    def stream(self, interval_s: float):
+        while True:
+            try:
+                yield self.read()
+            except EOFError:
+                return
+            time.sleep(interval_s)
@@ -0,0 +1,75 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class StftFeatures:
+    """Sliding STFT over a ring buffer, recomputed every `hop` samples.
+
+    Samples are written twice into a buffer of 2 * fft_size rows so the
+    latest window is always a contiguous view; the Hann window, bin masks
+    and scratch arrays are built once. Band power is normalised by the
+    window energy so sqrt(band_power) is in the same units as the signal
+    std and can be compared against MotionDetector.threshold. Multi-channel
+    input (e.g. CSI amplitudes) is averaged across channels.
+    """
+
+    def __init__(self, fft_size: int = 64, hop: int = 8, sample_rate: float = 2.0, bands: Sequence[Tuple[float, float]] = ((0.1, 0.5), (0.5, 2.0)), channels: int = 1, trigger_band: Optional[int] = None):
+        self.fft_size = fft_size
+        self.hop = hop
+        self.sample_rate = sample_rate
+        self.bands = tuple(bands)
+        self.channels = channels
+        self.trigger_band = trigger_band
+        self._buf = np.zeros((2 * fft_size, channels))
+        self._pos = 0
+        self.count = 0
+        self._win = np.hanning(fft_size)[:, None]
+        self._scratch = np.empty((fft_size, channels))
+        freqs = np.fft.rfftfreq(fft_size, d=1.0 / sample_rate)
+        # one-sided spectrum: every bin except DC (and Nyquist) stands for two
+        self._scale = np.full(len(freqs), 2.0 / (fft_size * float(np.sum(self._win ** 2))))
+        self._scale[0] /= 2.0
+        if fft_size % 2 == 0:
+            self._scale[-1] /= 2.0
+        self._masks = [(freqs >= lo) & (freqs < hi) for lo, hi in self.bands]
+        self.freqs = freqs
+        self.power = np.zeros(len(freqs))
+        self.band_power = np.zeros(len(self.bands))
+        self.dominant_hz = 0.0
+        self.frames = 0
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self._buf, self._win, self._scratch, self._scale, self.power, self.band_power, *self._masks))
+
+    def push(self, value) -> bool:
+        n = self.fft_size
+        i = self._pos
+        self._buf[i] = value
+        self._buf[i + n] = value
+        self._pos = (i + 1) % n
+        self.count += 1
+        if self.count < n or (self.count - n) % self.hop:
+            return False
+        self._compute()
+        return True
+
+    def _compute(self) -> None:
+        s = self._scratch
+        win = self._buf[self._pos:self._pos + self.fft_size]
+        np.subtract(win, win.mean(axis=0), out=s)
+        s *= self._win
+        spec = np.fft.rfft(s, axis=0)
+        p = self.power
+        np.mean(spec.real ** 2 + spec.imag ** 2, axis=1, out=p)
+        p *= self._scale
+        for k, m in enumerate(self._masks):
+            self.band_power[k] = p[m].sum()
+        self.dominant_hz = float(self.freqs[1 + int(np.argmax(p[1:]))]) if len(p) > 1 else 0.0
+        self.frames += 1
+
+    def band_std(self, k: int) -> float:
+        return float(np.sqrt(self.band_power[k]))
+
+    def triggered(self, threshold: float) -> bool:
+        return self.trigger_band is not None and self.frames > 0 and self.band_std(self.trigger_band) > threshold
@@ -0,0 +1,398 @@
+import argparse
+import csv
+import math
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .events import END
+
+HOUR = 3600
+DAY = 86400
+
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    max_std REAL NOT NULL,
+    mean_signal REAL NOT NULL,
+    samples INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_source_start ON events (source, start);
+CREATE INDEX IF NOT EXISTS events_start ON events (start);
+CREATE TABLE IF NOT EXISTS rollups (
+    source TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    events INTEGER NOT NULL,
+    motion_s REAL NOT NULL,
+    max_std REAL NOT NULL,
+    PRIMARY KEY (source, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO rollups (source, bucket, events, motion_s, max_std) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (source, bucket) DO UPDATE SET
+    events = events + excluded.events,
+    motion_s = motion_s + excluded.motion_s,
+    max_std = MAX(max_std, excluded.max_std)
+"""
+
+
+def _wall(label) -> Optional[float]:
+    # Segmenter labels are naive UTC ISO strings from datetime.utcnow().isoformat().
+    if not isinstance(label, str):
+        return None
+    try:
+        d = datetime.fromisoformat(label)
+    except ValueError:
+        return None
+    if d.tzinfo is None:
+        d = d.replace(tzinfo=timezone.utc)
+    return d.timestamp()
+
+
+def _hour_parts(start: float, end: float):
+    # (bucket, seconds of [start, end) inside it) for each hour the event touches
+    b = int(start // HOUR) * HOUR
+    while b < end:
+        yield b, min(end, b + HOUR) - max(start, b)
+        b += HOUR
+
+
+def _event_row(ev) -> tuple:
+    start = _wall(ev.start_label)
+    if start is None:
+        start = time.time() - ev.duration
+    return (ev.source if ev.source is not None else "default", start, start + ev.duration, ev.max_std, ev.mean_signal, ev.samples)
+
+
+class EventStore:
+    """SQLite store of motion events keyed by (source, start), in unix seconds.
+
+    Every insert also updates per-source hourly rollups (event count by
+    start hour, motion seconds split across the hours an event spans, peak
+    std) in the same transaction, so day/hour occupancy queries read a few
+    rollup rows instead of the raw events. Range queries use the
+    (source, start) index bounded below by the longest event stored, so
+    overlap searches stay index range scans. prune() drops old raw events
+    while keeping their rollups, which is the compacted history.
+
+    on_event(), the EventSegmenter subscriber, never touches SQLite on the
+    caller's thread: rows go onto a bounded queue (dropped and counted when
+    full) and a writer thread inserts whatever has piled up in one
+    transaction. close() drains it; add()/add_event() stay synchronous.
+    """
+
+    def __init__(self, path: str = "motion_events.db", max_queue: int = 10000):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'max_duration'").fetchone()
+        self.max_duration = float(row[0]) if row else 0.0
+        self.inserted = 0
+        self.dropped = 0
+        self.errors = 0
+        self._q = queue.Queue(maxsize=max_queue)
+        self._t: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        if self._t is not None and self._t.is_alive():
+            self._q.put(_STOP)
+            self._t.join()
+        with self._lock:
+            self._db.close()
+
+    def backlog(self) -> int:
+        return self._q.qsize()
+
+    def flush(self) -> None:
+        """Block until every queued event is stored."""
+        if self._t is not None and self._t.is_alive():
+            self._q.join()
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            rows = [self._q.get()]
+            while len(rows) < 256:
+                try:
+                    rows.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            done = len(rows)
+            if _STOP in rows:
+                stop = True
+                rows = [r for r in rows if r is not _STOP]
+            try:
+                self.add_many(rows)
+            except Exception:
+                self.errors += 1
+            for _ in range(done):
+                self._q.task_done()
+
+    def add(self, source: str, start: float, end: float, max_std: float = 0.0, mean_signal: float = 0.0, samples: int = 0) -> None:
+        self.add_many([(source, start, end, max_std, mean_signal, samples)])
+
+    def add_many(self, rows: Iterable[Sequence]) -> int:
+        """Insert (source, start, end, max_std, mean_signal, samples) rows in one transaction."""
+        rows = [(str(r[0]), float(r[1]), float(r[2]), float(r[3]), float(r[4]), int(r[5])) for r in rows]
+        if not rows:
+            return 0
+        roll = {}
+        longest = self.max_duration
+        for source, start, end, max_std, _, _ in rows:
+            longest = max(longest, end - start)
+            first = True
+            for bucket, secs in _hour_parts(start, end):
+                r = roll.get((source, bucket))
+                if r is None:
+                    r = roll[(source, bucket)] = [0, 0.0, 0.0]
+                r[0] += first
+                r[1] += secs
+                r[2] = max(r[2], max_std)
+                first = False
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN")
+            try:
+                db.executemany('INSERT INTO events (source, start, "end", max_std, mean_signal, samples) VALUES (?, ?, ?, ?, ?, ?)', rows)
+                db.executemany(_UPSERT, [(s, b, n, m, x) for (s, b), (n, m, x) in roll.items()])
+                if longest > self.max_duration:
+                    db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('max_duration', ?)", (longest,))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            self.max_duration = longest
+            self.inserted += len(rows)
+        return len(rows)
+
+    def add_event(self, ev) -> None:
+        """Store a segmenter END event; wall times come from its labels when they are ISO strings."""
+        self.add_many([_event_row(ev)])
+
+    def on_event(self, ev) -> None:
+        # subscriber callback for EventSegmenter; queued for the writer thread
+        if ev.kind != END:
+            return
+        if self._t is None:
+            self._t = threading.Thread(target=self._run, daemon=True)
+            self._t.start()
+        try:
+            self._q.put_nowait(_event_row(ev))
+        except queue.Full:
+            self.dropped += 1
+
+    def _where(self, start: float, end: float, source: Optional[str]) -> Tuple[str, list]:
+        # events overlapping [start, end): start < end_q and end > start_q; the
+        # lower start bound keeps it an index range scan
+        sql = 'start >= ? AND start < ? AND "end" > ?'
+        args = [start - self.max_duration, end, start]
+        if source is not None:
+            sql = "source = ? AND " + sql
+            args.insert(0, source)
+        return sql, args
+
+    def events(self, start: float, end: float, source: Optional[str] = None, limit: Optional[int] = None) -> List[tuple]:
+        """(source, start, end, max_std, mean_signal, samples) of events overlapping [start, end), by start."""
+        where, args = self._where(start, end, source)
+        sql = f'SELECT source, start, "end", max_std, mean_signal, samples FROM events WHERE {where} ORDER BY start'
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def _raw_motion(self, start: float, end: float, source: Optional[str]) -> float:
+        if end <= start:
+            return 0.0
+        where, args = self._where(start, end, source)
+        sql = f'SELECT TOTAL(MIN("end", ?) - MAX(start, ?)) FROM events WHERE {where}'
+        return self._db.execute(sql, [end, start] + args).fetchone()[0]
+
+    def motion_seconds(self, start: float, end: float, source: Optional[str] = None) -> float:
+        """Seconds of motion inside [start, end), clipped at the edges.
+
+        Whole hours come from the rollups and only the partial hours at
+        either end touch raw events, so long ranges cost the same as short
+        ones. Raw events must not have been pruned from the edge hours.
+        """
+        h0 = math.ceil(start / HOUR) * HOUR
+        h1 = math.floor(end / HOUR) * HOUR
+        with self._lock:
+            if h0 >= h1:
+                return self._raw_motion(start, end, source)
+            sql = "SELECT TOTAL(motion_s) FROM rollups WHERE bucket >= ? AND bucket < ?"
+            args = [h0, h1]
+            if source is not None:
+                sql += " AND source = ?"
+                args.append(source)
+            whole = self._db.execute(sql, args).fetchone()[0]
+            return whole + self._raw_motion(start, h0, source) + self._raw_motion(h1, end, source)
+
+    def rollup(self, start: float, end: float, source: Optional[str] = None, by: str = "hour", utc_offset_s: int = 0) -> List[tuple]:
+        """(bucket, source, events, motion_s, max_std) per hour or day bucket in [start, end).
+
+        Day buckets start at local midnight for the given UTC offset; the
+        bucket value is that midnight in unix seconds.
+        """
+        size = {"hour": HOUR, "day": DAY}[by]
+        off = int(utc_offset_s)
+        key = f"((bucket + {off}) / {size}) * {size} - {off}"
+        sql = f"SELECT {key} AS b, source, SUM(events), TOTAL(motion_s), MAX(max_std) FROM rollups WHERE bucket >= ? AND bucket < ?"
+        args = [int(start // HOUR) * HOUR, end]
+        if source is not None:
+            sql += " AND source = ?"
+            args.append(source)
+        sql += " GROUP BY b, source ORDER BY b, source"
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def sources(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT DISTINCT source FROM rollups ORDER BY source")]
+
+    def prune(self, events_before: float, rollups_before: Optional[float] = None) -> Tuple[int, int]:
+        """Delete raw events that ended before `events_before` (rollups are kept) and
+        rollup hours before `rollups_before`. Returns (events, rollup rows) deleted."""
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN")
+            try:
+                ne = db.execute('DELETE FROM events WHERE start < ? AND "end" < ?', (events_before, events_before)).rowcount
+                nr = 0
+                if rollups_before is not None:
+                    nr = db.execute("DELETE FROM rollups WHERE bucket < ?", (int(rollups_before // HOUR) * HOUR,)).rowcount
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return ne, nr
+
+    def compact(self) -> None:
+        """Reclaim space after prune() and fold the WAL back into the database file."""
+        with self._lock:
+            self._db.execute("VACUUM")
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            db = self._db
+            n, first, last = db.execute('SELECT COUNT(*), MIN(start), MAX("end") FROM events').fetchone()
+            nr = db.execute("SELECT COUNT(*) FROM rollups").fetchone()[0]
+        return {"events": n, "rollup_rows": nr, "first": first, "last": last, "max_duration_s": self.max_duration}
+
+
+def import_csv(store: EventStore, path: str, source: str) -> int:
+    """Load an --events-csv / motion_events.csv log (start,end,duration_s,max_std,mean_signal)."""
+    rows = []
+    with open(path, newline="") as f:
+        for r in csv.DictReader(f):
+            start = _wall(r["start"])
+            if start is None:
+                continue
+            rows.append((source, start, start + float(r["duration_s"]), float(r["max_std"]), float(r["mean_signal"]), 0))
+    return store.add_many(rows)
+
+
+def parse_time(s: str, utc: bool = False) -> float:
+    """Unix seconds from an ISO time (local unless utc), a unix number, 'now', or an age like '2h'/'7d'."""
+    s = s.strip()
+    now = time.time()
+    if s == "now":
+        return now
+    if s[-1] in "smhd" and s[:-1].lstrip("-").replace(".", "", 1).isdigit():
+        return now - abs(float(s[:-1])) * {"s": 1, "m": 60, "h": HOUR, "d": DAY}[s[-1]]
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    d = datetime.fromisoformat(s)
+    if d.tzinfo is None and utc:
+        d = d.replace(tzinfo=timezone.utc)
+    return d.timestamp()
+
+
+def _fmt(t: float, utc: bool) -> str:
+    d = datetime.fromtimestamp(t, timezone.utc) if utc else datetime.fromtimestamp(t)
+    return d.isoformat(sep=" ", timespec="seconds")
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-store", description="Query and maintain a motion event database")
+    p.add_argument("db", help="SQLite event store, e.g. motion_events.db")
+    p.add_argument("--utc", action="store_true", help="Read and print times in UTC instead of local time")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def span(sp):
+        sp.add_argument("--from", dest="start", default="1d", help="ISO time, unix seconds, or an age like 2h / 7d (default 1d ago)")
+        sp.add_argument("--to", dest="end", default="now")
+        sp.add_argument("--source", default=None)
+
+    q = sub.add_parser("events", help="List events overlapping a time range")
+    span(q)
+    q.add_argument("--limit", type=int, default=None)
+    m = sub.add_parser("motion", help="Total motion seconds in a time range")
+    span(m)
+    r = sub.add_parser("rollup", help="Per-hour or per-day event counts and motion time")
+    span(r)
+    r.add_argument("--by", choices=["hour", "day"], default="hour")
+    i = sub.add_parser("import", help="Import an events CSV log")
+    i.add_argument("csv")
+    i.add_argument("--source", default="default")
+    pr = sub.add_parser("prune", help="Drop old raw events (their rollups stay) and optionally old rollups")
+    pr.add_argument("--keep-days", type=float, required=True)
+    pr.add_argument("--keep-rollup-days", type=float, default=None)
+    pr.add_argument("--compact", action="store_true", help="VACUUM afterwards")
+    sub.add_parser("stats", help="Row counts and time span")
+    a = p.parse_args()
+
+    store = EventStore(a.db)
+    try:
+        if a.cmd in ("events", "motion", "rollup"):
+            start, end = parse_time(a.start, a.utc), parse_time(a.end, a.utc)
+            t0 = time.perf_counter()
+            if a.cmd == "events":
+                rows = store.events(start, end, a.source, a.limit)
+                for src, s, e, mx, ms, n in rows:
+                    print(f"{src} {_fmt(s, a.utc)} {e - s:8.2f}s max_std={mx:.2f} mean_signal={ms:.2f}")
+                info = f"{len(rows)} events"
+            elif a.cmd == "motion":
+                info = f"{store.motion_seconds(start, end, a.source):.1f}s of motion"
+                print(info)
+            else:
+                off = 0 if a.utc else int(datetime.fromtimestamp(start).astimezone().utcoffset().total_seconds())
+                rows = store.rollup(start, end, a.source, a.by, off)
+                for b, src, n, secs, mx in rows:
+                    print(f"{_fmt(b, a.utc)} {src} events={n} motion_s={secs:.1f} max_std={mx:.2f}")
+                info = f"{len(rows)} buckets"
+            print(f"# {info} in {(time.perf_counter() - t0) * 1e3:.2f} ms")
+        elif a.cmd == "import":
+            print(f"imported {import_csv(store, a.csv, a.source)} events")
+        elif a.cmd == "prune":
+            now = time.time()
+            ne, nr = store.prune(now - a.keep_days * DAY, None if a.keep_rollup_days is None else now - a.keep_rollup_days * DAY)
+            if a.compact:
+                store.compact()
+            print(f"pruned {ne} events, {nr} rollup rows")
+        else:
+            s = store.stats()
+            span_s = "" if s["first"] is None else f" from {_fmt(s['first'], a.utc)} to {_fmt(s['last'], a.utc)}"
+            print(f"events={s['events']} rollup_rows={s['rollup_rows']} max_duration_s={s['max_duration_s']:.1f}{span_s}")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
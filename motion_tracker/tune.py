@@ -0,0 +1,353 @@
+import argparse
+import csv
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .classifier import _TRAIN_NAME
+from .detector import MotionDetector, _ema, _hysteresis, _rolling_median_mad
+from .evaluation import score_events
+from .replay import debounce, load_signal
+
+PARAMS = MotionDetector.PARAMS
+INT_PARAMS = ("window_size", "long_window")
+
+DEFAULT_SPACE = {
+    "window_size": "10,20,30,45,60",
+    "threshold": "3:12:1",
+    "ema_alpha": "0.1,0.2,0.3,0.5,1.0",
+    "long_window": "60,120,240",
+    "dev_factor": "2,3,4,6",
+    "down_ratio": "0.4,0.6,0.8",
+}
+
+COLUMNS = ("precision", "recall", "f1", "false_alarms", "fa_per_hour", "latency_mean_s", "latency_p90_s", "predicted", "truth")
+
+
+def parse_values(spec: str, integer: bool = False) -> Tuple[List[float], Optional[Tuple[float, float]]]:
+    """'a,b,c' or 'start:stop[:step]' (stop inclusive, step 1); also returns the (lo, hi) range for random search."""
+    if ":" in spec:
+        lo, hi, step = (float(v) for v in (spec + ":1").split(":")[:3])
+        vals = np.arange(lo, hi + step / 2, step).tolist()
+        rng = (lo, hi)
+    else:
+        vals = [float(v) for v in spec.split(",") if v.strip()]
+        rng = None
+    if integer:
+        vals = sorted({int(round(v)) for v in vals})
+    return vals, rng
+
+
+def grid_configs(space: Dict[str, str]) -> List[tuple]:
+    axes = [parse_values(space[k], k in INT_PARAMS)[0] for k in PARAMS]
+    return list(itertools.product(*axes))
+
+
+def random_configs(space: Dict[str, str], n: int, seed: int = 0) -> List[tuple]:
+    # ranges are sampled uniformly; floats are rounded so nearby draws still
+    # share an EMA (2 decimals) and thresholds stay readable
+    rng = np.random.default_rng(seed)
+    cols = []
+    for k in PARAMS:
+        vals, span = parse_values(space[k], k in INT_PARAMS)
+        if span is None:
+            cols.append(rng.choice(vals, n).tolist())
+        elif k in INT_PARAMS:
+            cols.append(rng.integers(int(span[0]), int(span[1]) + 1, n).tolist())
+        else:
+            cols.append(np.round(rng.uniform(span[0], span[1], n), 2).tolist())
+    return sorted(set(zip(*cols)))
+
+
+def _check(cfg: tuple) -> None:
+    w, thr, alpha, lw, df, dr = cfg
+    if w < 1 or lw < 1 or not 0.0 < alpha <= 1.0 or thr <= 0 or df <= 0 or dr <= 0:
+        raise ValueError(f"invalid detector config {dict(zip(PARAMS, cfg))}")
+
+
+def truth_from_events(ts: np.ndarray, path: str) -> np.ndarray:
+    """Mark every sample inside a start,end row of an events CSV (the CLI --events-csv format)."""
+    t = ts.astype("datetime64[us]")
+    truth = np.zeros(len(t), dtype=bool)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [r for r in csv.reader(f) if r][1:]
+    if not rows:
+        return truth
+    starts = np.array([r[0] for r in rows], dtype="datetime64[us]")
+    ends = np.array([r[1] for r in rows], dtype="datetime64[us]")
+    mark = np.zeros(len(t) + 1, dtype=np.int64)
+    np.add.at(mark, np.searchsorted(t, starts, "left"), 1)
+    np.add.at(mark, np.searchsorted(t, ends, "right"), -1)
+    return np.cumsum(mark[:-1]) > 0
+
+
+def load_labeled(spec: str) -> Tuple[np.ndarray, np.ndarray]:
+    """RECORDING=EVENTS_CSV, or a GUI train_data_<N>people_*.csv (N > 0 is one event spanning the file)."""
+    path, sep, events = spec.partition("=")
+    ts, sig = load_signal(path)
+    if sep:
+        return sig, truth_from_events(ts, events)
+    m = _TRAIN_NAME.search(os.path.basename(path))
+    if not m:
+        raise ValueError(f"{path}: no labels; pass {path}=EVENTS.csv or a train_data_<N>people_*.csv file")
+    return sig, np.full(len(sig), int(m.group(1)) > 0)
+
+
+class Sweep:
+    """Scores MotionDetector configs on fixed recordings, sharing work between them.
+
+    Each config's output is rebuilt from cached intermediates with the same
+    arithmetic as MotionDetector.process_batch() on a fresh detector: the
+    EMA per ema_alpha, the short-window std per (ema_alpha, window_size),
+    and the robust deviation per (ema_alpha, long window). What is left per
+    config is a few comparisons, the hysteresis scan, debounce and scoring.
+    Configs are best fed grouped by group_key() so the expensive rolling
+    median/MAD is computed once per group.
+    """
+
+    def __init__(self, recordings: Sequence[Tuple[np.ndarray, np.ndarray]], interval: float = 0.5, min_samples: int = 2, ema_cache: int = 8):
+        self.signals = [np.asarray(s, dtype=np.float64) for s, _ in recordings]
+        self.interval = interval
+        self.min_samples = min_samples
+        self.ema_cache = ema_cache
+        # recordings are scored as one array with a quiet sample between them
+        self.truth = np.concatenate([np.append(np.asarray(t, dtype=bool), False) for _, t in recordings])
+        self.hours = sum(len(s) for s in self.signals) * interval / 3600
+        self._ema: Dict[float, List[np.ndarray]] = {}
+        self._std: Dict[tuple, List[np.ndarray]] = {}
+        self._dev: Dict[tuple, List[np.ndarray]] = {}
+        self._group = None
+
+    @staticmethod
+    def group_key(cfg: tuple) -> tuple:
+        w, _, alpha, lw = cfg[:4]
+        return alpha, max(lw, w * 4)
+
+    def ema(self, alpha: float) -> List[np.ndarray]:
+        e = self._ema.get(alpha)
+        if e is None:
+            if len(self._ema) >= self.ema_cache:
+                del self._ema[next(iter(self._ema))]
+            e = self._ema[alpha] = [np.concatenate((x[:1], _ema(x[1:], x[0], alpha))) if len(x) else x for x in self.signals]
+        return e
+
+    def short_std(self, alpha: float, w: int) -> List[np.ndarray]:
+        key = (alpha, w)
+        s = self._std.get(key)
+        if s is None:
+            s = self._std[key] = []
+            for e in self.ema(alpha):
+                # RollingMeanStd's running sums: the window is "full of zeros" until w samples
+                old = np.concatenate((np.zeros(min(w, len(e))), e[:max(len(e) - w, 0)]))
+                count = np.minimum(np.arange(1, len(e) + 1), w)
+                a = np.cumsum(e - old) / count
+                var = np.cumsum(e * e - old * old) / count - a * a
+                s.append(np.sqrt(np.maximum(var, 0.0)))
+        return s
+
+    def deviation(self, alpha: float, lw: int) -> List[np.ndarray]:
+        key = (alpha, lw)
+        d = self._dev.get(key)
+        if d is None:
+            d = self._dev[key] = []
+            for e in self.ema(alpha):
+                n = len(e)
+                med = np.zeros(n)
+                mad = np.zeros(n)
+                if lw >= 10:
+                    # the long window grows until lw samples, then slides
+                    for k in range(10, min(lw, n + 1)):
+                        m, a = _rolling_median_mad(e[None, :k])
+                        med[k - 1], mad[k - 1] = m[0], a[0]
+                    if n >= lw:
+                        med[lw - 1:], mad[lw - 1:] = _rolling_median_mad(sliding_window_view(e, lw))
+                rs = np.where(mad > 1e-9, mad * 1.4826, 0.0)
+                dev = np.zeros(n)
+                np.divide(np.abs(e - med), rs, out=dev, where=rs > 1e-9)
+                d.append(dev)
+        return d
+
+    def moving(self, cfg: tuple) -> List[np.ndarray]:
+        """Debounced motion per recording, identical to process_batch() + debounce()."""
+        w, thr, alpha, lw, df, dr = cfg
+        key = self.group_key(cfg)
+        if key != self._group:
+            self._std.clear()
+            self._dev.clear()
+            self._group = key
+        out = []
+        for s, dev in zip(self.short_std(alpha, w), self.deviation(*key)):
+            act = np.zeros(len(s), dtype=bool)
+            # update() returns before the hysteresis until the short window holds 5 samples
+            if w >= 5 and len(s) > 4:
+                trig = (dev[4:] > df) | (s[4:] > thr)
+                act[4:] = _hysteresis(trig, s[4:] < thr * dr, False)
+            out.append(debounce(act, self.min_samples))
+        return out
+
+    def score(self, cfg: tuple) -> dict:
+        pred = np.concatenate([np.append(m, False) for m in self.moving(cfg)])
+        r = score_events(pred, self.truth, 1.0 / self.interval)
+        p, rc = r["precision"], r["recall"]
+        r["f1"] = 2 * p * rc / (p + rc) if p + rc > 0 else 0.0
+        r["fa_per_hour"] = r["false_alarms"] / self.hours if self.hours > 0 else 0.0
+        return r
+
+    def run(self, configs: Sequence[tuple]) -> List[Tuple[tuple, dict]]:
+        return [(cfg, self.score(cfg)) for cfg in sorted(configs, key=self.group_key)]
+
+
+_worker_sweep: Optional[Sweep] = None
+_worker_shm = None
+
+
+def _init_worker(name: str, bounds: List[int], interval: float, min_samples: int) -> None:
+    global _worker_sweep, _worker_shm
+    n = bounds[-1]
+    shm = _worker_shm = shared_memory.SharedMemory(name=name)
+    sig = np.ndarray(n, dtype=np.float64, buffer=shm.buf)
+    truth = np.ndarray(n, dtype=bool, buffer=shm.buf, offset=n * 8)
+    recs = [(sig[a:b], truth[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    _worker_sweep = Sweep(recs, interval, min_samples)
+
+
+def _run_group(configs: List[tuple]) -> List[Tuple[tuple, dict]]:
+    return _worker_sweep.run(configs)
+
+
+def sweep(recordings: Sequence[Tuple[np.ndarray, np.ndarray]], configs: Sequence[tuple], interval: float = 0.5, min_samples: int = 2,
+          workers: Optional[int] = None, progress=None) -> List[Tuple[tuple, dict]]:
+    """Score every config; with workers != 0 the recordings go into shared memory once and groups run on a process pool."""
+    for cfg in configs:
+        _check(cfg)
+    groups: Dict[tuple, List[tuple]] = {}
+    for cfg in configs:
+        groups.setdefault(Sweep.group_key(cfg), []).append(cfg)
+    # biggest groups first so the pool drains evenly; alpha order lets a worker keep its EMA
+    tasks = sorted(groups.values(), key=lambda g: (-len(g) * Sweep.group_key(g[0])[1], g[0][2]))
+    workers = os.cpu_count() if workers is None else workers
+    if not workers or len(tasks) == 1:
+        sw = Sweep(recordings, interval, min_samples)
+        out = []
+        for g in tasks:
+            out += sw.run(g)
+            if progress:
+                progress(len(out), len(configs))
+        return out
+
+    lengths = [len(s) for s, _ in recordings]
+    bounds = np.concatenate(([0], np.cumsum(lengths))).tolist()
+    n = bounds[-1]
+    shm = shared_memory.SharedMemory(create=True, size=max(n * 9, 1))
+    try:
+        np.ndarray(n, dtype=np.float64, buffer=shm.buf)[:] = np.concatenate([np.asarray(s, dtype=np.float64) for s, _ in recordings]) if n else []
+        np.ndarray(n, dtype=bool, buffer=shm.buf, offset=n * 8)[:] = np.concatenate([np.asarray(t, dtype=bool) for _, t in recordings]) if n else []
+        out = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shm.name, bounds, interval, min_samples)) as pool:
+            for fut in as_completed([pool.submit(_run_group, g) for g in tasks]):
+                out += fut.result()
+                if progress:
+                    progress(len(out), len(configs))
+        return out
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def pareto(results: Sequence[Tuple[tuple, dict]]) -> np.ndarray:
+    """Configs no other config beats on precision, recall and mean latency at once."""
+    p = np.array([r["precision"] for _, r in results])
+    rc = np.array([r["recall"] for _, r in results])
+    lat = np.array([r["latency_mean_s"] for _, r in results])
+    lat = np.where(np.isnan(lat), np.inf, lat)
+    front = np.ones(len(results), dtype=bool)
+    for i in range(len(results)):
+        ge = (p >= p[i]) & (rc >= rc[i]) & (lat <= lat[i])
+        gt = (p > p[i]) | (rc > rc[i]) | (lat < lat[i])
+        front[i] = not (ge & gt).any()
+    return front
+
+
+def rank(results: Sequence[Tuple[tuple, dict]], by: str = "f1") -> List[Tuple[tuple, dict]]:
+    def lat(r):
+        v = r["latency_mean_s"]
+        return math.inf if v != v else v
+    keys = {
+        "f1": lambda x: (-x[1]["f1"], lat(x[1]), x[1]["false_alarms"]),
+        "precision": lambda x: (-x[1]["precision"], -x[1]["recall"], lat(x[1])),
+        "recall": lambda x: (-x[1]["recall"], -x[1]["precision"], lat(x[1])),
+        "latency": lambda x: (lat(x[1]), -x[1]["f1"]),
+    }
+    return sorted(results, key=keys[by])
+
+
+def write_csv(path: str, results: Sequence[Tuple[tuple, dict]], front: np.ndarray) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(PARAMS + COLUMNS + ("pareto",))
+        for (cfg, r), pf in zip(results, front.tolist()):
+            w.writerow(list(cfg) + [round(r[k], 4) if isinstance(r[k], float) else r[k] for k in COLUMNS] + [int(pf)])
+
+
+def _fmt(v) -> str:
+    return f"{v:g}" if isinstance(v, float) else str(v)
+
+
+def main():
+    p = argparse.ArgumentParser(prog="wifi-motion-tune", description="Parameter sweep for MotionDetector over labeled recordings")
+    p.add_argument("recordings", nargs="+", metavar="RECORDING[=EVENTS_CSV]",
+                   help="CLI --csv/.mtr recording with its --events-csv as labels, or a GUI train_data_<N>people_*.csv")
+    for k in PARAMS:
+        p.add_argument("--" + k.replace("_", "-"), default=DEFAULT_SPACE[k], metavar="SPEC",
+                       help=f"Values as a,b,c or start:stop:step (default {DEFAULT_SPACE[k]})")
+    p.add_argument("--random", type=int, default=0, metavar="N", help="Sample N configs from the ranges instead of the full grid")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--interval", type=float, default=0.5, help="Sample spacing of the recordings in seconds")
+    p.add_argument("--min-duration", type=float, default=1.0, help="Debounce, as in the CLI")
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 0 = in-process)")
+    p.add_argument("--rank", choices=("f1", "precision", "recall", "latency"), default="f1")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--out", default=None, help="Write every config's scores as CSV, in rank order")
+    a = p.parse_args()
+
+    space = {k: getattr(a, k) for k in PARAMS}
+    configs = random_configs(space, a.random, a.seed) if a.random else grid_configs(space)
+    recs = [load_labeled(spec) for spec in a.recordings]
+    n = sum(len(s) for s, _ in recs)
+    min_samples = max(1, int(a.min_duration / a.interval))
+    print(f"{len(configs)} configs x {len(recs)} recordings ({n} samples, {n * a.interval / 3600:.1f}h, "
+          f"{sum(int(t.sum()) for _, t in recs)} labeled motion samples)")
+
+    step = max(1, len(configs) // 10)
+    t0 = time.perf_counter()
+
+    def progress(done, total):
+        if done // step != (done - 1) // step or done == total:
+            print(f"  {done}/{total} configs, {time.perf_counter() - t0:.1f}s")
+
+    results = rank(sweep(recs, configs, a.interval, min_samples, a.workers, progress), a.rank)
+    elapsed = time.perf_counter() - t0
+    front = pareto(results)
+    print(f"{len(results)} configs in {elapsed:.1f}s ({len(results) / max(elapsed, 1e-9):.0f}/s), {int(front.sum())} on the precision/recall/latency front")
+    print(f"{'window':>6} {'thr':>5} {'alpha':>5} {'long':>5} {'dev':>4} {'down':>4} | {'P':>5} {'R':>5} {'F1':>5} {'FA/h':>6} {'lat s':>6} {'p90 s':>6}")
+    for (cfg, r), pf in list(zip(results, front.tolist()))[:a.top]:
+        w, thr, alpha, lw, df, dr = (_fmt(v) for v in cfg)
+        print(f"{w:>6} {thr:>5} {alpha:>5} {lw:>5} {df:>4} {dr:>4} | {r['precision']:>5.2f} {r['recall']:>5.2f} {r['f1']:>5.2f} "
+              f"{r['fa_per_hour']:>6.2f} {r['latency_mean_s']:>6.2f} {r['latency_p90_s']:>6.2f}{' *' if pf else ''}")
+    if results:
+        best = results[0][0]
+        print("best: set " + " ".join(f"{k}={_fmt(v)}" for k, v in zip(PARAMS, best)) + "   (control socket; CLI: "
+              f"--window {best[0]} --threshold {_fmt(best[1])})")
+    if a.out:
+        write_csv(a.out, results, front)
+
+
+if __name__ == "__main__":
+    main()
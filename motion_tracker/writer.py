@@ -0,0 +1,139 @@
+import os
+import queue
+import threading
+import time
+from typing import Optional
+
+_STOP = object()
+
+
+class RowWriter:
+    """Off-thread, batched line writer for CSV logs and console output.
+
+    write() formats nothing and never blocks: the row tuple goes onto a
+    bounded queue and is dropped (and counted) if the queue is full. A
+    dedicated thread formats rows with `fmt`, and writes and flushes them
+    once `flush_rows` have accumulated or `flush_ms` has passed since the
+    last flush, and on close(). flush_rows=1 gives the old flush-every-row
+    durability. With max_bytes > 0 the file is rotated to path.1 ..
+    path.<backups> and the header is rewritten.
+    """
+
+    def __init__(self, target, fmt: str, header: Optional[str] = None, max_queue: int = 10000, flush_rows: int = 256, flush_ms: float = 1000.0, max_bytes: int = 0, backups: int = 3):
+        self.fmt = fmt
+        self.header = header
+        self.flush_rows = max(1, flush_rows)
+        self.flush_s = flush_ms / 1000.0
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.backlog_max = 0
+        self.errors = 0
+        # optional metrics.Histogram of flush latency (ns), set by Metrics.watch_writer
+        self.flush_hist = None
+        if isinstance(target, str):
+            self.path = target
+            self._f = None
+            self._open()
+        else:
+            self.path = None
+            self._f = target
+        self._q = queue.Queue(maxsize=max_queue)
+        self._t = threading.Thread(target=self._run, daemon=True)
+        self._t.start()
+
+    def _open(self) -> None:
+        self._f = open(self.path, "a", encoding="utf-8", newline="")
+        if self.header and self._f.tell() == 0:
+            self._f.write(self.header + "\n")
+
+    def write(self, *row) -> bool:
+        try:
+            self._q.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def write_raw(self, line: str) -> bool:
+        try:
+            self._q.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def backlog(self) -> int:
+        return self._q.qsize()
+
+    def close(self) -> None:
+        if self._t.is_alive():
+            self._q.put(_STOP)
+            self._t.join()
+        if self.path is not None and self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def stats_line(self) -> str:
+        return f"written={self.written} dropped={self.dropped} flushes={self.flushes} backlog_max={self.backlog_max} errors={self.errors}"
+
+    def _run(self) -> None:
+        lines = []
+        last_flush = time.monotonic()
+        stop = False
+        while not stop:
+            timeout = max(0.0, last_flush + self.flush_s - time.monotonic())
+            try:
+                row = self._q.get(timeout=timeout if lines else None)
+            except queue.Empty:
+                row = None
+            if row is _STOP:
+                stop = True
+            elif row is not None:
+                lines.append(row if isinstance(row, str) else self.fmt.format(*row))
+                # drain whatever is already queued without waking per row
+                while len(lines) < self.flush_rows:
+                    try:
+                        row = self._q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if row is _STOP:
+                        stop = True
+                        break
+                    lines.append(row if isinstance(row, str) else self.fmt.format(*row))
+            backlog = self._q.qsize()
+            if backlog > self.backlog_max:
+                self.backlog_max = backlog
+            if lines and (stop or len(lines) >= self.flush_rows or time.monotonic() - last_flush >= self.flush_s):
+                self._flush(lines)
+                lines = []
+                last_flush = time.monotonic()
+
+    def _flush(self, lines) -> None:
+        t0 = time.perf_counter_ns()
+        try:
+            self._f.write("".join(lines))
+            self._f.flush()
+        except Exception:
+            self.errors += 1
+            return
+        if self.flush_hist is not None:
+            self.flush_hist.record(time.perf_counter_ns() - t0)
+        self.written += len(lines)
+        self.flushes += 1
+        if self.max_bytes and self.path is not None and self._f.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self) -> None:
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from motion_tracker.datasource import LinuxWirelessSignalSource
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def source(name, interface=None):
+    return LinuxWirelessSignalSource(interface, path=os.path.join(FIXTURES, name))
+
+
+def test_dbm_level():
+    s = source("wireless_dbm.txt")
+    assert s.read_levels() == (54, -56)
+    # dBm maps like netsh: 2 * (dBm + 100)
+    assert s.read() == 88
+    s.close()
+
+
+def test_percent_level_uses_quality():
+    s = source("wireless_percent.txt")
+    assert s.read_levels() == (35, 60)
+    assert s.read() == 50
+    s.close()
+
+
+def test_multiple_interfaces():
+    first = source("wireless_multi.txt")
+    assert first.read_levels() == (40, -70)
+    assert first.read() == 60
+    named = source("wireless_multi.txt", "wlp3s0")
+    assert named.read_levels() == (63, -47)
+    # clamped to 100
+    assert named.read() == 100
+    first.close()
+    named.close()
+
+
+def test_missing_interface():
+    s = source("wireless_multi.txt", "wlan9")
+    with pytest.raises(RuntimeError, match="interface not found"):
+        s.read()
+    s.close()
+
+
+def test_no_interfaces():
+    s = source("wireless_empty.txt")
+    with pytest.raises(RuntimeError, match="no wireless interface"):
+        s.read()
+    s.close()
+
+
+def test_rereads_the_open_file():
+    s = source("wireless_dbm.txt")
+    assert [s.read() for _ in range(3)] == [88, 88, 88]
+    s.close()
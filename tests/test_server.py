@@ -0,0 +1,56 @@
+import asyncio
+
+import numpy as np
+
+from motion_tracker.server import IngestServer, encode_rssi
+
+
+async def _send(seqs, node=1, batch=4):
+    srv = IngestServer()
+    await srv.start("127.0.0.1", 0, tcp=False)
+    port = srv._servers[0].get_extra_info("sockname")[1]
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=("127.0.0.1", port))
+    dt_us = np.arange(batch, dtype=np.uint32) * 10000
+    for seq in seqs:
+        transport.sendto(encode_rssi(node, seq, 0, dt_us, np.full(batch, 50.0)))
+        await asyncio.sleep(0.005)
+    for _ in range(100):
+        if sum(n.packets + n.duplicate for n in srv.nodes.values()) >= len(seqs):
+            break
+        await asyncio.sleep(0.01)
+    transport.close()
+    await srv.stop()
+    return srv, srv.nodes[node]
+
+
+def run(seqs):
+    return asyncio.run(_send(seqs))
+
+
+def test_in_order():
+    srv, node = run(range(10))
+    assert (node.packets, node.lost, node.reordered, node.duplicate) == (10, 0, 0, 0)
+    assert node.last_seq == 9
+    assert node.samples == 40
+
+
+def test_gap_counts_only_missing_packets():
+    srv, node = run([0, 1, 5, 6])
+    assert (node.lost, node.reordered, node.duplicate) == (3, 0, 0)
+    assert node.last_seq == 6
+
+
+def test_reordered_and_duplicate_do_not_count_as_lost():
+    srv, node = run([0, 1, 3, 2, 4, 4, 5])
+    # 2 arrives late: a forward gap of one at 3, then one reordered packet
+    assert (node.lost, node.reordered, node.duplicate) == (1, 1, 1)
+    assert node.last_seq == 5
+    # the duplicate's samples are not fed twice
+    assert node.samples == 6 * 4
+
+
+def test_wraparound():
+    srv, node = run([0xFFFFFFFE, 0xFFFFFFFF, 0, 2, 1])
+    assert (node.lost, node.reordered, node.duplicate) == (1, 1, 0)
+    assert node.last_seq == 2